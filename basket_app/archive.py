@@ -0,0 +1,65 @@
+"""
+Arquivamento de carrinhos antigos.
+
+Carrinhos sem alterações (nem itens novos) desde ``limite`` são copiados para
+``ArchivedBasket``, uma linha por carrinho com os itens num campo JSON, e
+apagados de ``Basket``/``BasketItem``. Cada lote é uma transação curta: os
+carrinhos do lote são bloqueados (``select_for_update``, para que nenhum item
+seja incluído durante a cópia), copiados e apagados sem carregar modelos nem
+enviar sinais; as versões de cache dos carrinhos são incrementadas no fim do
+lote. Entre lotes, ``pausa`` dá vez às escritas da aplicação.
+"""
+import time
+
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+
+from core_app.versioning import BASKETS, basket_namespace, bump_versions
+from .models import ArchivedBasket, Basket, BasketItem
+
+BASKET_FIELDS = ('id', 'nome', 'estabelecimento', 'data_criacao', 'data_atualizacao')
+
+
+def archivable(limite):
+    """Carrinhos sem alterações nem itens novos desde ``limite``"""
+    recentes = BasketItem.objects.filter(basket=OuterRef('pk'), data_adicionado__gte=limite)
+    return Basket.objects.filter(data_atualizacao__lt=limite).exclude(Exists(recentes)).order_by('pk')
+
+
+def _arquivar_lote(limite, batch_size):
+    with transaction.atomic():
+        ids = list(archivable(limite).select_for_update().values_list('pk', flat=True)[:batch_size])
+        if not ids:
+            return 0, 0
+
+        itens = {basket_id: [] for basket_id in ids}
+        linhas_itens = BasketItem.objects.filter(basket_id__in=ids).order_by('pk').values_list(
+            'basket_id', 'produto_id', 'quantidade', 'data_adicionado',
+        )
+        for basket_id, produto_id, quantidade, data_adicionado in linhas_itens:
+            itens[basket_id].append([produto_id, quantidade, data_adicionado])
+
+        ArchivedBasket.objects.bulk_create(
+            ArchivedBasket(**basket, itens=itens[basket['id']])
+            for basket in Basket.objects.filter(pk__in=ids).values(*BASKET_FIELDS)
+        )
+        for queryset in (BasketItem.objects.filter(basket_id__in=ids), Basket.objects.filter(pk__in=ids)):
+            queryset._raw_delete(queryset.db)
+        bump_versions(BASKETS, *(basket_namespace(basket_id) for basket_id in ids))
+    return len(ids), sum(len(lista) for lista in itens.values())
+
+
+def archive_baskets(limite, batch_size=500, pausa=0, progress=None):
+    """Arquiva os carrinhos de ``archivable(limite)``; retorna ``(carrinhos, itens)`` arquivados"""
+    carrinhos = itens = 0
+    while True:
+        lote, itens_lote = _arquivar_lote(limite, batch_size)
+        if not lote:
+            return carrinhos, itens
+        carrinhos += lote
+        itens += itens_lote
+        if progress is not None:
+            progress(carrinhos, itens)
+        if lote < batch_size:
+            return carrinhos, itens
+        time.sleep(pausa)
@@ -0,0 +1,113 @@
+"""
+Cliente da API de produtos (items_app) usado pelo basket_app.
+
+``CatalogoProdutos`` guarda os produtos já buscados durante uma requisição e
+busca os que faltam em lote (``GET /api/produtos/?ids=1,2,3``). Se a resposta
+em lote não for uma lista (API antiga, proxy, resposta inesperada), cada
+produto é buscado individualmente, como antes.
+
+Os produtos mais usados podem ser pré-carregados no processo com
+``preload`` (ver core_app.warmup); eles valem para todas as requisições
+enquanto a versão do catálogo não mudar.
+"""
+import requests
+from django.conf import settings
+
+from core_app.cache import mark_degraded
+from core_app.instrumentation import track_outbound
+from core_app.versioning import CATALOG, get_version
+
+# Resultados de uma busca além dos dados do produto
+NAO_ENCONTRADO = 'nao_encontrado'
+ERRO = 'erro'
+
+# Exceções tratadas como falha na busca de um produto
+ERROS_API = (requests.RequestException, ValueError, TypeError)
+
+
+def items_api_url():
+    return getattr(settings, 'ITEMS_API_URL', 'http://localhost:8000/api/produtos/')
+
+
+def buscar_produto(produto_id):
+    """Busca um produto; retorna o dicionário, ``NAO_ENCONTRADO`` ou ``ERRO``"""
+    try:
+        url = f"{items_api_url()}{produto_id}/"
+        with track_outbound('catalogo', url) as chamada:
+            response = requests.get(url, timeout=5, headers=chamada.headers)
+            chamada.status = response.status_code
+        if response.status_code != 200:
+            return NAO_ENCONTRADO
+        return response.json()
+    except ERROS_API:
+        # A resposta que usar este resultado não deve ficar em cache
+        mark_degraded()
+        return ERRO
+
+
+# Produtos pré-carregados no processo e a versão do catálogo em que foram buscados
+_quentes = {'versao': None, 'produtos': {}}
+
+
+def produtos_quentes():
+    """Cópia dos produtos pré-carregados, vazia se o catálogo mudou desde o carregamento"""
+    if not _quentes['produtos']:
+        return {}
+    if get_version(CATALOG) != _quentes['versao']:
+        _quentes['produtos'] = {}
+        return {}
+    return dict(_quentes['produtos'])
+
+
+def preload(produto_ids):
+    """Busca os produtos e os mantém para as próximas requisições; retorna quantos foram encontrados"""
+    versao = get_version(CATALOG)
+    catalogo = CatalogoProdutos()
+    catalogo.prefetch(produto_ids)
+    produtos = {pid: dados for pid, dados in catalogo._produtos.items() if isinstance(dados, dict)}
+    _quentes.update(versao=versao, produtos=produtos)
+    return len(produtos)
+
+
+class CatalogoProdutos:
+    """Produtos consultados durante uma requisição, buscados em lote"""
+
+    def __init__(self, batch_size=None):
+        self.batch_size = batch_size or getattr(settings, 'ITEMS_API_BATCH_SIZE', 200)
+        self._produtos = produtos_quentes()
+
+    def prefetch(self, produto_ids):
+        """Busca de uma vez os produtos ainda não consultados"""
+        faltantes = [pid for pid in dict.fromkeys(produto_ids) if pid not in self._produtos]
+        for inicio in range(0, len(faltantes), self.batch_size):
+            self._buscar_lote(faltantes[inicio:inicio + self.batch_size])
+
+    def get(self, produto_id):
+        """Dados do produto, ``NAO_ENCONTRADO`` ou ``ERRO``"""
+        if produto_id not in self._produtos:
+            self._produtos[produto_id] = buscar_produto(produto_id)
+        return self._produtos[produto_id]
+
+    def _buscar_lote(self, produto_ids):
+        if len(produto_ids) == 1:
+            self.get(produto_ids[0])
+            return
+
+        ids = ','.join(str(pid) for pid in produto_ids)
+        try:
+            url = f"{items_api_url()}?ids={ids}"
+            with track_outbound('catalogo', url) as chamada:
+                response = requests.get(url, timeout=5, headers=chamada.headers)
+                chamada.status = response.status_code
+            produtos = response.json() if response.status_code == 200 else None
+        except ERROS_API:
+            produtos = None
+
+        if not isinstance(produtos, list):
+            for produto_id in produto_ids:
+                self.get(produto_id)
+            return
+
+        encontrados = {produto.get('id'): produto for produto in produtos if isinstance(produto, dict)}
+        for produto_id in produto_ids:
+            self._produtos[produto_id] = encontrados.get(produto_id, NAO_ENCONTRADO)
@@ -0,0 +1,39 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from basket_app.archive import archivable, archive_baskets
+
+
+class Command(BaseCommand):
+    help = 'Move carrinhos antigos e seus itens para a tabela de arquivo, em lotes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--older-than', type=int, required=True,
+                            help='Arquiva carrinhos sem alterações nem itens novos há N dias')
+        parser.add_argument('--batch-size', type=int, default=500, help='Carrinhos por transação (padrão: 500)')
+        parser.add_argument('--pause', type=float, default=0.05,
+                            help='Pausa (segundos) entre lotes, para não atrasar as escritas (padrão: 0.05)')
+        parser.add_argument('--dry-run', action='store_true', help='Apenas conta os carrinhos que seriam arquivados')
+
+    def handle(self, *args, **options):
+        if options['older_than'] < 0 or options['batch_size'] < 1:
+            raise CommandError('--older-than deve ser >= 0 e --batch-size >= 1')
+        limite = timezone.now() - timedelta(days=options['older_than'])
+
+        if options['dry_run']:
+            self.stdout.write(f'{archivable(limite).count():,} carrinhos seriam arquivados')
+            return
+
+        inicio = time.perf_counter()
+        carrinhos, itens = archive_baskets(
+            limite,
+            batch_size=options['batch_size'],
+            pausa=options['pause'],
+            progress=lambda carrinhos, itens: self.stdout.write(f'  {carrinhos:,} carrinhos, {itens:,} itens'),
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'{carrinhos:,} carrinhos e {itens:,} itens arquivados em {time.perf_counter() - inicio:.1f} s'
+        ))
@@ -0,0 +1,23 @@
+# Generated by Django 6.1.2 on 2026-10-18 23:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('basket_app', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='basket',
+            name='versao',
+            field=models.PositiveIntegerField(db_default=1, default=1, editable=False, help_text='Versão para o If-Match'),
+        ),
+        migrations.AddField(
+            model_name='basketitem',
+            name='versao',
+            field=models.PositiveIntegerField(db_default=1, default=1, editable=False, help_text='Versão para o If-Match'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 6.1.2 on 2026-10-18 23:55
+
+import django.core.serializers.json
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('basket_app', '0002_versao'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedBasket',
+            fields=[
+                ('id', models.BigIntegerField(help_text='Mesmo ID do carrinho original', primary_key=True, serialize=False)),
+                ('nome', models.CharField(max_length=200)),
+                ('estabelecimento', models.CharField(max_length=200)),
+                ('data_criacao', models.DateTimeField()),
+                ('data_atualizacao', models.DateTimeField()),
+                ('itens', models.JSONField(default=list, encoder=django.core.serializers.json.DjangoJSONEncoder, help_text='Lista de [produto_id, quantidade, data_adicionado]')),
+                ('data_arquivamento', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['-data_criacao'],
+            },
+        ),
+    ]
@@ -1,3 +1,4 @@
+from django.core.serializers.json import DjangoJSONEncoder
 from django.db import models
 
 class ApiModel(models.Model):
@@ -13,6 +14,7 @@ class Basket(models.Model):
     estabelecimento = models.CharField(max_length=200, help_text="Nome do estabelecimento")
     data_criacao = models.DateTimeField(auto_now_add=True)
     data_atualizacao = models.DateTimeField(auto_now=True)
+    versao = models.PositiveIntegerField(default=1, db_default=1, editable=False, help_text="Versão para o If-Match")
     
     class Meta:
         ordering = ['-data_criacao']
@@ -26,9 +28,28 @@ class BasketItem(models.Model):
     produto_id = models.IntegerField(help_text="ID do produto no items_app")
     quantidade = models.PositiveIntegerField(default=1)
     data_adicionado = models.DateTimeField(auto_now_add=True)
+    versao = models.PositiveIntegerField(default=1, db_default=1, editable=False, help_text="Versão para o If-Match")
     
     class Meta:
         ordering = ['-data_adicionado']
     
     def __str__(self):
-        return f"{self.basket.nome} - Produto ID: {self.produto_id} - Qtd: {self.quantidade}"
\ No newline at end of file
+        return f"{self.basket.nome} - Produto ID: {self.produto_id} - Qtd: {self.quantidade}"
+
+
+class ArchivedBasket(models.Model):
+    """Carrinho arquivado com seus itens, somente leitura (ver basket_app.archive)"""
+    id = models.BigIntegerField(primary_key=True, help_text="Mesmo ID do carrinho original")
+    nome = models.CharField(max_length=200)
+    estabelecimento = models.CharField(max_length=200)
+    data_criacao = models.DateTimeField()
+    data_atualizacao = models.DateTimeField()
+    itens = models.JSONField(default=list, encoder=DjangoJSONEncoder,
+                             help_text="Lista de [produto_id, quantidade, data_adicionado]")
+    data_arquivamento = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-data_criacao']
+
+    def __str__(self):
+        return f"{self.nome} - {self.estabelecimento} (arquivado)"
@@ -1,7 +1,9 @@
 from rest_framework import serializers
-import requests
-from django.conf import settings
-from .models import ApiModel, Basket, BasketItem
+from django.db import models
+from core_app.instrumentation import TimedSerializerMixin
+from core_app.serializers import SparseFieldsMixin
+from .catalog import ERRO, NAO_ENCONTRADO, CatalogoProdutos
+from .models import ApiModel, ArchivedBasket, Basket, BasketItem
 
 
 class ApiModelSerializer(serializers.ModelSerializer):
@@ -11,14 +13,59 @@ class ApiModelSerializer(serializers.ModelSerializer):
         read_only_fields = ['identificador']  # Campo auto-incremento é somente leitura
 
 
-class BasketSerializer(serializers.ModelSerializer):
+class CatalogoListSerializer(serializers.ListSerializer):
+    """Busca em lote os produtos de todos os objetos antes de serializá-los"""
+
+    def to_representation(self, data):
+        iterable = data.all() if isinstance(data, models.manager.BaseManager) else data
+        self.child.prefetch_produtos(iterable)
+        return super().to_representation(iterable)
+
+
+class CatalogoMixin:
+    """
+    Campos calculados com dados da API de produtos.
+
+    Os produtos vêm de um ``CatalogoProdutos``: o do contexto (``catalogo``),
+    compartilhado pela requisição, ou um próprio do serializer. Listagens
+    buscam todos os produtos de uma vez; objetos avulsos só fazem a busca em
+    lote quando há catálogo no contexto.
+    """
+    catalogo_fields = set()
+
+    @property
+    def catalogo(self):
+        catalogo = self.context.get('catalogo')
+        if catalogo is None:
+            catalogo = self.__dict__.setdefault('_catalogo', CatalogoProdutos())
+        return catalogo
+
+    def get_produto_ids(self, instances):
+        raise NotImplementedError('Defina os produtos usados pelo serializer')
+
+    def prefetch_produtos(self, instances):
+        if self.catalogo_fields & set(self.fields):
+            self.catalogo.prefetch(self.get_produto_ids(instances))
+
+    def to_representation(self, instance):
+        if 'catalogo' in self.context:
+            self.prefetch_produtos([instance])
+        return super().to_representation(instance)
+
+
+class BasketSerializer(TimedSerializerMixin, CatalogoMixin, SparseFieldsMixin, serializers.ModelSerializer):
     total_itens = serializers.SerializerMethodField()
     valor_total = serializers.SerializerMethodField()
+    catalogo_fields = {'valor_total'}
     
     class Meta:
         model = Basket
-        fields = ['id', 'nome', 'estabelecimento', 'total_itens', 'valor_total', 'data_criacao', 'data_atualizacao']
-        read_only_fields = ['id', 'data_criacao', 'data_atualizacao']
+        fields = ['id', 'nome', 'estabelecimento', 'total_itens', 'valor_total', 'data_criacao', 'data_atualizacao', 'versao']
+        read_only_fields = ['id', 'data_criacao', 'data_atualizacao', 'versao']
+        list_serializer_class = CatalogoListSerializer
+    
+    def get_produto_ids(self, baskets):
+        return [item.produto_id for basket in baskets for item in basket.itens.all()]
     
     def get_total_itens(self, obj):
         """Retorna o total de itens únicos no carrinho"""
@@ -27,58 +74,54 @@ class BasketSerializer(serializers.ModelSerializer):
     def get_valor_total(self, obj):
         """Calcula o valor total do carrinho"""
         valor_total = 0.0
-        base_url = getattr(settings, 'ITEMS_API_URL', 'http://localhost:8000/api/produtos/')
         
         for item in obj.itens.all():
+            produto_data = self.catalogo.get(item.produto_id)
+            if produto_data in (NAO_ENCONTRADO, ERRO):
+                continue
             try:
-                response = requests.get(f"{base_url}{item.produto_id}/", timeout=5)
-                if response.status_code == 200:
-                    produto_data = response.json()
-                    preco = float(produto_data.get('preco', 0))
-                    valor_total += preco * item.quantidade
-            except (requests.RequestException, ValueError, TypeError):
+                preco = float(produto_data.get('preco', 0))
+                valor_total += preco * item.quantidade
+            except (ValueError, TypeError):
                 continue
         
         return round(valor_total, 2)
 
 
-class BasketItemSerializer(serializers.ModelSerializer):
+class BasketItemSerializer(TimedSerializerMixin, CatalogoMixin, SparseFieldsMixin, serializers.ModelSerializer):
     produto_nome = serializers.SerializerMethodField()
     produto_preco = serializers.SerializerMethodField()
     subtotal = serializers.SerializerMethodField()
     basket_nome = serializers.SerializerMethodField()
+    catalogo_fields = {'produto_nome', 'produto_preco', 'subtotal'}
     
     class Meta:
         model = BasketItem
-        fields = ['id', 'basket', 'basket_nome', 'produto_id', 'produto_nome', 'produto_preco', 'quantidade', 'subtotal', 'data_adicionado']
-        read_only_fields = ['id', 'data_adicionado']
+        fields = ['id', 'basket', 'basket_nome', 'produto_id', 'produto_nome', 'produto_preco', 'quantidade', 'subtotal', 'data_adicionado', 'versao']
+        read_only_fields = ['id', 'data_adicionado', 'versao']
+        list_serializer_class = CatalogoListSerializer
+    
+    def get_produto_ids(self, items):
+        return [item.produto_id for item in items]
     
     def get_basket_nome(self, obj):
         """Retorna o nome do carrinho"""
         return f"{obj.basket.nome} - {obj.basket.estabelecimento}"
     
     def get_produto_nome(self, obj):
-        try:
-            base_url = getattr(settings, 'ITEMS_API_URL', 'http://localhost:8000/api/produtos/')
-            response = requests.get(f"{base_url}{obj.produto_id}/", timeout=5)
-            if response.status_code == 200:
-                produto_data = response.json()
-                return produto_data.get('nome', 'Produto não encontrado')
-            return 'Produto não encontrado'
-        except requests.RequestException:
+        produto_data = self.catalogo.get(obj.produto_id)
+        if produto_data == ERRO:
             return 'Erro ao buscar produto'
+        if produto_data == NAO_ENCONTRADO:
+            return 'Produto não encontrado'
+        return produto_data.get('nome', 'Produto não encontrado')
     
     def get_produto_preco(self, obj):
         """Busca o preço do produto via API do items_app"""
-        try:
-            base_url = getattr(settings, 'ITEMS_API_URL', 'http://localhost:8000/api/produtos/')
-            response = requests.get(f"{base_url}{obj.produto_id}/", timeout=5)
-            if response.status_code == 200:
-                produto_data = response.json()
-                return produto_data.get('preco', '0.00')
-            return '0.00'
-        except requests.RequestException:
+        produto_data = self.catalogo.get(obj.produto_id)
+        if produto_data in (NAO_ENCONTRADO, ERRO):
             return '0.00'
+        return produto_data.get('preco', '0.00')
     
     def get_subtotal(self, obj):
         try:
@@ -87,3 +130,24 @@ class BasketItemSerializer(serializers.ModelSerializer):
             return round(preco * obj.quantidade, 2)
         except (ValueError, TypeError):
             return 0.0
+
+
+class ArchivedBasketSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    total_itens = serializers.SerializerMethodField()
+    itens = serializers.SerializerMethodField()
+
+    class Meta:
+        model = ArchivedBasket
+        fields = ['id', 'nome', 'estabelecimento', 'total_itens', 'itens',
+                  'data_criacao', 'data_atualizacao', 'data_arquivamento']
+        read_only_fields = fields
+
+    def get_total_itens(self, obj):
+        return len(obj.itens)
+
+    def get_itens(self, obj):
+        """Itens como guardados no carrinho original, sem dados da API de produtos"""
+        return [
+            {'produto_id': produto_id, 'quantidade': quantidade, 'data_adicionado': data_adicionado}
+            for produto_id, quantidade, data_adicionado in obj.itens
+        ]
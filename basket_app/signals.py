@@ -0,0 +1,31 @@
+from django.conf import settings
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from core_app.jobs import enqueue
+from core_app.versioning import BASKETS, basket_namespace, bump_versions, versions_bumped
+from .models import Basket, BasketItem
+from .tasks import refresh_baskets_with_produto
+
+
+@receiver([post_save, post_delete], sender=Basket)
+def invalidar_carrinho(sender, instance, **kwargs):
+    """Alterações no carrinho invalidam a listagem e o próprio carrinho"""
+    bump_versions(BASKETS, basket_namespace(instance.pk))
+
+
+@receiver([post_save, post_delete], sender=BasketItem)
+def invalidar_item_carrinho(sender, instance, **kwargs):
+    """Alterações em itens mudam totais do carrinho e da listagem"""
+    bump_versions(BASKETS, basket_namespace(instance.basket_id))
+
+
+@receiver(versions_bumped)
+def renovar_carrinhos_do_produto(sender, namespaces, **kwargs):
+    """Produtos alterados mudam os totais dos carrinhos que os têm, renovados em segundo plano"""
+    if not (getattr(settings, 'JOBS_ENABLED', False) and getattr(settings, 'PROXY_PURGE_URL', None)):
+        return
+    for namespace in namespaces:
+        tipo, _, produto_id = namespace.partition(':')
+        if tipo == 'produto':
+            enqueue(refresh_baskets_with_produto, int(produto_id), key=f'refresh-produto:{produto_id}')
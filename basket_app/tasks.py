@@ -0,0 +1,25 @@
+"""
+Tarefas em segundo plano do basket_app (ver core_app.jobs).
+"""
+from core_app.jobs import enqueue, task
+from core_app.purge import purge
+from core_app.versioning import basket_namespace
+from .models import BasketItem
+
+# Carrinhos renovados por tarefa de purga
+REFRESH_BATCH_SIZE = 100
+
+
+@task
+def refresh_baskets_with_produto(produto_id):
+    """
+    Recalcula no proxy os carrinhos que têm o produto (ex.: após mudança de
+    preço), em tarefas de purga de até ``REFRESH_BATCH_SIZE`` carrinhos
+    """
+    basket_ids = list(
+        BasketItem.objects.filter(produto_id=produto_id)
+        .order_by('basket_id').values_list('basket_id', flat=True).distinct()
+    )
+    for inicio in range(0, len(basket_ids), REFRESH_BATCH_SIZE):
+        lote = [basket_namespace(basket_id) for basket_id in basket_ids[inicio:inicio + REFRESH_BATCH_SIZE]]
+        enqueue(purge, lote, key=f"purge:{' '.join(sorted(lote))}")
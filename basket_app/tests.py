@@ -1,10 +1,21 @@
-from django.test import TestCase
+from datetime import timedelta
+from io import StringIO
+import requests
+from django.core.management import call_command
+from django.db.models import F
+from django.utils import timezone
+from django.test import TestCase, override_settings
 from django.urls import reverse
 from rest_framework.test import APITestCase
-from rest_framework import status
+from rest_framework import serializers, status
 from unittest.mock import patch, Mock
-from .models import Basket, BasketItem, ApiModel
+from core_app.models import Job
+from core_app.testing import BudgetRecorder, BudgetTestMixin, ItemsAPIFake
+from items_app.models import Produto
+from .models import ArchivedBasket, Basket, BasketItem, ApiModel
 from .serializers import ApiModelSerializer, BasketSerializer, BasketItemSerializer
+from .tasks import refresh_baskets_with_produto
+from .views import BasketViewSet
 
 
 class BasketModelTest(TestCase):
@@ -106,6 +117,16 @@ class BasketAPITest(APITestCase):
         self.assertEqual(len(response.data), 1)
         self.assertEqual(response.data[0]['nome'], 'Lista Existente')
     
+    def test_list_baskets_paginada_com_busca(self):
+        """Testa a listagem paginada (?limit=) com busca por nome ou estabelecimento"""
+        Basket.objects.create(nome="Churrasco", estabelecimento="Açougue")
+        url = reverse('basketlist-list')
+        response = self.client.get(url, {'limit': 1, 'search': 'açougue'})
+
+        self.assertEqual(response.data['count'], 1)
+        self.assertEqual(response.data['results'][0]['nome'], 'Churrasco')
+        self.assertEqual(self.client.get(url, {'limit': 1}).data['count'], 2)
+
     def test_retrieve_basket(self):
         """Testa a busca de um carrinho específico via API"""
         url = reverse('basketlist-detail', kwargs={'pk': self.basket.id})
@@ -278,7 +299,7 @@ class BasketSummaryAPITest(APITestCase):
         
         self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
     
-    @patch('basket_app.views.requests.get')
+    @patch('basket_app.catalog.requests.get')
     def test_basket_summary_api_error(self, mock_get):
         """Testa resumo quando há erro na API de produtos"""
         # Mock de erro na API
@@ -360,7 +381,7 @@ class SerializerTest(TestCase):
         total_itens = serializer.get_total_itens(self.basket)
         self.assertEqual(total_itens, 2)  # 2 itens no carrinho
     
-    @patch('basket_app.serializers.requests.get')
+    @patch('basket_app.catalog.requests.get')
     def test_basket_serializer_valor_total_success(self, mock_get):
         """Testa o método get_valor_total com sucesso na API"""
         # Mock da resposta da API
@@ -376,7 +397,7 @@ class SerializerTest(TestCase):
         self.assertEqual(valor_total, 46.50)
         mock_get.assert_called_once()
     
-    @patch('basket_app.serializers.requests.get')
+    @patch('basket_app.catalog.requests.get')
     def test_basket_serializer_valor_total_api_error(self, mock_get):
         """Testa o método get_valor_total com erro na API"""
         # Mock de erro na API
@@ -388,7 +409,7 @@ class SerializerTest(TestCase):
         # Deve retornar 0.0 quando há erro
         self.assertEqual(valor_total, 0.0)
     
-    @patch('basket_app.serializers.requests.get')
+    @patch('basket_app.catalog.requests.get')
     def test_basket_serializer_valor_total_invalid_response(self, mock_get):
         """Testa o método get_valor_total com resposta inválida"""
         # Mock de resposta inválida
@@ -423,7 +444,7 @@ class SerializerTest(TestCase):
         expected_nome = "Lista Serializer Teste - Supermercado Serializer"
         self.assertEqual(basket_nome, expected_nome)
     
-    @patch('basket_app.serializers.requests.get')
+    @patch('basket_app.catalog.requests.get')
     def test_basket_item_serializer_produto_nome_success(self, mock_get):
         """Testa o método get_produto_nome com sucesso"""
         mock_response = Mock()
@@ -436,7 +457,7 @@ class SerializerTest(TestCase):
         
         self.assertEqual(produto_nome, 'Produto Teste')
     
-    @patch('basket_app.serializers.requests.get')
+    @patch('basket_app.catalog.requests.get')
     def test_basket_item_serializer_produto_nome_not_found(self, mock_get):
         """Testa o método get_produto_nome quando produto não é encontrado"""
         mock_response = Mock()
@@ -448,7 +469,7 @@ class SerializerTest(TestCase):
         
         self.assertEqual(produto_nome, 'Produto não encontrado')
     
-    @patch('basket_app.serializers.requests.get')
+    @patch('basket_app.catalog.requests.get')
     def test_basket_item_serializer_produto_nome_api_error(self, mock_get):
         """Testa o método get_produto_nome com erro na API"""
         mock_get.side_effect = Exception("API Error")
@@ -458,7 +479,7 @@ class SerializerTest(TestCase):
         
         self.assertEqual(produto_nome, 'Erro ao buscar produto')
     
-    @patch('basket_app.serializers.requests.get')
+    @patch('basket_app.catalog.requests.get')
     def test_basket_item_serializer_produto_preco_success(self, mock_get):
         """Testa o método get_produto_preco com sucesso"""
         mock_response = Mock()
@@ -471,7 +492,7 @@ class SerializerTest(TestCase):
         
         self.assertEqual(produto_preco, '15.50')
     
-    @patch('basket_app.serializers.requests.get')
+    @patch('basket_app.catalog.requests.get')
     def test_basket_item_serializer_produto_preco_not_found(self, mock_get):
         """Testa o método get_produto_preco quando produto não é encontrado"""
         mock_response = Mock()
@@ -483,7 +504,7 @@ class SerializerTest(TestCase):
         
         self.assertEqual(produto_preco, '0.00')
     
-    @patch('basket_app.serializers.requests.get')
+    @patch('basket_app.catalog.requests.get')
     def test_basket_item_serializer_produto_preco_api_error(self, mock_get):
         """Testa o método get_produto_preco com erro na API"""
         mock_get.side_effect = Exception("API Error")
@@ -493,7 +514,7 @@ class SerializerTest(TestCase):
         
         self.assertEqual(produto_preco, '0.00')
     
-    @patch('basket_app.serializers.requests.get')
+    @patch('basket_app.catalog.requests.get')
     def test_basket_item_serializer_subtotal_success(self, mock_get):
         """Testa o método get_subtotal com sucesso"""
         mock_response = Mock()
@@ -507,7 +528,7 @@ class SerializerTest(TestCase):
         # 3 itens * R$ 15,50 = R$ 46,50
         self.assertEqual(subtotal, 46.50)
     
-    @patch('basket_app.serializers.requests.get')
+    @patch('basket_app.catalog.requests.get')
     def test_basket_item_serializer_subtotal_invalid_preco(self, mock_get):
         """Testa o método get_subtotal com preço inválido"""
         mock_response = Mock()
@@ -521,7 +542,7 @@ class SerializerTest(TestCase):
         # Deve retornar 0.0 quando preço é inválido
         self.assertEqual(subtotal, 0.0)
     
-    @patch('basket_app.serializers.requests.get')
+    @patch('basket_app.catalog.requests.get')
     def test_basket_item_serializer_subtotal_error_preco(self, mock_get):
         """Testa o método get_subtotal quando get_produto_preco retorna erro"""
         mock_response = Mock()
@@ -534,3 +555,470 @@ class SerializerTest(TestCase):
         
         # Deve retornar 0.0 quando há erro
         self.assertEqual(subtotal, 0.0)
+
+
+class SparseFieldsAPITest(APITestCase):
+    """Testes para ?fields= e ?omit= nas APIs de carrinhos e itens"""
+
+    def setUp(self):
+        self.basket = Basket.objects.create(
+            nome="Lista Teste",
+            estabelecimento="Supermercado Teste"
+        )
+        self.basket_item = BasketItem.objects.create(
+            basket=self.basket,
+            produto_id=1,
+            quantidade=2
+        )
+
+    @patch('requests.get')
+    def test_list_baskets_sem_precos(self, mock_get):
+        """Testa que nomes e ids não disparam chamadas à API de produtos"""
+        url = reverse('basketlist-list')
+        response = self.client.get(url, {'fields': 'id,nome'})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, [{'id': self.basket.id, 'nome': 'Lista Teste'}])
+        mock_get.assert_not_called()
+
+    @patch('requests.get')
+    def test_list_baskets_omit_valor_total(self, mock_get):
+        """Testa que campos omitidos não são avaliados"""
+        url = reverse('basketlist-list')
+        response = self.client.get(url, {'omit': 'valor_total'})
+
+        self.assertEqual(response.data[0]['total_itens'], 1)
+        self.assertNotIn('valor_total', response.data[0])
+        mock_get.assert_not_called()
+
+    @patch('requests.get')
+    def test_list_basket_items_via_values(self, mock_get):
+        """Testa a listagem de itens via values() com chave estrangeira"""
+        url = reverse('basketitem-list')
+        response = self.client.get(url, {'fields': 'id,basket,produto_id,quantidade,data_adicionado'})
+
+        data_adicionado = serializers.DateTimeField().to_representation(self.basket_item.data_adicionado)
+        self.assertEqual(response.data, [{
+            'id': self.basket_item.id,
+            'basket': self.basket.id,
+            'produto_id': 1,
+            'quantidade': 2,
+            'data_adicionado': data_adicionado,
+        }])
+        mock_get.assert_not_called()
+
+    @patch('requests.get')
+    def test_retrieve_basket_item_fields(self, mock_get):
+        """Testa ?fields= no detalhe do item"""
+        mock_response = Mock()
+        mock_response.status_code = 200
+        mock_response.json.return_value = {'nome': 'Produto Teste', 'preco': '29.99'}
+        mock_get.return_value = mock_response
+
+        url = reverse('basketitem-detail', kwargs={'pk': self.basket_item.id})
+        response = self.client.get(url, {'fields': 'id,produto_nome'})
+
+        self.assertEqual(response.data, {'id': self.basket_item.id, 'produto_nome': 'Produto Teste'})
+        mock_get.assert_called_once()
+
+
+class ColumnarAPITest(APITestCase):
+    """Testes para ?format=columnar na API de itens do carrinho"""
+
+    def setUp(self):
+        self.basket = Basket.objects.create(nome="Lista", estabelecimento="Mercado")
+        BasketItem.objects.create(basket=self.basket, produto_id=1, quantidade=2)
+        BasketItem.objects.create(basket=self.basket, produto_id=2, quantidade=5)
+
+    @patch('requests.get')
+    def test_list_basket_items_columnar(self, mock_get):
+        """Testa itens em formato colunar a partir de values_list()"""
+        url = reverse('basketitem-list')
+        response = self.client.get(url, {'format': 'columnar', 'fields': 'basket,produto_id,quantidade'})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json(), {
+            'fields': ['basket', 'produto_id', 'quantidade'],
+            'columns': [[self.basket.id, self.basket.id], [2, 1], [5, 2]],
+            'count': 2,
+        })
+        mock_get.assert_not_called()
+
+    @patch('requests.get')
+    def test_list_basket_items_columnar_campos_calculados(self, mock_get):
+        """Testa o formato colunar quando há campos calculados"""
+        mock_response = Mock()
+        mock_response.status_code = 200
+        mock_response.json.return_value = {'nome': 'Produto Teste', 'preco': '10.00'}
+        mock_get.return_value = mock_response
+
+        url = reverse('basketitem-list')
+        response = self.client.get(url, {'format': 'columnar', 'fields': 'produto_id,subtotal'})
+
+        self.assertEqual(response.json()['columns'], [[2, 1], [50.0, 20.0]])
+
+
+    @patch('requests.get')
+    def test_list_columnar_vazio_com_campos_calculados(self, mock_get):
+        """Testa que a listagem vazia mantém o cabeçalho mesmo fora do caminho de values()"""
+        Basket.objects.all().delete()
+        response = self.client.get(reverse('basketitem-list'), {'format': 'columnar', 'fields': 'produto_id,subtotal'})
+        self.assertEqual(response.json(), {'fields': ['produto_id', 'subtotal'], 'columns': [[], []], 'count': 0})
+
+        # Página vazia de uma listagem paginada
+        response = self.client.get(
+            reverse('basketlist-list'), {'format': 'columnar', 'fields': 'nome,valor_total', 'limit': 10},
+        )
+        self.assertEqual(response.json()['results']['fields'], ['nome', 'valor_total'])
+
+
+class ResponseCacheAPITest(APITestCase):
+    """Testes para o cache de respostas versionado"""
+
+    def setUp(self):
+        self.basket = Basket.objects.create(nome="Lista", estabelecimento="Mercado")
+        self.basket_item = BasketItem.objects.create(basket=self.basket, produto_id=1, quantidade=2)
+        self.mock_response = Mock()
+        self.mock_response.status_code = 200
+        self.mock_response.json.return_value = {'nome': 'Produto Teste', 'preco': '10.00'}
+
+    @patch('requests.get')
+    def test_summary_servido_do_cache(self, mock_get):
+        """Testa que leituras repetidas não recalculam o resumo"""
+        mock_get.return_value = self.mock_response
+        url = reverse('basket-summary-specific', kwargs={'basket_id': self.basket.id})
+
+        primeira = self.client.get(url)
+        chamadas = mock_get.call_count
+        segunda = self.client.get(url)
+
+        self.assertEqual(primeira['X-Cache'], 'MISS')
+        self.assertEqual(segunda['X-Cache'], 'HIT')
+        self.assertEqual(segunda.data, primeira.data)
+        self.assertEqual(mock_get.call_count, chamadas)
+
+    @patch('requests.get')
+    def test_resposta_degradada_nao_fica_em_cache(self, mock_get):
+        """Testa que um resumo calculado com a API de produtos fora do ar não é guardado"""
+        mock_get.side_effect = requests.ConnectionError
+        for nome, kwargs in (('basket-summary-specific', {'basket_id': self.basket.id}),
+                             ('basketlist-detail', {'pk': self.basket.id})):
+            with self.subTest(endpoint=nome):
+                url = reverse(nome, kwargs=kwargs)
+                mock_get.side_effect = requests.ConnectionError
+                degradada = self.client.get(url)
+                self.assertEqual(degradada['X-Cache'], 'BYPASS')
+                self.assertIn('no-store', degradada['Cache-Control'])
+                self.assertFalse(degradada.has_header('ETag'))
+                self.assertFalse(degradada.has_header('Surrogate-Key'))
+
+                mock_get.side_effect = None
+                mock_get.return_value = self.mock_response
+                response = self.client.get(url)
+                self.assertEqual(response['X-Cache'], 'MISS')
+                self.assertEqual(response.data['valor_total'], 20.0)
+
+    @patch('requests.get')
+    def test_listagens_degradadas_fora_do_proxy(self, mock_get):
+        """Testa que listagens calculadas com a API de produtos fora do ar não são compartilhadas nem revalidadas"""
+        for nome in ('basketlist-list', 'basketitem-list'):
+            with self.subTest(endpoint=nome):
+                url = reverse(nome)
+                mock_get.side_effect = requests.ConnectionError
+                degradada = self.client.get(url)
+                self.assertEqual(degradada['Cache-Control'], 'private, no-store')
+                self.assertFalse(degradada.has_header('ETag'))
+
+                mock_get.side_effect = None
+                mock_get.return_value = self.mock_response
+                response = self.client.get(url)
+                self.assertIn('s-maxage', response['Cache-Control'])
+                self.assertTrue(response.has_header('ETag'))
+
+    @override_settings(API_CACHE_ENABLED=False)
+    @patch('requests.get')
+    def test_etag_somente_de_respostas_completas(self, mock_get):
+        """Testa que a falha da API não gera ETag e não descarta a cópia completa do cliente"""
+        url = reverse('basketlist-detail', kwargs={'pk': self.basket.id})
+        mock_get.return_value = self.mock_response
+        etag = self.client.get(url)['ETag']
+
+        mock_get.side_effect = requests.ConnectionError
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        degradada = self.client.get(url)
+        self.assertEqual(degradada.status_code, 200)
+        self.assertFalse(degradada.has_header('ETag'))
+
+        mock_get.side_effect = None
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    @patch('requests.get')
+    def test_summary_invalidado_por_escrita_na_api(self, mock_get):
+        """Testa que uma escrita via API invalida o resumo do carrinho"""
+        mock_get.return_value = self.mock_response
+        url = reverse('basket-summary-specific', kwargs={'basket_id': self.basket.id})
+        self.client.get(url)
+
+        item_url = reverse('basketitem-detail', kwargs={'pk': self.basket_item.id})
+        self.client.patch(item_url, {'quantidade': 5}, format='json')
+        response = self.client.get(url)
+
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.data['total_quantidade'], 5)
+        self.assertEqual(response.data['valor_total'], 50.0)
+
+    @patch('requests.get')
+    def test_basket_invalidado_por_escrita_no_orm(self, mock_get):
+        """Testa que escritas fora da API (signals) também invalidam"""
+        mock_get.return_value = self.mock_response
+        url = reverse('basketlist-detail', kwargs={'pk': self.basket.id})
+        self.client.get(url)
+
+        BasketItem.objects.create(basket=self.basket, produto_id=2, quantidade=1)
+        response = self.client.get(url)
+
+        self.assertEqual(response.data['total_itens'], 2)
+
+    @patch('requests.get')
+    def test_item_movido_invalida_carrinho_anterior(self, mock_get):
+        """Testa que mover um item invalida também o carrinho de origem"""
+        mock_get.return_value = self.mock_response
+        outro = Basket.objects.create(nome="Outra", estabelecimento="Outro")
+        url = reverse('basketlist-detail', kwargs={'pk': self.basket.id})
+        self.client.get(url)
+
+        item_url = reverse('basketitem-detail', kwargs={'pk': self.basket_item.id})
+        self.client.patch(item_url, {'basket': outro.id}, format='json')
+        response = self.client.get(url)
+
+        self.assertEqual(response.data['total_itens'], 0)
+
+    @patch('requests.get')
+    def test_alteracao_de_preco_invalida_carrinho(self, mock_get):
+        """Testa que mudanças no catálogo invalidam os valores do carrinho"""
+        from items_app.models import Produto
+
+        mock_get.return_value = self.mock_response
+        url = reverse('basketlist-detail', kwargs={'pk': self.basket.id})
+        self.client.get(url)
+
+        Produto.objects.create(nome="Novo", preco=1)
+        response = self.client.get(url)
+
+        self.assertEqual(response['X-Cache'], 'MISS')
+
+    @patch('requests.get')
+    def test_erros_nao_sao_cacheados(self, mock_get):
+        """Testa que respostas de erro não entram no cache"""
+        url = reverse('basket-summary-specific', kwargs={'basket_id': 999})
+
+        self.client.get(url)
+        response = self.client.get(url)
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertFalse(response.has_header('X-Cache'))
+
+
+@override_settings(API_CACHE_ENABLED=False)
+class EndpointBudgetTest(BudgetTestMixin, APITestCase):
+    """Orçamentos de consultas e de chamadas à API de produtos por endpoint"""
+
+    # nome da URL -> (consultas, chamadas externas), independentes do volume
+    BUDGETS = {
+        'basketlist-list': (2, 1),
+        # count(*) da página, além da página e dos itens
+        'basketlist-list?limit=50': (3, 1),
+        'basketlist-detail': (2, 1),
+        'basketitem-list': (1, 1),
+        'basket-summary': (2, 1),
+        'basket-summary-specific': (3, 1),
+    }
+
+    def popular(self, linhas):
+        produtos = Produto.objects.bulk_create(
+            Produto(nome=f"Produto {i}", preco=i + 0.5) for i in range(20)
+        )
+        baskets = Basket.objects.bulk_create(
+            Basket(nome=f"Lista {i}", estabelecimento="Mercado") for i in range(max(1, linhas // 10))
+        )
+        BasketItem.objects.bulk_create(
+            BasketItem(basket=baskets[i % len(baskets)], produto_id=produtos[i % len(produtos)].id, quantidade=2)
+            for i in range(linhas)
+        )
+        self.fake = ItemsAPIFake(
+            {'id': p.id, 'nome': p.nome, 'preco': str(p.preco)} for p in produtos
+        )
+        return baskets[0]
+
+    def verificar_orcamentos(self, linhas):
+        basket = self.popular(linhas)
+        kwargs = {'basketlist-detail': {'pk': basket.id}, 'basket-summary-specific': {'basket_id': basket.id}}
+
+        for nome, (consultas, chamadas) in self.BUDGETS.items():
+            with self.subTest(endpoint=nome, linhas=linhas):
+                nome_url, _, query = nome.partition('?')
+                url = reverse(nome_url, kwargs=kwargs.get(nome)) + (f'?{query}' if query else '')
+                with BudgetRecorder(self.fake) as recorder:
+                    response = self.client.get(url)
+
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+                self.assertWithinBudget(recorder, consultas, chamadas, label=f'{nome} com {linhas} linhas')
+
+    def test_orcamentos_com_10_linhas(self):
+        self.verificar_orcamentos(10)
+
+    def test_orcamentos_com_1000_linhas(self):
+        self.verificar_orcamentos(1000)
+
+    def test_resultado_em_lote_igual_ao_individual(self):
+        """Testa que a busca em lote produz os mesmos valores que a busca por item"""
+        basket = self.popular(30)
+        url = reverse('basket-summary-specific', kwargs={'basket_id': basket.id})
+
+        with BudgetRecorder(self.fake):
+            em_lote = self.client.get(url).data
+        with BudgetRecorder(self.fake), self.settings(ITEMS_API_BATCH_SIZE=1):
+            individual = self.client.get(url).data
+
+        self.assertEqual(em_lote, individual)
+
+    def test_falha_do_orcamento_mostra_origem(self):
+        """Testa que a falha lista a consulta excedente e onde ela foi feita"""
+        self.popular(10)
+        with BudgetRecorder(self.fake) as recorder:
+            BasketSerializer(Basket.objects.all(), many=True).data
+
+        with self.assertRaises(AssertionError) as contexto:
+            self.assertWithinBudget(recorder, 0, 1, label='sem prefetch')
+
+        self.assertIn('basket_app/serializers.py', str(contexto.exception))
+        self.assertIn('get_produto_ids', str(contexto.exception))
+
+
+@patch('requests.get')
+class OptimisticConcurrencyAPITest(APITestCase):
+    """Testes para o If-Match nas escritas de carrinhos e itens"""
+
+    def setUp(self):
+        self.basket = Basket.objects.create(nome="Lista", estabelecimento="Mercado")
+        self.item = BasketItem.objects.create(basket=self.basket, produto_id=1, quantidade=1)
+        self.url = reverse('basketlist-detail', kwargs={'pk': self.basket.id})
+        self.dados = {'nome': 'Lista Atualizada', 'estabelecimento': 'Mercado'}
+
+    def test_if_match_atual(self, mock_get):
+        response = self.client.put(self.url, self.dados, format='json', HTTP_IF_MATCH='"1"')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['versao'], 2)
+        self.basket.refresh_from_db()
+        self.assertEqual((self.basket.nome, self.basket.versao), ('Lista Atualizada', 2))
+
+    def test_if_match_desatualizado(self, mock_get):
+        """Testa que uma versão antiga não sobrescreve a atual"""
+        self.client.put(self.url, self.dados, format='json', HTTP_IF_MATCH='"1"')
+        response = self.client.put(self.url, {**self.dados, 'nome': 'Outra'}, format='json', HTTP_IF_MATCH='"1"')
+
+        self.assertEqual(response.status_code, status.HTTP_412_PRECONDITION_FAILED)
+        self.basket.refresh_from_db()
+        self.assertEqual((self.basket.nome, self.basket.versao), ('Lista Atualizada', 2))
+
+    def test_escrita_concorrente(self, mock_get):
+        """Testa o 412 quando outra requisição grava entre a leitura e a escrita"""
+        original = BasketViewSet.get_object
+
+        def concorrente(viewset):
+            instance = original(viewset)
+            Basket.objects.filter(pk=instance.pk).update(nome='Outro dispositivo', versao=F('versao') + 1)
+            return instance
+
+        with patch.object(BasketViewSet, 'get_object', concorrente):
+            response = self.client.patch(self.url, {'nome': 'Perdida'}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_412_PRECONDITION_FAILED)
+        self.basket.refresh_from_db()
+        self.assertEqual(self.basket.nome, 'Outro dispositivo')
+
+    def test_item_sem_if_match(self, mock_get):
+        """Testa que escritas sem If-Match continuam aceitas e incrementam a versão"""
+        url = reverse('basketitem-detail', kwargs={'pk': self.item.id})
+        response = self.client.patch(url, {'quantidade': 3}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.item.refresh_from_db()
+        self.assertEqual((self.item.quantidade, self.item.versao), (3, 2))
+
+    def test_exclusao(self, mock_get):
+        url = reverse('basketitem-detail', kwargs={'pk': self.item.id})
+        response = self.client.delete(url, HTTP_IF_MATCH='"2"')
+        self.assertEqual(response.status_code, status.HTTP_412_PRECONDITION_FAILED)
+        self.assertTrue(BasketItem.objects.filter(pk=self.item.id).exists())
+
+        response = self.client.delete(url, HTTP_IF_MATCH='"1"')
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertFalse(BasketItem.objects.filter(pk=self.item.id).exists())
+
+
+class RefreshTaskTest(TestCase):
+    """Testes para a renovação dos carrinhos após mudanças de produtos"""
+
+    @patch('basket_app.tasks.REFRESH_BATCH_SIZE', 2)
+    def test_purgas_em_lotes(self):
+        baskets = [Basket.objects.create(nome=f"Lista {i}", estabelecimento="Mercado") for i in range(3)]
+        for basket in baskets:
+            BasketItem.objects.create(basket=basket, produto_id=7, quantidade=1)
+            BasketItem.objects.create(basket=basket, produto_id=8, quantidade=1)
+
+        refresh_baskets_with_produto(7)
+
+        lotes = [job.args[0] for job in Job.objects.order_by('pk')]
+        self.assertEqual(lotes, [
+            [f'basket:{baskets[0].id}', f'basket:{baskets[1].id}'],
+            [f'basket:{baskets[2].id}'],
+        ])
+
+
+class ArchiveBasketsTest(APITestCase):
+    """Testes para o arquivamento de carrinhos antigos"""
+
+    def setUp(self):
+        antigo = timezone.now() - timedelta(days=100)
+        self.antigos = [Basket.objects.create(nome=f"Antiga {i}", estabelecimento="Mercado") for i in range(3)]
+        for basket in self.antigos:
+            BasketItem.objects.create(basket=basket, produto_id=1, quantidade=2)
+        # Carrinho antigo com item incluído recentemente
+        self.com_item_novo = Basket.objects.create(nome="Antiga com item novo", estabelecimento="Mercado")
+        BasketItem.objects.create(basket=self.com_item_novo, produto_id=2, quantidade=1)
+        BasketItem.objects.filter(basket__in=self.antigos).update(data_adicionado=antigo)
+        Basket.objects.update(data_criacao=antigo, data_atualizacao=antigo)
+        self.recente = Basket.objects.create(nome="Recente", estabelecimento="Mercado")
+
+    def test_arquivamento_em_lotes(self):
+        saida = StringIO()
+        call_command('archive_baskets', '--older-than', '30', '--batch-size', '2', '--pause', '0', stdout=saida)
+
+        self.assertIn('3 carrinhos e 3 itens arquivados', saida.getvalue())
+        self.assertEqual(set(Basket.objects.values_list('pk', flat=True)), {self.com_item_novo.pk, self.recente.pk})
+        self.assertEqual(BasketItem.objects.count(), 1)
+        arquivado = ArchivedBasket.objects.get(pk=self.antigos[0].pk)
+        self.assertEqual((arquivado.nome, len(arquivado.itens)), ("Antiga 0", 1))
+        self.assertEqual(arquivado.itens[0][:2], [1, 2])
+
+    def test_simulacao(self):
+        saida = StringIO()
+        call_command('archive_baskets', '--older-than', '30', '--dry-run', stdout=saida)
+        self.assertIn('3 carrinhos seriam arquivados', saida.getvalue())
+        self.assertFalse(ArchivedBasket.objects.exists())
+
+    def test_endpoint_somente_leitura(self):
+        call_command('archive_baskets', '--older-than', '30', stdout=StringIO())
+        url = reverse('archivedbasket-detail', kwargs={'pk': self.antigos[0].pk})
+        response = self.client.get(url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['total_itens'], 1)
+        self.assertEqual(response.data['itens'][0]['quantidade'], 2)
+        self.assertEqual(len(self.client.get(reverse('archivedbasket-list')).data), 3)
+        self.assertEqual(self.client.delete(url).status_code, status.HTTP_405_METHOD_NOT_ALLOWED)
+        self.assertEqual(self.client.get(reverse('basketlist-detail', kwargs={'pk': self.antigos[0].pk})).status_code,
+                         status.HTTP_404_NOT_FOUND)
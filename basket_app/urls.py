@@ -1,11 +1,12 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import ApiModelViewSet, BasketViewSet, BasketItemViewSet, basket_summary
+from .views import ApiModelViewSet, ArchivedBasketViewSet, BasketViewSet, BasketItemViewSet, basket_summary
 
 router = DefaultRouter()
 router.register(r'basket', ApiModelViewSet, basename='basket')
 router.register(r'baskets', BasketViewSet, basename='basketlist')
 router.register(r'basket-items', BasketItemViewSet, basename='basketitem')
+router.register(r'archived-baskets', ArchivedBasketViewSet, basename='archivedbasket')
 
 urlpatterns = [
     path('', include(router.urls)),
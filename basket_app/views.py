@@ -1,25 +1,80 @@
-from rest_framework import viewsets, status
+from rest_framework import filters, viewsets, status
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
 from django.db.models import Sum, Count
-import requests
-from django.conf import settings
-from .models import ApiModel, Basket, BasketItem
-from .serializers import ApiModelSerializer, BasketSerializer, BasketItemSerializer
+from django.utils.decorators import method_decorator
+from core_app.cache import cached_response
+from core_app.http_cache import SurrogateKeyMixin, surrogate_keys
+from core_app.idempotency import IdempotencyMixin
+from core_app.pagination import LimitOffsetPagination
+from core_app.versioning import BASKETS, CATALOG, basket_namespace
+from core_app.viewsets import OptimisticConcurrencyMixin, ValuesListMixin, VersionBumpMixin
+from .catalog import ERRO, NAO_ENCONTRADO, CatalogoProdutos
+from .models import ApiModel, ArchivedBasket, Basket, BasketItem
+from .serializers import ApiModelSerializer, ArchivedBasketSerializer, BasketSerializer, BasketItemSerializer
 
 class ApiModelViewSet(viewsets.ModelViewSet):
     queryset = ApiModel.objects.all()
     serializer_class = ApiModelSerializer
 
-class BasketViewSet(viewsets.ModelViewSet):
-    queryset = Basket.objects.all()
+def _basket_namespaces(request, pk=None, basket_id=None, **kwargs):
+    """Namespaces de versão das respostas de um carrinho (ou de todos)"""
+    basket_id = basket_id or pk
+    # Valores dependem dos preços, então a versão do catálogo também entra
+    return [CATALOG, basket_namespace(basket_id) if basket_id else BASKETS]
+
+class CatalogoContextMixin:
+    """Um único catálogo de produtos por requisição, buscado em lote"""
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['catalogo'] = CatalogoProdutos()
+        return context
+
+class BasketViewSet(
+    SurrogateKeyMixin, IdempotencyMixin, VersionBumpMixin, OptimisticConcurrencyMixin, ValuesListMixin,
+    CatalogoContextMixin, viewsets.ModelViewSet,
+):
+    queryset = Basket.objects.prefetch_related('itens').order_by('-data_criacao', '-id')
     serializer_class = BasketSerializer
-
-class BasketItemViewSet(viewsets.ModelViewSet):
-    queryset = BasketItem.objects.all()
+    proxy_cache_scope = 'baskets'
+    pagination_class = LimitOffsetPagination
+    filter_backends = [filters.SearchFilter]
+    search_fields = ['nome', 'estabelecimento']
+
+    def get_surrogate_namespaces(self, request, *args, **kwargs):
+        return _basket_namespaces(request, *args, **kwargs)
+
+    def get_version_namespaces(self, instance):
+        return [BASKETS, basket_namespace(instance.pk)]
+
+    @method_decorator(cached_response(_basket_namespaces))
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
+
+class BasketItemViewSet(
+    SurrogateKeyMixin, IdempotencyMixin, VersionBumpMixin, OptimisticConcurrencyMixin, ValuesListMixin,
+    CatalogoContextMixin, viewsets.ModelViewSet,
+):
+    queryset = BasketItem.objects.select_related('basket')
     serializer_class = BasketItemSerializer
+    proxy_cache_scope = 'baskets'
+
+    def get_surrogate_namespaces(self, request, *args, **kwargs):
+        # O detalhe de um item não informa o carrinho na URL
+        return [CATALOG, BASKETS]
+
+    def get_version_namespaces(self, instance):
+        return [BASKETS, basket_namespace(instance.basket_id)]
+
+class ArchivedBasketViewSet(viewsets.ReadOnlyModelViewSet):
+    """Carrinhos arquivados por ``manage.py archive_baskets``, somente leitura"""
+    queryset = ArchivedBasket.objects.all()
+    serializer_class = ArchivedBasketSerializer
 
 @api_view(['GET'])
+@surrogate_keys(_basket_namespaces, 'baskets')
+@cached_response(_basket_namespaces)
 def basket_summary(request, basket_id=None):
     """
     Endpoint que retorna o resumo do carrinho:
@@ -45,33 +100,23 @@ def basket_summary(request, basket_id=None):
                 )
         else:
             # Resumo de todos os carrinhos
-            basket_items = BasketItem.objects.all()
+            basket_items = BasketItem.objects.select_related('basket')
             basket_info = None
 
         # Calcular totais
-        total_itens_unicos = basket_items.count()
-        total_quantidade = basket_items.aggregate(total=Sum('quantidade'))['total'] or 0
+        totais = basket_items.aggregate(total_itens=Count('id'), total_quantidade=Sum('quantidade'))
+        basket_items = list(basket_items)
 
-        # Calcular valor total
-        valor_total = 0.0
-        base_url = getattr(settings, 'ITEMS_API_URL', 'http://localhost:8000/api/produtos/')
-
-        for item in basket_items:
-            try:
-                # Buscar preço do produto via API
-                response = requests.get(f"{base_url}{item.produto_id}/", timeout=5)
-                if response.status_code == 200:
-                    produto_data = response.json()
-                    preco = float(produto_data.get('preco', 0))
-                    valor_total += preco * item.quantidade
-            except (requests.RequestException, ValueError, TypeError):
-                continue
+        # Buscar os preços de todos os produtos de uma vez
+        catalogo = CatalogoProdutos()
+        catalogo.prefetch(item.produto_id for item in basket_items)
 
         # Preparar resposta
+        valor_total = 0.0
         summary = {
-            'total_itens_unicos': total_itens_unicos,
-            'total_quantidade': total_quantidade,
-            'valor_total': round(valor_total, 2),
+            'total_itens_unicos': totais['total_itens'],
+            'total_quantidade': totais['total_quantidade'] or 0,
+            'valor_total': 0.0,
             'itens': []
         }
 
@@ -81,27 +126,25 @@ def basket_summary(request, basket_id=None):
 
         # Adicionar detalhes dos itens
         for item in basket_items:
+            produto_data = catalogo.get(item.produto_id)
+            if produto_data == NAO_ENCONTRADO:
+                continue
+
             try:
-                response = requests.get(f"{base_url}{item.produto_id}/", timeout=5)
-                if response.status_code == 200:
-                    produto_data = response.json()
-                    preco = float(produto_data.get('preco', 0))
-                    subtotal = preco * item.quantidade
-
-                    item_data = {
-                        'produto_id': item.produto_id,
-                        'produto_nome': produto_data.get('nome', 'Produto não encontrado'),
-                        'quantidade': item.quantidade,
-                        'preco_unitario': preco,
-                        'subtotal': round(subtotal, 2)
-                    }
-
-                    if not basket_id:
-                        item_data['basket_id'] = item.basket.id
-                        item_data['basket_nome'] = f"{item.basket.nome} - {item.basket.estabelecimento}"
-
-                    summary['itens'].append(item_data)
-            except (requests.RequestException, ValueError, TypeError):
+                if produto_data == ERRO:
+                    raise ValueError(produto_data)
+                preco = float(produto_data.get('preco', 0))
+                subtotal = preco * item.quantidade
+                valor_total += subtotal
+
+                item_data = {
+                    'produto_id': item.produto_id,
+                    'produto_nome': produto_data.get('nome', 'Produto não encontrado'),
+                    'quantidade': item.quantidade,
+                    'preco_unitario': preco,
+                    'subtotal': round(subtotal, 2)
+                }
+            except (ValueError, TypeError):
                 item_data = {
                     'produto_id': item.produto_id,
                     'produto_nome': 'Erro ao buscar produto',
@@ -110,12 +153,13 @@ def basket_summary(request, basket_id=None):
                     'subtotal': 0.0
                 }
 
-                if not basket_id:
-                    item_data['basket_id'] = item.basket.id
-                    item_data['basket_nome'] = f"{item.basket.nome} - {item.basket.estabelecimento}"
+            if not basket_id:
+                item_data['basket_id'] = item.basket.id
+                item_data['basket_nome'] = f"{item.basket.nome} - {item.basket.estabelecimento}"
 
-                summary['itens'].append(item_data)
+            summary['itens'].append(item_data)
 
+        summary['valor_total'] = round(valor_total, 2)
         return Response(summary, status=status.HTTP_200_OK)
 
     except Exception as e:
@@ -123,4 +167,3 @@ def basket_summary(request, basket_id=None):
             {'erro': f'Erro ao calcular resumo do carrinho: {str(e)}'}, 
             status=status.HTTP_500_INTERNAL_SERVER_ERROR
         )
-
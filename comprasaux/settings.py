@@ -10,8 +10,11 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
+from comprasaux.database import database_from_url
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -38,17 +41,24 @@ INSTALLED_APPS = [
     'django.contrib.messages',
     'django.contrib.staticfiles',
     'rest_framework',
+    'core_app',
     'basket_app',
     'items_app',
     'front_app',
 ]
 
 MIDDLEWARE = [
+    'core_app.tracing.TracingMiddleware',
+    'core_app.middleware.ServerTimingMiddleware',
+    'core_app.admission.AdmissionMiddleware',
+    'core_app.replicas.ReplicaMiddleware',
+    'core_app.cache.DegradedResponseMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'core_app.profiling.ProfilingMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -76,10 +86,86 @@ WSGI_APPLICATION = 'comprasaux.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
+# Banco escolhido por DATABASE_URL (formatos em comprasaux/database.py); sem
+# ela, o SQLite db.sqlite3 da raiz do projeto
 DATABASES = {
+    'default': database_from_url(os.environ.get('DATABASE_URL', 'sqlite:///db.sqlite3'), BASE_DIR),
+}
+
+# Réplicas de leitura (core_app.replicas): leituras de GET/HEAD vão para uma
+# réplica; escritas e leituras logo após escrever ficam no primário.
+# URLs separadas por vírgula; réplicas SQLite locais são abertas somente
+# para leitura (copie o primário com ``manage.py sync_replicas``)
+DATABASE_REPLICAS = []
+for numero, url in enumerate(filter(None, os.environ.get('DATABASE_REPLICA_URLS', '').split(',')), 1):
+    DATABASES[f'replica{numero}'] = {
+        **database_from_url(url.strip(), BASE_DIR, read_only=True),
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS.append(f'replica{numero}')
+DATABASE_ROUTERS = ['core_app.replicas.ReplicaRouter']
+# Janela (segundos) em que o cliente que escreveu lê do primário
+REPLICA_STICKY_SECONDS = int(os.environ.get('REPLICA_STICKY_SECONDS', 5))
+# Tempo (segundos) que uma réplica indisponível fica fora da escolha
+REPLICA_RETRY_SECONDS = 30
+REPLICA_STICKY_COOKIE = 'usar_primario'
+
+# Conexões reaproveitadas entre requisições por DB_CONN_MAX_AGE segundos e
+# verificadas antes do reuso, em vez de uma conexão nova por requisição
+DB_CONN_MAX_AGE = int(os.environ.get('DB_CONN_MAX_AGE', 600))
+
+# No PostgreSQL, DB_POOL=True troca as conexões persistentes pelo pool do
+# psycopg 3 (psycopg[pool]). O pool é por processo: cada worker do gunicorn
+# tem o seu, com uma conexão por thread do worker mais uma de folga, e o
+# servidor recebe até workers x max_size conexões (mantenha abaixo do
+# max_connections do PostgreSQL)
+DB_POOL = os.environ.get('DB_POOL', 'False') == 'True'
+DB_POOL_OPTIONS = {
+    'min_size': int(os.environ.get('DB_POOL_MIN_SIZE', 1)),
+    'max_size': int(os.environ.get('DB_POOL_MAX_SIZE', int(os.environ.get('GUNICORN_THREADS', 1)) + 1)),
+    # Espera (segundos) por uma conexão livre antes de falhar
+    'timeout': float(os.environ.get('DB_POOL_TIMEOUT', 10)),
+}
+
+# Perfil SQLite para produção com vários workers (SQLITE_PRODUCTION=True):
+# WAL (leitores não bloqueiam o escritor), espera de até ``timeout`` segundos
+# pelo bloqueio em vez de "database is locked", BEGIN IMMEDIATE nas transações
+# (o bloqueio de escrita é pedido no início, quando ainda dá para esperar);
+# as conexões persistentes mantêm o cache de páginas e o mmap entre requisições
+SQLITE_PRODUCTION_OPTIONS = {
+    'init_command': (
+        'PRAGMA journal_mode=WAL;'
+        'PRAGMA synchronous=NORMAL;'
+        'PRAGMA mmap_size=268435456;'
+        'PRAGMA cache_size=-65536;'
+        'PRAGMA temp_store=MEMORY;'
+        'PRAGMA foreign_keys=ON'
+    ),
+    'transaction_mode': 'IMMEDIATE',
+    'timeout': 20,
+}
+
+for banco in DATABASES.values():
+    if DB_POOL and banco['ENGINE'] == 'django.db.backends.postgresql':
+        banco['OPTIONS'].setdefault('pool', dict(DB_POOL_OPTIONS))
+    else:
+        banco.update({'CONN_MAX_AGE': DB_CONN_MAX_AGE, 'CONN_HEALTH_CHECKS': True})
+if DATABASES['default']['ENGINE'] == 'django.db.backends.sqlite3' \
+        and os.environ.get('SQLITE_PRODUCTION', 'False') == 'True':
+    DATABASES['default']['OPTIONS'] = {**SQLITE_PRODUCTION_OPTIONS, **DATABASES['default']['OPTIONS']}
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# Com vários workers, use um backend compartilhado (arquivo, memcached, redis),
+# ex.: CACHE_BACKEND=django.core.cache.backends.filebased.FileBasedCache
+#      CACHE_LOCATION=/var/tmp/comprasaux_cache
+
+CACHES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+        'BACKEND': os.environ.get('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.environ.get('CACHE_LOCATION', 'comprasaux'),
+        'OPTIONS': {'MAX_ENTRIES': int(os.environ.get('CACHE_MAX_ENTRIES', 10000))},
     }
 }
 
@@ -125,9 +211,145 @@ STATIC_URL = 'static/'
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+# Django REST Framework
+# Renderers e parsers rápidos (orjson/MessagePack) com fallback automático
+# quando as dependências opcionais não estão instaladas
+REST_FRAMEWORK = {
+    'DEFAULT_RENDERER_CLASSES': [
+        'core_app.renderers.FastJSONRenderer',
+        'core_app.renderers.MessagePackRenderer',
+        'core_app.renderers.ColumnarRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'core_app.parsers.FastJSONParser',
+        'core_app.parsers.MessagePackParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
+    'DEFAULT_CONTENT_NEGOTIATION_CLASS': 'core_app.negotiation.AvailableContentNegotiation',
+}
+
+
+def _threshold_ms(name, default):
+    """Limite em ms lido do ambiente; a variável definida e vazia vira None (desativado)"""
+    valor = os.environ.get(name, str(default)).strip()
+    return int(valor) if valor else None
+
+
+# Instrumentação por requisição (core_app.middleware.ServerTimingMiddleware)
+SERVER_TIMING_HEADER = True
+# Requisições acima deste tempo (ms) são registradas no logger core_app.requests;
+# None (REQUEST_LOG_THRESHOLD_MS= vazio no ambiente) desativa
+REQUEST_LOG_THRESHOLD_MS = _threshold_ms('REQUEST_LOG_THRESHOLD_MS', 500)
+# Segundos em que a contagem de linhas de /metrics (COUNT(*)) é reaproveitada
+METRICS_ROW_COUNT_TTL = int(os.environ.get('METRICS_ROW_COUNT_TTL', 30))
+
+# Registro de consultas lentas com plano de execução (core_app.slow_queries),
+# desativado por padrão: consultas acima deste tempo (ms) são registradas
+# quando SLOW_QUERY_THRESHOLD_MS é definido (ex.: 100); None desativa
+SLOW_QUERY_THRESHOLD_MS = _threshold_ms('SLOW_QUERY_THRESHOLD_MS', '')
+# Arquivo JSON lines para o relatório (manage.py slow_queries), sem rotação;
+# vazio mantém os registros só no logger core_app.slow_queries
+SLOW_QUERY_LOG = os.environ.get('SLOW_QUERY_LOG', '')
+
+# Rastreamento distribuído com W3C traceparent (core_app.tracing)
+TRACING_ENABLED = os.environ.get('TRACING_ENABLED', 'False') == 'True'
+TRACING_SAMPLE_RATE = float(os.environ.get('TRACING_SAMPLE_RATE', 1.0))
+TRACING_SERVICE_NAME = os.environ.get('TRACING_SERVICE_NAME', 'comprasaux')
+# Destinos dos spans (formato JSON do OTLP): arquivo JSON lines e/ou coletor OTLP/HTTP
+TRACING_FILE = os.environ.get('TRACING_FILE', '')
+TRACING_OTLP_ENDPOINT = os.environ.get('TRACING_OTLP_ENDPOINT', '')
+
+# Perfil sob demanda de requisições (core_app.profiling); desligado não tem custo
+PROFILING_ENABLED = os.environ.get('PROFILING_ENABLED', 'False') == 'True'
+PROFILING_DIR = os.environ.get('PROFILING_DIR', str(BASE_DIR / 'profiles'))
+# Validade (segundos) dos tokens do cabeçalho X-Profile
+PROFILING_TOKEN_MAX_AGE = 3600
+
+# Cache de respostas da API chaveado por versões dos dados (core_app.cache)
+API_CACHE_ENABLED = True
+API_CACHE_TIMEOUT = 600
+
+# Cache do proxy reverso (core_app.http_cache e core_app.purge)
+# s-maxage (segundos) por escopo de resposta; 0 desativa o cache compartilhado
+PROXY_CACHE_TIMEOUTS = {
+    'catalog': int(os.environ.get('PROXY_CACHE_CATALOG', 300)),
+    'baskets': int(os.environ.get('PROXY_CACHE_BASKETS', 5)),
+}
+# URL do proxy para renovar respostas após escritas (ex.: http://nginx); vazio desativa
+PROXY_PURGE_URL = os.environ.get('PROXY_PURGE_URL', '')
+PROXY_PURGE_METHOD = os.environ.get('PROXY_PURGE_METHOD', 'GET')
+# Formatos renovados, separados por vírgula (ex.: application/json,application/msgpack)
+PROXY_PURGE_ACCEPTS = [accept for accept in os.environ.get('PROXY_PURGE_ACCEPTS', 'application/json').split(',') if accept]
+
+# Controle de admissão (core_app.admission): limites por cliente e teto de
+# concorrência por classe de custo, compartilhados entre workers pelo cache
+ADMISSION_CONTROL_ENABLED = os.environ.get('ADMISSION_CONTROL_ENABLED', 'False') == 'True'
+ADMISSION_CACHE = 'default'
+# Validade (s) da vaga de concorrência: deve passar da duração máxima de uma
+# requisição, senão a vaga de uma requisição longa é tomada e o teto é excedido.
+# Com workers síncronos esse máximo é o timeout do gunicorn (GUNICORN_TIMEOUT);
+# com GUNICORN_THREADS > 1 uma requisição pode passar dele, ajuste à mais longa
+ADMISSION_SLOT_TIMEOUT = int(os.environ.get(
+    'ADMISSION_SLOT_TIMEOUT', int(os.environ.get('GUNICORN_TIMEOUT', 30)) + 10,
+))
+# Atrás do nginx, o IP do cliente vem deste cabeçalho (ex.: HTTP_X_REAL_IP)
+ADMISSION_CLIENT_IP_HEADER = os.environ.get('ADMISSION_CLIENT_IP_HEADER', '')
+# Nome da URL -> classe de custo; as demais URLs são da classe default
+ADMISSION_CLASSES = {
+    'basket-summary': 'expensive',
+}
+ADMISSION_LIMITS = {
+    'expensive': {
+        'rate': float(os.environ.get('ADMISSION_EXPENSIVE_RATE', 1)),
+        'burst': int(os.environ.get('ADMISSION_EXPENSIVE_BURST', 5)),
+        'concurrency': int(os.environ.get('ADMISSION_EXPENSIVE_CONCURRENCY', 2)),
+        'retry_after': 2,
+    },
+    'default': {
+        'rate': float(os.environ.get('ADMISSION_DEFAULT_RATE', 50)),
+        'burst': int(os.environ.get('ADMISSION_DEFAULT_BURST', 200)),
+    },
+}
+
+# Fila de tarefas em segundo plano no banco (core_app.jobs, manage.py run_workers)
+# Ligada, a purga do proxy e as renovações após mudanças de produtos vão para a fila
+JOBS_ENABLED = os.environ.get('JOBS_ENABLED', 'False') == 'True'
+JOBS_PROCESSES = int(os.environ.get('JOBS_PROCESSES', 1))
+JOBS_THREADS = int(os.environ.get('JOBS_THREADS', 4))
+# Intervalo (segundos) entre consultas à fila vazia
+JOBS_POLL_INTERVAL = 1.0
+# Tempo (segundos) de reserva de uma tarefa; depois dele outro worker pode executá-la
+JOBS_LEASE_SECONDS = 300
+JOBS_MAX_ATTEMPTS = 5
+# Espera antes da 2ª tentativa, dobrando a cada falha, até JOBS_RETRY_MAX_DELAY
+JOBS_RETRY_BACKOFF = 5
+JOBS_RETRY_MAX_DELAY = 3600
+
+# Aquecimento dos workers ao iniciar (core_app.warmup, /ready)
+# Produtos pré-carregados: os mais frequentes entre os WARMUP_RECENT_ITEMS itens mais recentes
+WARMUP_HOT_PRODUCTS = int(os.environ.get('WARMUP_HOT_PRODUCTS', 500))
+WARMUP_RECENT_ITEMS = 5000
+
+# Escritas idempotentes com Idempotency-Key (core_app.idempotency)
+# Tempo (segundos) em que a primeira resposta é repetida para a mesma chave
+IDEMPOTENCY_KEY_TTL = int(os.environ.get('IDEMPOTENCY_KEY_TTL', 24 * 60 * 60))
+
 # URLs das APIs dos outros apps
 ITEMS_API_URL = 'http://localhost:8000/api/produtos/'
 BASKET_API_URL = 'http://localhost:8000/api/'
+# Produtos por requisição nas buscas em lote (?ids=) do basket_app
+ITEMS_API_BATCH_SIZE = 200
+# Maior página aceita em ?limit= nas listagens (core_app.pagination)
+API_MAX_PAGE_SIZE = 500
 
 # Configurações de templates
 TEMPLATES[0]['DIRS'] = [BASE_DIR / 'templates']
+
+# Dados iniciais renderizados no servidor pelas páginas do front_app
+FRONT_INITIAL_DATA = True
+# Tempo (segundos) dos fragmentos de template com os dados iniciais
+FRONT_FRAGMENT_CACHE_TIMEOUT = 300
+# Linhas por página nas tabelas com carregamento incremental (a primeira vem embutida)
+FRONT_PAGE_SIZE = 100
@@ -16,9 +16,14 @@ Including another URLconf
 """
 from django.contrib import admin
 from django.urls import path, include
+from core_app.metrics import metrics_view
+from core_app.warmup import ready_view
 
 urlpatterns = [
+    path('admin/', include('core_app.urls')),
     path('admin/', admin.site.urls),
+    path('metrics', metrics_view, name='metrics'),
+    path('ready', ready_view, name='ready'),
     path('api/', include('basket_app.urls')),
     path('api/', include('items_app.urls')),
     path('', include('front_app.urls')),
@@ -0,0 +1,22 @@
+from django.contrib import admin
+from django.http import FileResponse, Http404
+from django.template.response import TemplateResponse
+
+from .profiling import profile_files, profile_path
+
+
+def perfis(request):
+    """Lista os perfis de requisições gravados pelo ProfilingMiddleware"""
+    context = {
+        **admin.site.each_context(request),
+        'title': 'Perfis de requisições',
+        'arquivos': profile_files(),
+    }
+    return TemplateResponse(request, 'admin/core_app/perfis.html', context)
+
+
+def perfil_download(request, nome):
+    caminho = profile_path(nome)
+    if caminho is None:
+        raise Http404('Perfil não encontrado')
+    return FileResponse(open(caminho, 'rb'), as_attachment=nome.endswith('.prof'), filename=nome)
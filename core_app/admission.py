@@ -0,0 +1,159 @@
+"""
+Controle de admissão: limites por cliente e teto de concorrência por custo.
+
+Cada requisição pertence a uma classe de custo, escolhida pelo nome da URL em
+``ADMISSION_CLASSES`` (``default`` para as demais). Em ``ADMISSION_LIMITS``
+cada classe pode ter:
+
+- ``rate`` e ``burst``: balde de fichas por cliente e classe (``rate`` fichas
+  por segundo, até ``burst`` acumuladas); sem ficha, a resposta é 429;
+- ``concurrency``: requisições simultâneas da classe somando todos os
+  workers; acima dele a resposta é 503 imediato, sem ocupar o worker.
+
+As duas respostas trazem ``Retry-After``. Classes baratas não têm teto de
+concorrência: as caras nunca ocupam mais que ``concurrency`` workers e as
+leituras baratas continuam sendo atendidas. O cliente é o IP da conexão ou,
+atrás do proxy, o cabeçalho em ``ADMISSION_CLIENT_IP_HEADER``.
+
+Os baldes ficam no cache ``ADMISSION_CACHE``, compartilhado entre os workers
+se o backend for (arquivo, memcached, redis), e são atualizados com get/set,
+como os throttles do DRF: o limite é aproximado e sob disputa do mesmo
+cliente podem passar algumas requisições a mais.
+
+O teto de concorrência não usa o cache, cujo ``incr`` não é atômico em todos
+os backends (no de arquivo é um get seguido de set): cada classe tem
+``concurrency`` linhas de ``AdmissionSlot`` no banco, reservadas com um
+UPDATE condicional, como as tarefas de core_app.jobs. A reserva vale por
+``ADMISSION_SLOT_TIMEOUT`` segundos e não é renovada: assim a vaga de um
+worker encerrado no meio da requisição é liberada, mas uma requisição mais
+longa que isso perde a vaga e o teto pode ser excedido, por isso o valor
+parte do timeout do gunicorn. Cada requisição com teto faz de duas a três
+escritas no primário (reserva, liberação e, no primeiro uso, a criação das
+vagas).
+"""
+import math
+import random
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import Q
+from django.http import JsonResponse
+from django.urls import Resolver404, resolve
+from django.utils import timezone
+
+from .metrics import observe_admission
+from .models import AdmissionSlot
+
+DEFAULT_CLASS = 'default'
+
+
+def admission_cache():
+    return caches[getattr(settings, 'ADMISSION_CACHE', 'default')]
+
+
+def slot_timeout():
+    """Segundos de validade da reserva de uma vaga (ver ``ADMISSION_SLOT_TIMEOUT``)"""
+    return getattr(settings, 'ADMISSION_SLOT_TIMEOUT', 60)
+
+
+def cost_class(request):
+    """Classe de custo da requisição, pelo nome da URL"""
+    try:
+        nome = resolve(request.path_info).url_name
+    except Resolver404:
+        return DEFAULT_CLASS
+    return getattr(settings, 'ADMISSION_CLASSES', {}).get(nome, DEFAULT_CLASS)
+
+
+def client_id(request):
+    cabecalho = getattr(settings, 'ADMISSION_CLIENT_IP_HEADER', '')
+    return (cabecalho and request.META.get(cabecalho)) or request.META.get('REMOTE_ADDR', '')
+
+
+def take_token(cache, chave, rate, burst, agora=None):
+    """Consome uma ficha do balde; retorna 0 ou os segundos até a próxima ficha"""
+    agora = time.time() if agora is None else agora
+    fichas, instante = cache.get(chave) or (burst, agora)
+    fichas = min(burst, fichas + (agora - instante) * rate)
+    if fichas < 1:
+        return (1 - fichas) / rate
+    # Depois de encher de novo, o balde equivale a um novo
+    cache.set(chave, (fichas - 1, agora), timeout=math.ceil(burst / rate) + 1)
+    return 0
+
+
+def _livre(agora):
+    return Q(ocupada_ate__isnull=True) | Q(ocupada_ate__lt=agora)
+
+
+def acquire_slot(classe, limite):
+    """Reserva uma das ``limite`` vagas da classe; retorna a reserva ou ``None`` se não houver vaga"""
+    agora = timezone.now()
+    ate = agora + timedelta(seconds=slot_timeout())
+    vagas = AdmissionSlot.objects.filter(classe=classe, vaga__lt=limite)
+    livres = list(vagas.filter(_livre(agora)).values_list('pk', flat=True))
+    if not livres and vagas.count() < limite:
+        # Primeiro uso da classe (ou teto aumentado): cria as vagas que faltam
+        AdmissionSlot.objects.bulk_create(
+            [AdmissionSlot(classe=classe, vaga=vaga) for vaga in range(limite)], ignore_conflicts=True,
+        )
+        livres = list(vagas.filter(_livre(agora)).values_list('pk', flat=True))
+    # Em ordem aleatória, para que workers simultâneos não disputem a mesma linha
+    random.shuffle(livres)
+    for pk in livres:
+        # Só um worker altera a linha enquanto ela ainda está livre
+        if AdmissionSlot.objects.filter(_livre(agora), pk=pk).update(ocupada_ate=ate):
+            return pk, ate
+    return None
+
+
+def release_slot(reserva):
+    pk, ate = reserva
+    # Se a reserva expirou e a vaga foi tomada por outra requisição, ela não é liberada
+    AdmissionSlot.objects.filter(pk=pk, ocupada_ate=ate).update(ocupada_ate=None)
+
+
+def _rejeitar(status, classe, motivo, espera, mensagem):
+    observe_admission(classe, motivo)
+    response = JsonResponse({'detail': mensagem}, status=status)
+    response['Retry-After'] = str(max(1, math.ceil(espera)))
+    return response
+
+
+class AdmissionMiddleware:
+    """
+    Aplica os limites de ``ADMISSION_LIMITS`` antes da view e dos demais
+    middlewares; só o teto de concorrência consulta o banco. Deve vir logo
+    após os middlewares de instrumentação.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not getattr(settings, 'ADMISSION_CONTROL_ENABLED', False):
+            return self.get_response(request)
+
+        classe = cost_class(request)
+        limites = getattr(settings, 'ADMISSION_LIMITS', {}).get(classe, {})
+        cache = admission_cache()
+
+        if limites.get('rate'):
+            chave = f'admission:balde:{classe}:{client_id(request)}'
+            espera = take_token(cache, chave, limites['rate'], limites.get('burst', limites['rate']))
+            if espera:
+                return _rejeitar(429, classe, 'rate', espera, 'Limite de requisições excedido; tente mais tarde.')
+
+        if not limites.get('concurrency'):
+            return self.get_response(request)
+
+        reserva = acquire_slot(classe, limites['concurrency'])
+        if reserva is None:
+            return _rejeitar(503, classe, 'concurrency', limites.get('retry_after', 1),
+                             'Servidor ocupado com requisições desta operação; tente mais tarde.')
+        try:
+            return self.get_response(request)
+        finally:
+            release_slot(reserva)
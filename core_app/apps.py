@@ -0,0 +1,18 @@
+from django.apps import AppConfig
+
+
+class CoreAppConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'core_app'
+
+    def ready(self):
+        from django.db.backends.signals import connection_created
+
+        from .purge import purge_on_write
+        from .replicas import rebump_after_replica_lag
+        from .slow_queries import install
+        from .versioning import versions_bumped
+
+        versions_bumped.connect(purge_on_write, dispatch_uid='core_app.purge')
+        versions_bumped.connect(rebump_after_replica_lag, dispatch_uid='core_app.replicas')
+        connection_created.connect(install, dispatch_uid='core_app.slow_queries')
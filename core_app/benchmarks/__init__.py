@@ -0,0 +1,72 @@
+"""
+Suítes de benchmark executadas com ``python manage.py benchmark <suite>``.
+
+Cada suíte é um módulo com ``add_arguments(parser)`` e ``run(options, stdout)``;
+``run`` retorna um dicionário serializável em JSON, que pode ser salvo com
+``--output`` para comparar resultados entre commits.
+"""
+import importlib
+import json
+import platform
+import subprocess
+from datetime import datetime, timezone
+
+SUITES = {
+    'db_connections': 'core_app.benchmarks.db_connections',
+    'endpoints': 'core_app.benchmarks.endpoints',
+    'renderers': 'core_app.benchmarks.renderers',
+    'sqlite_writes': 'core_app.benchmarks.sqlite_writes',
+}
+
+
+# Opções genéricas de todo comando Django, irrelevantes para os resultados
+_COMMAND_OPTIONS = {
+    'verbosity', 'settings', 'pythonpath', 'traceback',
+    'no_color', 'force_color', 'skip_checks', 'output',
+}
+
+
+def load_suite(name):
+    return importlib.import_module(SUITES[name])
+
+
+def percentile(values, pct):
+    """Percentil por interpolação linear (``pct`` entre 0 e 100)"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    position = (len(ordered) - 1) * pct / 100
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def save_results(path, suite, options, results):
+    """Salva os resultados com metadados do ambiente e do commit"""
+    document = {
+        'suite': suite,
+        'commit': git_revision(),
+        'timestamp': datetime.now(timezone.utc).isoformat(),
+        'python': platform.python_version(),
+        'options': {
+            key: value for key, value in options.items()
+            if key not in _COMMAND_OPTIONS and _is_json_scalar(value)
+        },
+        'results': results,
+    }
+    with open(path, 'w', encoding='utf-8') as arquivo:
+        json.dump(document, arquivo, indent=2, ensure_ascii=False)
+
+
+def _is_json_scalar(value):
+    return value is None or isinstance(value, (str, int, float, bool))
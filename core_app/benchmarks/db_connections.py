@@ -0,0 +1,130 @@
+"""
+Latência das requisições com e sem reaproveitamento de conexões ao banco.
+
+Compara três modos de conexão do ``default``: ``nova`` (uma conexão por
+requisição, ``CONN_MAX_AGE=0``), ``persistente`` (``CONN_MAX_AGE`` com
+verificação antes do reuso) e ``pool`` (pool do psycopg 3; somente
+PostgreSQL com ``psycopg[pool]``). As requisições passam pelo handler WSGI
+do Django, como no gunicorn, então as conexões são fechadas ou devolvidas
+ao fim de cada uma. Use com ``DATABASE_URL`` apontando para o PostgreSQL:
+no SQLite abrir uma conexão custa pouco e a diferença é pequena.
+"""
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from decimal import Decimal
+
+from django.core.handlers.wsgi import WSGIHandler
+from django.db import DEFAULT_DB_ALIAS, connection, connections
+from django.test import RequestFactory, override_settings
+from django.urls import reverse
+
+from core_app.benchmarks import percentile
+from core_app.benchmarks.endpoints import test_database
+
+MODES = {
+    'nova': {'CONN_MAX_AGE': 0, 'CONN_HEALTH_CHECKS': False, 'pool': None},
+    'persistente': {'CONN_MAX_AGE': 600, 'CONN_HEALTH_CHECKS': True, 'pool': None},
+    'pool': {'CONN_MAX_AGE': 0, 'CONN_HEALTH_CHECKS': False, 'pool': True},
+}
+
+
+def add_arguments(parser):
+    parser.add_argument('--modes', default='nova,persistente,pool',
+                        help='Modos de conexão comparados (padrão: nova,persistente,pool)')
+    parser.add_argument('--concurrency', default='1,8',
+                        help='Níveis de concorrência separados por vírgula (padrão: 1,8)')
+    parser.add_argument('--requests', type=int, default=300, help='Requisições por modo e nível (padrão: 300)')
+
+
+def _fechar():
+    connections.close_all()
+    if hasattr(connection, 'close_pool'):
+        connection.close_pool()
+
+
+@contextmanager
+def connection_mode(nome):
+    """Reconfigura o ``default`` no modo ``nome`` e restaura ao final"""
+    banco = connections.settings[DEFAULT_DB_ALIAS]
+    original = {chave: banco.get(chave) for chave in ('CONN_MAX_AGE', 'CONN_HEALTH_CHECKS')}
+    opcoes = dict(banco['OPTIONS'])
+    modo = MODES[nome]
+
+    _fechar()
+    banco.update(CONN_MAX_AGE=modo['CONN_MAX_AGE'], CONN_HEALTH_CHECKS=modo['CONN_HEALTH_CHECKS'])
+    banco['OPTIONS'] = {chave: valor for chave, valor in opcoes.items() if chave != 'pool'}
+    if modo['pool']:
+        banco['OPTIONS']['pool'] = opcoes.get('pool') or modo['pool']
+    try:
+        yield
+    finally:
+        _fechar()
+        banco.update(original)
+        banco['OPTIONS'] = opcoes
+
+
+def _measure(url, concurrency, total):
+    handler = WSGIHandler()
+    factory = RequestFactory()
+
+    def request(_):
+        environ = factory.get(url).environ
+        status = []
+        inicio = time.perf_counter()
+        response = handler(environ, lambda linha, cabecalhos, *args: status.append(linha))
+        b''.join(response)
+        # Dispara request_finished: fecha ou devolve a conexão, como no gunicorn
+        response.close()
+        return time.perf_counter() - inicio, status[0].startswith('200')
+
+    def close_connection(_):
+        connection.close()
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        inicio = time.perf_counter()
+        amostras = list(executor.map(request, range(total)))
+        duracao = time.perf_counter() - inicio
+        list(executor.map(close_connection, range(concurrency)))
+
+    tempos = [tempo for tempo, _ in amostras]
+    return {
+        'requests': total,
+        'errors': sum(1 for _, ok in amostras if not ok),
+        'p50_ms': round(percentile(tempos, 50) * 1000, 3),
+        'p95_ms': round(percentile(tempos, 95) * 1000, 3),
+        'p99_ms': round(percentile(tempos, 99) * 1000, 3),
+        'rps': round(total / duracao, 2) if duracao else 0.0,
+    }
+
+
+def run(options, stdout):
+    from items_app.models import Produto
+
+    niveis = [int(nivel) for nivel in options['concurrency'].split(',') if nivel.strip()]
+    modos = [modo.strip() for modo in options['modes'].split(',') if modo.strip()]
+    results = {}
+
+    with test_database(), override_settings(API_CACHE_ENABLED=False, SLOW_QUERY_THRESHOLD_MS=None):
+        produtos = Produto.objects.bulk_create(
+            Produto(nome=f'Produto {i}', preco=Decimal('9.90')) for i in range(1, 101)
+        )
+        url = reverse('produto-detail', args=[produtos[0].pk])
+        stdout.write(f'{connection.vendor}: GET {url}')
+        stdout.write(f"{'modo':12} {'conc.':>5} {'p50 (ms)':>10} {'p95 (ms)':>10} {'p99 (ms)':>10} {'req/s':>9} {'erros':>6}")
+
+        for modo in modos:
+            if modo == 'pool' and connection.vendor != 'postgresql':
+                stdout.write(f'{modo:12} ignorado: requer PostgreSQL com psycopg[pool]')
+                continue
+            results[modo] = {}
+            with connection_mode(modo):
+                for nivel in niveis:
+                    medida = _measure(url, nivel, options['requests'])
+                    results[modo][str(nivel)] = medida
+                    stdout.write(
+                        f"{modo:12} {nivel:5d} {medida['p50_ms']:10.2f} {medida['p95_ms']:10.2f} "
+                        f"{medida['p99_ms']:10.2f} {medida['rps']:9.1f} {medida['errors']:6d}"
+                    )
+
+    return results
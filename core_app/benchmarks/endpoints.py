@@ -0,0 +1,206 @@
+"""
+Latência e vazão dos endpoints de carrinho com a API de itens simulada.
+
+Cria um banco de teste com o volume pedido de produtos, carrinhos e itens,
+sobe um stub da API de produtos em localhost (com latência configurável) e
+dispara requisições em processo, pelo cliente de testes do Django, em cada
+nível de concorrência.
+"""
+import json
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from decimal import Decimal
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from django.db import connection, connections
+from django.test import Client, override_settings
+from django.test.utils import setup_test_environment, teardown_test_environment
+from django.urls import reverse
+
+from core_app.benchmarks import percentile
+from core_app.testing import items_api_payload
+
+
+def add_arguments(parser):
+    parser.add_argument('--products', type=int, default=500, help='Produtos no catálogo (padrão: 500)')
+    parser.add_argument('--baskets', type=int, default=50, help='Carrinhos (padrão: 50)')
+    parser.add_argument('--items-per-basket', type=int, default=10, help='Itens por carrinho (padrão: 10)')
+    parser.add_argument('--latency-ms', type=float, default=2.0,
+                        help='Latência simulada de cada chamada à API de itens (padrão: 2)')
+    parser.add_argument('--concurrency', default='1,4,16',
+                        help='Níveis de concorrência separados por vírgula (padrão: 1,4,16)')
+    parser.add_argument('--requests', type=int, default=100,
+                        help='Requisições por endpoint e nível (padrão: 100)')
+    parser.add_argument('--with-cache', action='store_true',
+                        help='Mantém o cache de respostas da API ligado')
+    parser.add_argument('--seed', type=int, default=42)
+
+
+class ItemsAPIStub:
+    """
+    Stub da API de produtos (``/api/produtos/`` e ``/api/produtos/<id>/``).
+
+    A listagem aceita ``?ids=1,2,3``, como a API real.
+    """
+
+    def __init__(self, produtos, latency):
+        self.produtos = produtos
+        self.latency = latency
+        self.calls = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), self._handler())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self):
+        host, port = self._server.server_address
+        return f'http://{host}:{port}/api/produtos/'
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                with stub._lock:
+                    stub.calls += 1
+                time.sleep(stub.latency)
+
+                status, body = items_api_payload(stub.produtos, self.path)
+                content = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(content)))
+                self.end_headers()
+                self.wfile.write(content)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+@contextmanager
+def test_database():
+    """Banco de teste temporário, destruído ao final"""
+    setup_test_environment()
+    old_name = connection.settings_dict['NAME']
+    connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+    try:
+        yield
+    finally:
+        connections.close_all()
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        teardown_test_environment()
+
+
+def seed(options, rng):
+    """Popula produtos, carrinhos e itens; retorna o catálogo para o stub"""
+    from basket_app.models import Basket, BasketItem
+    from items_app.models import Produto
+
+    produtos = Produto.objects.bulk_create(
+        Produto(nome=f'Produto {i}', preco=Decimal(rng.randint(100, 50000)) / 100)
+        for i in range(1, options['products'] + 1)
+    )
+    baskets = Basket.objects.bulk_create(
+        Basket(nome=f'Lista {i}', estabelecimento=f'Supermercado {i % 20}')
+        for i in range(1, options['baskets'] + 1)
+    )
+    por_carrinho = min(options['items_per_basket'], len(produtos))
+    BasketItem.objects.bulk_create(
+        BasketItem(basket=basket, produto_id=produto.id, quantidade=rng.randint(1, 12))
+        for basket in baskets
+        for produto in rng.sample(produtos, por_carrinho)
+    )
+    catalogo = {p.id: {'id': p.id, 'nome': p.nome, 'preco': str(p.preco)} for p in produtos}
+    return catalogo, [basket.id for basket in baskets]
+
+
+def endpoints(basket_ids):
+    """Endpoints medidos: nome -> função que sorteia a URL de cada requisição"""
+    return {
+        'basket-summary': lambda rng: reverse('basket-summary-specific', args=[rng.choice(basket_ids)]),
+        'baskets-list': lambda rng: reverse('basketlist-list'),
+        'baskets-detail': lambda rng: reverse('basketlist-detail', args=[rng.choice(basket_ids)]),
+        'basket-items-list': lambda rng: reverse('basketitem-list'),
+    }
+
+
+def _measure(url_for, concurrency, total, seed_value):
+    local = threading.local()
+
+    def request(index):
+        if not hasattr(local, 'client'):
+            local.client = Client()
+        url = url_for(random.Random(seed_value + index))
+        inicio = time.perf_counter()
+        response = local.client.get(url)
+        return time.perf_counter() - inicio, response.status_code
+
+    def close_connection(_):
+        connection.close()
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        inicio = time.perf_counter()
+        amostras = list(executor.map(request, range(total)))
+        duracao = time.perf_counter() - inicio
+        # Cada thread abriu sua própria conexão com o banco
+        list(executor.map(close_connection, range(concurrency)))
+
+    tempos = [tempo for tempo, _ in amostras]
+    return {
+        'requests': total,
+        'errors': sum(1 for _, status in amostras if status != 200),
+        'p50_ms': round(percentile(tempos, 50) * 1000, 3),
+        'p95_ms': round(percentile(tempos, 95) * 1000, 3),
+        'p99_ms': round(percentile(tempos, 99) * 1000, 3),
+        'rps': round(total / duracao, 2) if duracao else 0.0,
+    }
+
+
+def run(options, stdout):
+    rng = random.Random(options['seed'])
+    niveis = [int(nivel) for nivel in options['concurrency'].split(',') if nivel.strip()]
+    results = {}
+
+    with test_database():
+        catalogo, basket_ids = seed(options, rng)
+        stdout.write(
+            f'{len(catalogo)} produtos, {len(basket_ids)} carrinhos, '
+            f"{len(basket_ids) * min(options['items_per_basket'], len(catalogo))} itens"
+        )
+
+        with ItemsAPIStub(catalogo, options['latency_ms'] / 1000) as stub, \
+                override_settings(ITEMS_API_URL=stub.url, API_CACHE_ENABLED=options['with_cache']):
+            stdout.write(
+                f"{'endpoint':20} {'conc.':>5} {'p50 (ms)':>10} {'p95 (ms)':>10} "
+                f"{'p99 (ms)':>10} {'req/s':>9} {'chamadas/req':>13} {'erros':>6}"
+            )
+            for nome, url_for in endpoints(basket_ids).items():
+                # Aquecimento: conexões, caches de URL e templates
+                Client().get(url_for(rng))
+                results[nome] = {}
+                for nivel in niveis:
+                    chamadas_antes = stub.calls
+                    medida = _measure(url_for, nivel, options['requests'], options['seed'])
+                    medida['outbound_per_request'] = round((stub.calls - chamadas_antes) / options['requests'], 2)
+                    results[nome][str(nivel)] = medida
+                    stdout.write(
+                        f"{nome:20} {nivel:5d} {medida['p50_ms']:10.2f} {medida['p95_ms']:10.2f} "
+                        f"{medida['p99_ms']:10.2f} {medida['rps']:9.1f} "
+                        f"{medida['outbound_per_request']:13.2f} {medida['errors']:6d}"
+                    )
+
+    return results
@@ -0,0 +1,154 @@
+"""
+Tempo de codificação e tamanho do payload dos renderers da API.
+
+Os payloads reproduzem as respostas dos endpoints existentes (produtos,
+carrinhos, itens e resumo), com os mesmos tipos produzidos pelos serializers
+e pela view ``basket_summary``.
+"""
+import random
+import statistics
+import time
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+
+from rest_framework import serializers
+from rest_framework.renderers import JSONRenderer
+
+from core_app.renderers import FastJSONRenderer, MessagePackRenderer, orjson
+
+_datetime_field = serializers.DateTimeField()
+
+
+def add_arguments(parser):
+    parser.add_argument('--rows', type=int, default=1000, help='Linhas por lista (padrão: 1000)')
+    parser.add_argument('--repeat', type=int, default=30, help='Repetições por medição (padrão: 30)')
+    parser.add_argument('--seed', type=int, default=42)
+
+
+def _data(rng):
+    instante = datetime(2025, 1, 1, tzinfo=timezone.utc) + timedelta(seconds=rng.randint(0, 10**7))
+    return instante.replace(microsecond=rng.randint(0, 999999))
+
+
+def _preco(rng):
+    return Decimal(rng.randint(100, 50000)) / 100
+
+
+def payload_produtos(rng, rows):
+    return [
+        {'id': i, 'nome': f'Produto {i}', 'preco': str(_preco(rng))}
+        for i in range(1, rows + 1)
+    ]
+
+
+def payload_baskets(rng, rows):
+    return [
+        {
+            'id': i,
+            'nome': f'Lista {i}',
+            'estabelecimento': f'Supermercado {i % 50}',
+            'total_itens': rng.randint(1, 40),
+            'valor_total': round(float(_preco(rng)) * rng.randint(1, 10), 2),
+            'data_criacao': _datetime_field.to_representation(_data(rng)),
+            'data_atualizacao': _datetime_field.to_representation(_data(rng)),
+        }
+        for i in range(1, rows + 1)
+    ]
+
+
+def payload_basket_items(rng, rows):
+    itens = []
+    for i in range(1, rows + 1):
+        preco = _preco(rng)
+        quantidade = rng.randint(1, 12)
+        itens.append({
+            'id': i,
+            'basket': i % 100 + 1,
+            'basket_nome': f'Lista {i % 100 + 1} - Supermercado {i % 50}',
+            'produto_id': rng.randint(1, 5000),
+            'produto_nome': f'Produto {i}',
+            'produto_preco': str(preco),
+            'quantidade': quantidade,
+            'subtotal': round(float(preco) * quantidade, 2),
+            'data_adicionado': _datetime_field.to_representation(_data(rng)),
+        })
+    return itens
+
+
+def payload_basket_summary(rng, rows):
+    itens = []
+    for i in range(1, rows + 1):
+        preco = float(_preco(rng))
+        quantidade = rng.randint(1, 12)
+        itens.append({
+            'produto_id': rng.randint(1, 5000),
+            'produto_nome': f'Produto {i}',
+            'quantidade': quantidade,
+            'preco_unitario': preco,
+            'subtotal': round(preco * quantidade, 2),
+        })
+    return {
+        'total_itens_unicos': rows,
+        'total_quantidade': sum(item['quantidade'] for item in itens),
+        'valor_total': round(sum(item['subtotal'] for item in itens), 2),
+        'itens': itens,
+        # A view devolve o datetime do modelo sem conversão prévia
+        'basket_info': {
+            'basket_id': 1,
+            'basket_nome': 'Lista 1',
+            'estabelecimento': 'Supermercado 1',
+            'data_criacao': _data(rng),
+        },
+    }
+
+
+ENDPOINTS = {
+    '/api/produtos/': payload_produtos,
+    '/api/baskets/': payload_baskets,
+    '/api/basket-items/': payload_basket_items,
+    '/api/basket-summary/<id>/': payload_basket_summary,
+}
+
+
+def _renderers():
+    renderers = {'drf-json': JSONRenderer()}
+    renderers['orjson' if orjson else 'orjson (fallback)'] = FastJSONRenderer()
+    if MessagePackRenderer.available:
+        renderers['msgpack'] = MessagePackRenderer()
+    return renderers
+
+
+def _medir(renderer, data, media_type, repeat):
+    amostras = []
+    for _ in range(repeat):
+        inicio = time.perf_counter()
+        conteudo = renderer.render(data, media_type, {})
+        amostras.append(time.perf_counter() - inicio)
+    return statistics.median(amostras), min(amostras), len(conteudo)
+
+
+def run(options, stdout):
+    rng = random.Random(options['seed'])
+    renderers = _renderers()
+    results = {}
+
+    stdout.write(f"{'endpoint':28} {'renderer':18} {'mediana (ms)':>13} {'mín (ms)':>10} {'bytes':>10} {'speedup':>8}")
+    for endpoint, builder in ENDPOINTS.items():
+        data = builder(rng, options['rows'])
+        results[endpoint] = {}
+        referencia = None
+
+        for nome, renderer in renderers.items():
+            mediana, minimo, tamanho = _medir(renderer, data, renderer.media_type, options['repeat'])
+            referencia = referencia or mediana
+            results[endpoint][nome] = {
+                'median_ms': round(mediana * 1000, 4),
+                'min_ms': round(minimo * 1000, 4),
+                'bytes': tamanho,
+            }
+            stdout.write(
+                f'{endpoint:28} {nome:18} {mediana * 1000:13.3f} {minimo * 1000:10.3f} '
+                f'{tamanho:10d} {referencia / mediana:7.2f}x'
+            )
+
+    return results
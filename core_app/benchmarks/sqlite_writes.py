@@ -0,0 +1,204 @@
+"""
+Vazão de escrita no SQLite com vários processos, como workers do gunicorn.
+
+Para cada perfil de conexão (``padrao``: SQLite sem opções, como o Django
+vem configurado; ``producao``: ``SQLITE_PRODUCTION_OPTIONS``) cria um arquivo
+temporário com o esquema do projeto e dispara ``--workers`` processos
+escritores, cada um com ``--transactions`` transações de ler-e-gravar (conta
+os carrinhos da loja, cria um carrinho e seus itens), enquanto ``--readers``
+processos leem a listagem de carrinhos. Relata transações/s, latências e
+quantas operações falharam com "database is locked".
+"""
+import multiprocessing
+import os
+import queue
+import shutil
+import tempfile
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.management import CommandError, call_command
+from django.db import DEFAULT_DB_ALIAS, OperationalError, connections, transaction
+from django.test import override_settings
+
+from core_app.benchmarks import percentile
+from core_app.benchmarks.endpoints import test_database
+
+ALIAS = 'benchmark_sqlite'
+# Intervalo (segundos) entre as verificações dos processos enquanto os resultados não chegam
+POLL_SECONDS = 1
+
+
+def add_arguments(parser):
+    parser.add_argument('--workers', default='1,4,8',
+                        help='Processos escritores por rodada, separados por vírgula (padrão: 1,4,8)')
+    parser.add_argument('--transactions', type=int, default=200,
+                        help='Transações por escritor (padrão: 200)')
+    parser.add_argument('--readers', type=int, default=2, help='Processos leitores simultâneos (padrão: 2)')
+    parser.add_argument('--items', type=int, default=3, help='Itens gravados por transação (padrão: 3)')
+    parser.add_argument('--profiles', default='padrao,producao',
+                        help='Perfis de conexão comparados (padrão: padrao,producao)')
+
+
+def profiles():
+    return {
+        'padrao': {},
+        'producao': settings.SQLITE_PRODUCTION_OPTIONS,
+    }
+
+
+@contextmanager
+def sqlite_database(options):
+    """Arquivo SQLite temporário, com as migrações aplicadas, no alias ``ALIAS``"""
+    diretorio = tempfile.mkdtemp(prefix='comprasaux-sqlite-')
+    configuracao = connections.configure_settings({
+        DEFAULT_DB_ALIAS: dict(connections.settings[DEFAULT_DB_ALIAS]),
+        ALIAS: {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.path.join(diretorio, 'benchmark.sqlite3'),
+            'OPTIONS': dict(options),
+        },
+    })
+    connections.settings[ALIAS] = configuracao[ALIAS]
+    try:
+        call_command('migrate', database=ALIAS, verbosity=0)
+        connections[ALIAS].close()
+        yield
+    finally:
+        connections[ALIAS].close()
+        del connections[ALIAS]
+        del connections.settings[ALIAS]
+        shutil.rmtree(diretorio, ignore_errors=True)
+
+
+def _travado(erro):
+    return 'locked' in str(erro) or 'busy' in str(erro)
+
+
+def _escritor(numero, transacoes, itens, largada, resultados):
+    from basket_app.models import Basket, BasketItem
+
+    tempos, travadas = [], 0
+    loja = f'Loja {numero}'
+    largada.wait()
+    for _ in range(transacoes):
+        inicio = time.perf_counter()
+        try:
+            with transaction.atomic(using=ALIAS):
+                total = Basket.objects.using(ALIAS).filter(estabelecimento=loja).count()
+                basket = Basket.objects.using(ALIAS).create(nome=f'Lista {total + 1}', estabelecimento=loja)
+                BasketItem.objects.using(ALIAS).bulk_create(
+                    BasketItem(basket=basket, produto_id=produto_id, quantidade=1)
+                    for produto_id in range(1, itens + 1)
+                )
+        except OperationalError as e:
+            if not _travado(e):
+                raise
+            travadas += 1
+            continue
+        tempos.append(time.perf_counter() - inicio)
+    connections[ALIAS].close()
+    resultados.put(('escrita', tempos, travadas))
+
+
+def _leitor(largada, parar, resultados):
+    from basket_app.models import Basket
+
+    tempos, travadas = [], 0
+    largada.wait()
+    while not parar.is_set():
+        inicio = time.perf_counter()
+        try:
+            list(Basket.objects.using(ALIAS).order_by('-data_criacao')[:50])
+        except OperationalError as e:
+            if not _travado(e):
+                raise
+            travadas += 1
+            continue
+        tempos.append(time.perf_counter() - inicio)
+    connections[ALIAS].close()
+    resultados.put(('leitura', tempos, travadas))
+
+
+def _coletar(resultados, processos, esperados):
+    """Lê ``esperados`` resultados; falha se algum processo terminar com erro antes de entregar o seu"""
+    coletados = []
+    while len(coletados) < esperados:
+        try:
+            coletados.append(resultados.get(timeout=POLL_SECONDS))
+        except queue.Empty:
+            falhos = [processo for processo in processos if processo.exitcode not in (None, 0)]
+            if falhos:
+                for processo in processos:
+                    processo.terminate()
+                codigos = ', '.join(str(processo.exitcode) for processo in falhos)
+                raise CommandError(f'{len(falhos)} processo(s) do benchmark terminaram com erro (código {codigos})')
+    return coletados
+
+
+def _rodada(workers, options):
+    contexto = multiprocessing.get_context('fork')
+    largada, parar, resultados = contexto.Event(), contexto.Event(), contexto.Queue()
+    # Os processos filhos abrem suas próprias conexões
+    connections.close_all()
+
+    escritores = [
+        contexto.Process(target=_escritor, args=(numero, options['transactions'], options['items'], largada, resultados))
+        for numero in range(workers)
+    ]
+    leitores = [contexto.Process(target=_leitor, args=(largada, parar, resultados)) for _ in range(options['readers'])]
+    for processo in escritores + leitores:
+        processo.start()
+
+    inicio = time.perf_counter()
+    largada.set()
+    processos = escritores + leitores
+    coletados = _coletar(resultados, processos, len(escritores))
+    duracao = time.perf_counter() - inicio
+    parar.set()
+    coletados += _coletar(resultados, processos, len(leitores))
+    for processo in escritores + leitores:
+        processo.join()
+
+    escrita = [tempo for tipo, tempos, _ in coletados if tipo == 'escrita' for tempo in tempos]
+    leitura = [tempo for tipo, tempos, _ in coletados if tipo == 'leitura' for tempo in tempos]
+    return {
+        'transactions': len(escrita),
+        'locked': sum(travadas for tipo, _, travadas in coletados if tipo == 'escrita'),
+        'tps': round(len(escrita) / duracao, 2) if duracao else 0.0,
+        'p50_ms': round(percentile(escrita, 50) * 1000, 3),
+        'p95_ms': round(percentile(escrita, 95) * 1000, 3),
+        'p99_ms': round(percentile(escrita, 99) * 1000, 3),
+        'reads': len(leitura),
+        'reads_locked': sum(travadas for tipo, _, travadas in coletados if tipo == 'leitura'),
+        'read_p95_ms': round(percentile(leitura, 95) * 1000, 3),
+    }
+
+
+def run(options, stdout):
+    niveis = [int(nivel) for nivel in options['workers'].split(',') if nivel.strip()]
+    perfis = profiles()
+    results = {}
+
+    stdout.write(
+        f"{'perfil':10} {'workers':>7} {'trans./s':>9} {'p50 (ms)':>9} {'p95 (ms)':>9} "
+        f"{'p99 (ms)':>9} {'travadas':>9} {'leit. p95':>10} {'leit. trav.':>11}"
+    )
+    # Esperas por bloqueio não devem ir para o registro de consultas lentas;
+    # o banco de teste isola o ``default``, usado pelos sinais de versão
+    with override_settings(SLOW_QUERY_THRESHOLD_MS=None), test_database():
+        for nome in options['profiles'].split(','):
+            nome = nome.strip()
+            results[nome] = {}
+            for nivel in niveis:
+                with sqlite_database(perfis[nome]):
+                    medida = _rodada(nivel, options)
+                results[nome][str(nivel)] = medida
+                stdout.write(
+                    f"{nome:10} {nivel:7d} {medida['tps']:9.1f} {medida['p50_ms']:9.2f} "
+                    f"{medida['p95_ms']:9.2f} {medida['p99_ms']:9.2f} {medida['locked']:9d} "
+                    f"{medida['read_p95_ms']:10.2f} {medida['reads_locked']:11d}"
+                )
+
+    return results
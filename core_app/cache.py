@@ -0,0 +1,131 @@
+"""
+Cache de respostas da API chaveado pelas versões dos dados.
+
+A chave combina caminho, query string e as versões dos namespaces dos quais a
+resposta depende (ver ``core_app.versioning``). Uma escrita incrementa a
+versão e todas as respostas derivadas deixam de ser encontradas, sem varrer o
+cache. O backend é o cache padrão do Django (locmem, arquivo, memcached,
+redis...); com vários workers use um backend compartilhado.
+
+Respostas montadas com dados de reserva (ex.: a API de produtos falhou e o
+valor saiu zerado) são marcadas com ``mark_degraded`` durante a requisição
+(escopo aberto pelo ``DegradedResponseMiddleware``): elas não são guardadas
+aqui, nos fragmentos do ``front_app`` nem no proxy, e saem com
+``Cache-Control: private, no-store`` e sem ``ETag``, para que uma falha breve
+não continue sendo servida depois que a API voltar.
+"""
+import hashlib
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.cache import patch_cache_control
+from rest_framework.response import Response
+
+from .metrics import observe_cache
+from .versioning import get_versions
+
+KEY_PREFIX = 'api-resposta'
+CACHEABLE_METHODS = ('GET', 'HEAD')
+
+# Lista com um booleano por requisição (ver ``track_degraded``)
+_degradada = ContextVar('resposta_degradada', default=None)
+
+
+def mark_degraded():
+    """Indica que a resposta em construção usa dados de reserva e não deve ser guardada"""
+    estado = _degradada.get()
+    if estado is not None:
+        estado[0] = True
+
+
+def is_degraded():
+    """Se a requisição atual já usou dados de reserva"""
+    estado = _degradada.get()
+    return bool(estado and estado[0])
+
+
+@contextmanager
+def track_degraded():
+    """Escopo de ``mark_degraded``; reaproveita o da requisição, se já houver um"""
+    estado = _degradada.get()
+    if estado is not None:
+        yield estado
+        return
+    estado = [False]
+    token = _degradada.set(estado)
+    try:
+        yield estado
+    finally:
+        _degradada.reset(token)
+
+
+class DegradedResponseMiddleware:
+    """
+    Abre o escopo de ``mark_degraded`` para toda a requisição. Respostas
+    degradadas que não passaram por ``apply_cache_headers`` também perdem o
+    ``ETag`` e saem com ``no-store``.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with track_degraded() as estado:
+            response = self.get_response(request)
+        if estado[0]:
+            del response['ETag']
+            patch_cache_control(response, private=True, no_store=True)
+        return response
+
+
+def response_cache_key(request, versions):
+    query = '&'.join(sorted(request.GET.urlencode().split('&')))
+    # O formato entra na chave porque algumas listagens mudam de estrutura
+    # conforme o renderer (ex.: colunar)
+    formato = getattr(getattr(request, 'accepted_renderer', None), 'format', '')
+    digest = hashlib.md5(f'{request.path}?{query}#{formato}'.encode(), usedforsecurity=False).hexdigest()
+    return f"{KEY_PREFIX}:{digest}:{'.'.join(str(version) for version in versions)}"
+
+
+def cached_response(namespaces, timeout=None):
+    """
+    Decorator para views DRF cujas respostas dependem de ``namespaces``.
+
+    ``namespaces`` recebe ``(request, *args, **kwargs)`` da view e retorna os
+    namespaces de versão. Somente respostas 200 são guardadas; o conteúdo é
+    armazenado antes da renderização, então a negociação de formato continua
+    valendo para respostas vindas do cache. Em viewsets, use com
+    ``method_decorator``.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in CACHEABLE_METHODS or not getattr(settings, 'API_CACHE_ENABLED', True):
+                return view(request, *args, **kwargs)
+
+            versions = get_versions(*namespaces(request, *args, **kwargs))
+            key = response_cache_key(request, versions)
+            cached = cache.get(key)
+            observe_cache('api', cached is not None)
+            if cached is not None:
+                data, status_code = cached
+                response = Response(data, status=status_code)
+                response['X-Cache'] = 'HIT'
+                return response
+
+            with track_degraded() as estado:
+                response = view(request, *args, **kwargs)
+            if estado[0]:
+                patch_cache_control(response, no_store=True)
+                response['X-Cache'] = 'BYPASS'
+                return response
+            if response.status_code == 200 and isinstance(response, Response):
+                cache_timeout = timeout if timeout is not None else getattr(settings, 'API_CACHE_TIMEOUT', 600)
+                cache.set(key, (response.data, response.status_code), cache_timeout)
+                response['X-Cache'] = 'MISS'
+            return response
+        return wrapper
+    return decorator
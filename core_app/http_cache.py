@@ -0,0 +1,122 @@
+"""
+Cabeçalhos de cache HTTP para o proxy reverso.
+
+As respostas de leitura declaram de quais dados dependem por meio dos mesmos
+namespaces de versão usados no cache da aplicação (ver
+``core_app.versioning``), expostos no cabeçalho ``Surrogate-Key`` (ex.:
+``catalog produto-3``). O ``Cache-Control`` usa ``s-maxage``, de modo que só o
+proxy guarda a resposta; navegadores sempre revalidam. Após cada escrita,
+``core_app.purge`` renova no proxy as URLs das chaves afetadas.
+
+Fora do escopo ``private``, as respostas também levam um ``ETag`` fraco
+derivado das mesmas versões (além do caminho, da query string e do formato):
+um cliente que envia ``If-None-Match`` com ele recebe 304, sem corpo,
+enquanto os dados não mudarem. O ``front_app`` guarda o catálogo no
+navegador e o revalida assim (ver ``makeRequest`` em ``base.html``).
+Respostas montadas com dados de reserva não recebem ``ETag`` e por isso
+nunca chegam a esse cache.
+"""
+import hashlib
+from functools import wraps
+
+from django.conf import settings
+from django.utils.cache import get_conditional_response, patch_cache_control
+
+from .cache import is_degraded
+from .versioning import get_versions
+
+CACHEABLE_METHODS = ('GET', 'HEAD')
+PRIVATE = 'private'
+# Páginas e buscas (ver core_app.pagination) não são guardadas no proxy: a
+# purga após escritas só alcança as URLs canônicas, e essas variantes ficariam
+# desatualizadas até o s-maxage. Continuam com ETag para o navegador.
+UNSHARED_PARAMS = ('limit', 'offset', 'search')
+
+
+def surrogate_key(namespace):
+    """Converte um namespace de versão em chave do proxy (``basket:3`` -> ``basket-3``)"""
+    return namespace.replace(':', '-')
+
+
+def proxy_max_age(scope):
+    """Tempo (segundos) em que o proxy pode servir respostas do escopo"""
+    return getattr(settings, 'PROXY_CACHE_TIMEOUTS', {}).get(scope, 0)
+
+
+def version_etag(request, response, namespaces):
+    """ETag fraco da resposta, válido enquanto as versões de ``namespaces`` não mudarem"""
+    query = '&'.join(sorted(request.GET.urlencode().split('&')))
+    formato = getattr(response, 'accepted_media_type', None) or response.get('Content-Type', '')
+    versoes = '.'.join(str(version) for version in get_versions(*namespaces))
+    digest = hashlib.md5(f'{request.path}?{query}#{formato}#{versoes}'.encode(), usedforsecurity=False).hexdigest()
+    return f'W/"{digest}"'
+
+
+def apply_cache_headers(request, response, namespaces, scope):
+    """
+    Define ``Cache-Control``, ``Surrogate-Key`` e ``ETag`` em respostas 200 de leitura.
+
+    O escopo ``private`` é usado por páginas que não podem ser compartilhadas
+    entre usuários (ex.: contêm token CSRF) e não recebe ``ETag``. Retorna
+    uma resposta 304 quando o ``If-None-Match`` da requisição corresponde.
+
+    Respostas degradadas (ver ``core_app.cache.mark_degraded``) saem com
+    ``no-store`` e sem ``ETag``: ele só depende das versões e continuaria
+    valendo depois que a API se recuperasse. Um cliente que já tem a cópia
+    completa dessas versões ainda recebe 304 e fica com ela.
+    """
+    if request.method not in CACHEABLE_METHODS or response.status_code != 200:
+        return response
+    if is_degraded() or 'no-store' in response.get('Cache-Control', ''):
+        patch_cache_control(response, private=True, no_store=True)
+        if scope == PRIVATE:
+            return response
+        return get_conditional_response(request, etag=version_etag(request, response, namespaces), response=response)
+
+    response['Surrogate-Key'] = ' '.join(surrogate_key(namespace) for namespace in namespaces)
+    max_age = proxy_max_age(scope)
+    if scope == PRIVATE or not max_age or any(param in request.GET for param in UNSHARED_PARAMS):
+        patch_cache_control(response, private=True, no_cache=True)
+    else:
+        patch_cache_control(response, public=True, max_age=0, s_maxage=max_age)
+    if scope == PRIVATE:
+        return response
+
+    response['ETag'] = version_etag(request, response, namespaces)
+    return get_conditional_response(request, etag=response['ETag'], response=response)
+
+
+def surrogate_keys(namespaces, scope):
+    """
+    Decorator para views cujas respostas dependem de ``namespaces``.
+
+    ``namespaces`` recebe ``(request, *args, **kwargs)`` da view, como em
+    ``cached_response``. Em viewsets, prefira ``SurrogateKeyMixin``.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            response = view(request, *args, **kwargs)
+            return apply_cache_headers(request, response, namespaces(request, *args, **kwargs), scope)
+        return wrapper
+    return decorator
+
+
+class SurrogateKeyMixin:
+    """
+    Aplica os cabeçalhos de cache do proxy às leituras de uma viewset.
+
+    ``proxy_cache_scope`` escolhe o tempo em ``PROXY_CACHE_TIMEOUTS`` e
+    ``get_surrogate_namespaces`` retorna os namespaces da resposta.
+    """
+    proxy_cache_scope = PRIVATE
+
+    def get_surrogate_namespaces(self, request, *args, **kwargs):
+        raise NotImplementedError('Defina os namespaces das respostas da viewset')
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        if request.method in CACHEABLE_METHODS and response.status_code == 200:
+            namespaces = self.get_surrogate_namespaces(request, *args, **kwargs)
+            response = apply_cache_headers(request, response, namespaces, self.proxy_cache_scope)
+        return response
@@ -0,0 +1,112 @@
+"""
+Escritas idempotentes com o cabeçalho ``Idempotency-Key``.
+
+Clientes em redes instáveis repetem requisições cuja resposta não chegou. Com
+``Idempotency-Key`` a primeira resposta de sucesso fica guardada em
+``IdempotencyKey`` por ``IDEMPOTENCY_KEY_TTL`` segundos e as repetições
+(mesma chave, método e caminho) recebem a mesma resposta, com
+``Idempotent-Replayed: true``, sem executar a escrita de novo. Uma chave
+repetida com outro corpo recebe 422.
+
+A chave é reservada na mesma transação da escrita: repetições simultâneas
+esperam a primeira terminar e recebem a resposta dela. Respostas de erro não
+são guardadas; o cliente pode corrigir a requisição e repetir com a mesma
+chave. As chaves vencidas são apagadas em lotes por
+``manage.py clear_idempotency_keys``.
+"""
+import hashlib
+import json
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.response import Response
+
+from .models import IdempotencyKey
+
+HEADER = 'Idempotency-Key'
+REPLAYED_HEADER = 'Idempotent-Replayed'
+MAX_LENGTH = IdempotencyKey._meta.get_field('chave').max_length
+
+
+def key_ttl():
+    return timedelta(seconds=getattr(settings, 'IDEMPOTENCY_KEY_TTL', 24 * 60 * 60))
+
+
+def request_hash(request):
+    """SHA-256 do corpo já interpretado, igual para JSON, MessagePack e formulários"""
+    corpo = json.dumps(request.data, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha256(corpo.encode()).hexdigest()
+
+
+def _replay(registro, hash_requisicao):
+    if registro.hash_requisicao != hash_requisicao:
+        return Response(
+            {'detail': f'{HEADER} já usada com outro corpo de requisição.'},
+            status=status.HTTP_422_UNPROCESSABLE_ENTITY,
+        )
+    headers = {REPLAYED_HEADER: 'true'}
+    if registro.location:
+        headers['Location'] = registro.location
+    return Response(registro.resposta, status=registro.status, headers=headers)
+
+
+def idempotent(request, handler):
+    """Executa ``handler()`` uma única vez por ``Idempotency-Key`` da requisição"""
+    chave = request.headers.get(HEADER)
+    if chave is None:
+        return handler()
+    if not chave or len(chave) > MAX_LENGTH:
+        return Response(
+            {'detail': f'{HEADER} deve ter entre 1 e {MAX_LENGTH} caracteres.'},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    escopo = f'{request.method} {request.path}'[:255]
+    hash_requisicao = request_hash(request)
+    agora = timezone.now()
+    chaves = IdempotencyKey.objects.filter(chave=chave, escopo=escopo)
+
+    with transaction.atomic():
+        chaves.filter(expira_em__lte=agora).delete()
+        try:
+            with transaction.atomic():
+                registro = IdempotencyKey.objects.create(
+                    chave=chave, escopo=escopo, hash_requisicao=hash_requisicao, expira_em=agora + key_ttl(),
+                )
+        except IntegrityError:
+            # A reserva só fica visível junto com a resposta (mesma transação)
+            return _replay(chaves.get(), hash_requisicao)
+
+        response = handler()
+        if status.is_success(response.status_code):
+            registro.status = response.status_code
+            registro.resposta = response.data
+            registro.location = response.get('Location', '')
+            registro.save(update_fields=['status', 'resposta', 'location'])
+        else:
+            transaction.set_rollback(True)
+    return response
+
+
+class IdempotencyMixin:
+    """Aceita ``Idempotency-Key`` nas criações e atualizações de uma viewset"""
+
+    def create(self, request, *args, **kwargs):
+        return idempotent(request, lambda: super(IdempotencyMixin, self).create(request, *args, **kwargs))
+
+    def update(self, request, *args, **kwargs):
+        return idempotent(request, lambda: super(IdempotencyMixin, self).update(request, *args, **kwargs))
+
+
+def delete_expired(batch_size=1000):
+    """Apaga as chaves vencidas em lotes de ``batch_size``; retorna quantas foram apagadas"""
+    vencidas = IdempotencyKey.objects.filter(expira_em__lte=timezone.now())
+    total = 0
+    while True:
+        ids = list(vencidas.values_list('pk', flat=True)[:batch_size])
+        if not ids:
+            return total
+        total += IdempotencyKey.objects.filter(pk__in=ids).delete()[0]
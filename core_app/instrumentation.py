@@ -0,0 +1,164 @@
+"""
+Métricas por requisição: banco de dados, chamadas externas e serialização.
+
+``RequestMetrics`` é ativado pelo ``ServerTimingMiddleware`` em uma
+``ContextVar``; fora de uma requisição instrumentada os ganchos abaixo não
+fazem nada além de uma leitura da variável. As chamadas externas também são
+registradas nas métricas do Prometheus (``core_app.metrics``) e como spans
+do trace atual (``core_app.tracing``).
+"""
+import os
+import time
+import traceback
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+
+from .metrics import observe_outbound
+from .tracing import propagation_headers, start_span
+
+_current = ContextVar('request_metrics', default=None)
+
+
+def project_stack(exclude=()):
+    """
+    Quadros da pilha atual que pertencem ao projeto (sem bibliotecas
+    instaladas nem os arquivos em ``exclude``), do mais externo ao mais interno.
+    """
+    raiz = str(settings.BASE_DIR)
+    return [
+        frame for frame in traceback.extract_stack()[:-1]
+        if frame.filename.startswith(raiz)
+        and 'site-packages' not in frame.filename
+        and os.path.abspath(frame.filename) not in exclude
+    ]
+
+
+class RequestMetrics:
+    """Tempos (segundos) e contagens acumulados durante uma requisição"""
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.db_time = 0.0
+        self.db_queries = 0
+        self.outbound_time = 0.0
+        self.outbound_calls = 0
+        self.outbound_errors = 0
+        self.serializer_time = 0.0
+        self.end = None
+        self._serializing = False
+
+    @property
+    def total_time(self):
+        return (self.end or time.perf_counter()) - self.start
+
+    def finish(self):
+        self.end = time.perf_counter()
+
+    def db_wrapper(self, execute, sql, params, many, context):
+        """``execute_wrapper`` que mede as consultas"""
+        inicio = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_time += time.perf_counter() - inicio
+            self.db_queries += 1
+
+    def as_dict(self):
+        return {
+            'total_ms': round(self.total_time * 1000, 2),
+            'db_ms': round(self.db_time * 1000, 2),
+            'db_queries': self.db_queries,
+            'outbound_ms': round(self.outbound_time * 1000, 2),
+            'outbound_calls': self.outbound_calls,
+            'outbound_errors': self.outbound_errors,
+            'serializer_ms': round(self.serializer_time * 1000, 2),
+        }
+
+
+def current_metrics():
+    return _current.get()
+
+
+@contextmanager
+def collect_metrics():
+    """Ativa um ``RequestMetrics`` para o bloco"""
+    metrics = RequestMetrics()
+    token = _current.set(metrics)
+    try:
+        yield metrics
+    finally:
+        _current.reset(token)
+
+
+class OutboundCall:
+    """Chamada externa em andamento: ``headers`` a enviar e o ``status`` HTTP recebido"""
+
+    def __init__(self, headers):
+        self.headers = headers
+        self.status = None
+
+
+@contextmanager
+def track_outbound(target, url=None):
+    """
+    Mede uma chamada HTTP externa a ``target`` (ex.: ``catalogo``).
+
+    Produz um ``OutboundCall`` com os cabeçalhos de propagação do trace
+    atual, que devem ser enviados na chamada; quem chama informa em
+    ``status`` o código da resposta. Exceções e respostas 4xx/5xx contam
+    como erro.
+    """
+    metrics = _current.get()
+    inicio = time.perf_counter()
+    erro = False
+    try:
+        with start_span(f'GET {target}', 'client', **{'http.url': url or ''}) as span:
+            chamada = OutboundCall(propagation_headers())
+            yield chamada
+            if chamada.status is not None:
+                erro = chamada.status >= 400
+                if span is not None:
+                    span.attributes['http.status_code'] = chamada.status
+                    if erro:
+                        span.error = f'HTTP {chamada.status}'
+    except Exception:
+        erro = True
+        raise
+    finally:
+        duracao = time.perf_counter() - inicio
+        observe_outbound(target, duracao, erro)
+        if metrics is not None:
+            metrics.outbound_time += duracao
+            metrics.outbound_calls += 1
+            metrics.outbound_errors += erro
+
+
+@contextmanager
+def track_serialization():
+    """
+    Mede a serialização; blocos aninhados não são contados duas vezes.
+
+    O tempo inclui as chamadas externas feitas pelos campos calculados.
+    """
+    metrics = _current.get()
+    if metrics is None or metrics._serializing:
+        yield
+        return
+
+    metrics._serializing = True
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics._serializing = False
+        metrics.serializer_time += time.perf_counter() - inicio
+
+
+class TimedSerializerMixin:
+    """Soma ao ``RequestMetrics`` o tempo de ``to_representation``"""
+
+    def to_representation(self, instance):
+        with track_serialization():
+            return super().to_representation(instance)
@@ -0,0 +1,185 @@
+"""
+Fila de tarefas em segundo plano guardada no banco, sem broker externo.
+
+Tarefas são funções registradas com ``@task`` e enfileiradas por views e
+signals com ``enqueue(tarefa, *args, key=..., **kwargs)``; o comando
+``manage.py run_workers`` as executa em processos e threads separados do
+gunicorn.
+
+- Enfileirada dentro de uma transação, a tarefa só fica visível para os
+  workers após o commit e é descartada num rollback.
+- ``key`` deduplica: enquanto houver uma tarefa pendente com a mesma chave,
+  novas chamadas retornam a existente.
+- Cada worker reserva uma tarefa com um UPDATE condicional e a mantém por
+  ``JOBS_LEASE_SECONDS``; se o worker morrer, a tarefa volta a ficar
+  disponível ao fim da reserva.
+- Falhas são repetidas com espera exponencial (``JOBS_RETRY_BACKOFF``
+  segundos, dobrando a cada tentativa, até ``JOBS_RETRY_MAX_DELAY``); após
+  ``JOBS_MAX_ATTEMPTS`` tentativas a tarefa fica com estado ``falhou``.
+
+Tarefas concluídas são apagadas. Como podem ser executadas mais de uma vez,
+as tarefas devem ser idempotentes.
+"""
+import hashlib
+import logging
+import random
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, close_old_connections, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+_tarefas = {}
+# Tarefas disponíveis consultadas por reserva; as primeiras podem ser
+# reservadas por outros workers ao mesmo tempo
+CANDIDATES = 10
+MAX_KEY_LENGTH = Job._meta.get_field('chave').max_length
+# INSERTs tentados por enqueue com chave (ver o comentário em enqueue)
+ENQUEUE_ATTEMPTS = 2
+
+
+def jobs_setting(nome, padrao):
+    return getattr(settings, f'JOBS_{nome}', padrao)
+
+
+def task_name(funcao):
+    return f'{funcao.__module__}.{funcao.__qualname__}'
+
+
+def task(funcao):
+    """Registra ``funcao`` como tarefa; só tarefas registradas são executadas"""
+    _tarefas[task_name(funcao)] = funcao
+    return funcao
+
+
+def get_task(nome):
+    if nome not in _tarefas:
+        # O import do módulo registra as tarefas dele
+        import_string(nome)
+    try:
+        return _tarefas[nome]
+    except KeyError:
+        raise LookupError(f'Tarefa não registrada com @task: {nome}') from None
+
+
+def enqueue(tarefa, *args, key=None, delay=0, **kwargs):
+    """Enfileira ``tarefa(*args, **kwargs)``; retorna o ``Job`` criado ou o pendente com a mesma ``key``"""
+    nome = tarefa if isinstance(tarefa, str) else task_name(tarefa)
+    if key is not None and len(key) > MAX_KEY_LENGTH:
+        key = hashlib.sha256(key.encode()).hexdigest()
+
+    # Uma segunda tentativa cobre a pendente reservada entre o INSERT e a
+    # consulta; outra IntegrityError não vem da deduplicação e é repassada
+    for tentativa in range(ENQUEUE_ATTEMPTS):
+        job = Job(
+            tarefa=nome, args=list(args), kwargs=kwargs, chave=key,
+            executar_em=timezone.now() + timedelta(seconds=delay),
+            max_tentativas=jobs_setting('MAX_ATTEMPTS', 5),
+        )
+        if key is None:
+            job.save()
+            return job
+        try:
+            with transaction.atomic():
+                job.save()
+            return job
+        except IntegrityError:
+            existente = Job.objects.filter(chave=key, estado=Job.PENDENTE).first()
+            # Se a pendente acabou de ser reservada, cria outra
+            if existente is not None:
+                return existente
+            if tentativa == ENQUEUE_ATTEMPTS - 1:
+                raise
+
+
+def _disponiveis(agora):
+    return Q(estado=Job.PENDENTE, executar_em__lte=agora) | Q(estado=Job.EXECUTANDO, reservado_ate__lt=agora)
+
+
+def claim():
+    """Reserva a próxima tarefa disponível para este worker; ``None`` se não houver"""
+    agora = timezone.now()
+    reserva = agora + timedelta(seconds=jobs_setting('LEASE_SECONDS', 300))
+    candidatos = Job.objects.filter(_disponiveis(agora)).order_by('executar_em').values_list('pk', flat=True)
+    for pk in candidatos[:CANDIDATES]:
+        # Só um worker altera a linha enquanto ela ainda está disponível
+        reservadas = Job.objects.filter(_disponiveis(agora), pk=pk).update(
+            estado=Job.EXECUTANDO, reservado_ate=reserva, tentativas=F('tentativas') + 1,
+        )
+        if reservadas:
+            return Job.objects.get(pk=pk)
+    return None
+
+
+def retry_delay(tentativa):
+    """Espera (segundos) antes da próxima tentativa: exponencial, com variação aleatória"""
+    espera = min(
+        jobs_setting('RETRY_BACKOFF', 5) * 2 ** (tentativa - 1),
+        jobs_setting('RETRY_MAX_DELAY', 3600),
+    )
+    return random.uniform(espera / 2, espera)
+
+
+def run_job(job):
+    """Executa uma tarefa reservada; retorna ``True`` se ela foi concluída"""
+    # Filtra pela reserva: se ela expirou e outro worker reservou a tarefa,
+    # o resultado deste não sobrescreve o dele
+    reservado = Job.objects.filter(pk=job.pk, reservado_ate=job.reservado_ate)
+    try:
+        get_task(job.tarefa)(*job.args, **job.kwargs)
+    except Exception:
+        erro = traceback.format_exc()
+        if job.tentativas >= job.max_tentativas:
+            logger.error('Tarefa %s (%s) falhou após %s tentativas', job.pk, job.tarefa, job.tentativas,
+                         exc_info=True)
+            reservado.update(estado=Job.FALHOU, reservado_ate=None, erro=erro)
+        else:
+            espera = retry_delay(job.tentativas)
+            logger.warning('Tarefa %s (%s) falhou na tentativa %s; nova tentativa em %.0f s',
+                           job.pk, job.tarefa, job.tentativas, espera, exc_info=True)
+            try:
+                with transaction.atomic():
+                    reservado.update(
+                        estado=Job.PENDENTE, reservado_ate=None, erro=erro,
+                        executar_em=timezone.now() + timedelta(seconds=espera),
+                    )
+            except IntegrityError:
+                # Já há uma pendente com a mesma chave, que fará o mesmo trabalho
+                reservado.delete()
+        return False
+    reservado.delete()
+    return True
+
+
+def run_pending(limit=None):
+    """Executa na thread atual as tarefas disponíveis; retorna quantas foram executadas"""
+    executadas = 0
+    while limit is None or executadas < limit:
+        job = claim()
+        if job is None:
+            break
+        run_job(job)
+        executadas += 1
+    return executadas
+
+
+def work(parar, burst=False):
+    """
+    Laço de um worker: executa tarefas até ``parar`` (``threading.Event``)
+    ser sinalizado ou, com ``burst``, até não haver tarefas disponíveis
+    """
+    intervalo = jobs_setting('POLL_INTERVAL', 1.0)
+    while not parar.is_set():
+        # Como o request_finished das requisições: descarta conexões vencidas ou com erro
+        close_old_connections()
+        if not run_pending(limit=1):
+            if burst:
+                break
+            parar.wait(intervalo)
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from core_app.benchmarks import SUITES, load_suite, save_results
+
+
+class Command(BaseCommand):
+    help = 'Executa uma suíte de benchmark e opcionalmente salva os resultados em JSON'
+
+    def add_arguments(self, parser):
+        subparsers = parser.add_subparsers(dest='suite', required=True)
+        for name in SUITES:
+            suite = load_suite(name)
+            subparser = subparsers.add_parser(name, help=suite.__doc__.strip().splitlines()[0])
+            subparser.add_argument('--output', help='Arquivo JSON para salvar os resultados')
+            suite.add_arguments(subparser)
+
+    def handle(self, *args, **options):
+        suite = options['suite']
+        results = load_suite(suite).run(options, self.stdout)
+
+        if options.get('output'):
+            save_results(options['output'], suite, options, results)
+            self.stdout.write(self.style.SUCCESS(f"Resultados salvos em {options['output']}"))
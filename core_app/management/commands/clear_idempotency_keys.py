@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from core_app.idempotency import delete_expired
+
+
+class Command(BaseCommand):
+    help = 'Apaga em lotes as Idempotency-Keys vencidas'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='Chaves apagadas por lote (padrão: 1000)')
+
+    def handle(self, *args, **options):
+        total = delete_expired(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'{total} chaves vencidas apagadas'))
@@ -0,0 +1,13 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core_app.profiling import make_token
+
+
+class Command(BaseCommand):
+    help = 'Gera um token para perfilar uma requisição com o cabeçalho X-Profile'
+
+    def handle(self, *args, **options):
+        if not getattr(settings, 'PROFILING_ENABLED', False):
+            self.stderr.write(self.style.WARNING('PROFILING_ENABLED está desligado'))
+        self.stdout.write(make_token())
@@ -0,0 +1,71 @@
+import multiprocessing
+import signal
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from core_app.jobs import work
+
+
+def _thread(parar, burst):
+    try:
+        work(parar, burst=burst)
+    finally:
+        connections.close_all()
+
+
+def run_process(threads, burst):
+    """Executa ``threads`` workers neste processo até SIGTERM/SIGINT (ou a fila esvaziar, com ``burst``)"""
+    parar = threading.Event()
+    anteriores = {sinal: signal.signal(sinal, lambda *args: parar.set()) for sinal in (signal.SIGTERM, signal.SIGINT)}
+    try:
+        if threads == 1:
+            work(parar, burst=burst)
+            return
+        with ThreadPoolExecutor(max_workers=threads, thread_name_prefix='worker') as executor:
+            for futuro in [executor.submit(_thread, parar, burst) for _ in range(threads)]:
+                futuro.result()
+    finally:
+        for sinal, anterior in anteriores.items():
+            signal.signal(sinal, anterior)
+
+
+class Command(BaseCommand):
+    help = 'Executa as tarefas em segundo plano da fila do banco (core_app.jobs)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=getattr(settings, 'JOBS_PROCESSES', 1),
+                            help='Processos de workers (padrão: JOBS_PROCESSES)')
+        parser.add_argument('--threads', type=int, default=getattr(settings, 'JOBS_THREADS', 4),
+                            help='Threads por processo (padrão: JOBS_THREADS)')
+        parser.add_argument('--burst', action='store_true',
+                            help='Termina quando não houver mais tarefas disponíveis')
+
+    def handle(self, *args, **options):
+        processos, threads, burst = options['processes'], options['threads'], options['burst']
+        self.stdout.write(f'Workers: {processos} processo(s) x {threads} thread(s)')
+        if processos == 1:
+            run_process(threads, burst)
+            return
+
+        # Os processos filhos abrem suas próprias conexões
+        connections.close_all()
+        contexto = multiprocessing.get_context('fork')
+        filhos = [contexto.Process(target=run_process, args=(threads, burst)) for _ in range(processos)]
+        for filho in filhos:
+            filho.start()
+
+        def encerrar(*args):
+            for filho in filhos:
+                filho.terminate()
+
+        anteriores = {sinal: signal.signal(sinal, encerrar) for sinal in (signal.SIGTERM, signal.SIGINT)}
+        try:
+            for filho in filhos:
+                filho.join()
+        finally:
+            for sinal, anterior in anteriores.items():
+                signal.signal(sinal, anterior)
@@ -0,0 +1,50 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core_app.seeding import Progress, clear, seed_scale
+
+
+class Command(BaseCommand):
+    help = 'Gera produtos, carrinhos e itens sintéticos em volume de produção (reprodutível por semente)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--products', type=int, default=10_000, help='Produtos (padrão: 10000)')
+        parser.add_argument('--baskets', type=int, default=100_000, help='Carrinhos (padrão: 100000)')
+        parser.add_argument('--items', type=int, default=1_000_000, help='Itens no total (padrão: 1000000)')
+        parser.add_argument('--establishments', type=int, default=500, help='Estabelecimentos distintos (padrão: 500)')
+        parser.add_argument('--max-items-per-basket', type=int, help='Limite de itens por carrinho')
+        parser.add_argument('--days', type=int, default=365,
+                            help='Carrinhos criados ao longo dos últimos N dias (padrão: 365)')
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--chunk-size', type=int, default=5000, help='Linhas por bulk_create (padrão: 5000)')
+        parser.add_argument('--clear', action='store_true',
+                            help='Apaga produtos, carrinhos e itens existentes antes de gerar')
+
+    def handle(self, *args, **options):
+        if options['clear']:
+            clear()
+            self.stdout.write('Produtos, carrinhos e itens apagados')
+
+        inicio = time.perf_counter()
+        try:
+            contagem = seed_scale(
+                products=options['products'],
+                baskets=options['baskets'],
+                items=options['items'],
+                establishments=options['establishments'],
+                days=options['days'],
+                seed=options['seed'],
+                chunk_size=options['chunk_size'],
+                max_items_per_basket=options['max_items_per_basket'],
+                progress=Progress(self.stdout),
+            )
+        except ValueError as e:
+            raise CommandError(e)
+
+        decorrido = time.perf_counter() - inicio
+        total = sum(contagem.values())
+        resumo = ', '.join(f'{linhas:,} {model}' for model, linhas in contagem.items())
+        self.stdout.write(self.style.SUCCESS(
+            f'{resumo} em {decorrido:.1f} s ({total / max(decorrido, 1e-9):,.0f} linhas/s)'
+        ))
@@ -0,0 +1,46 @@
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core_app.slow_queries import read_log, report, slow_query_log
+
+
+class Command(BaseCommand):
+    help = 'Relatório das consultas lentas registradas, agrupadas por fingerprint'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--top', type=int, default=10, help='Quantidade de consultas no relatório')
+        parser.add_argument('--sort', choices=['total', 'count', 'mean', 'p95', 'max'], default='total',
+                            help='Critério de ordenação (padrão: tempo total)')
+        parser.add_argument('--file', help='Arquivo de registros (padrão: SLOW_QUERY_LOG)')
+        parser.add_argument('--clear', action='store_true', help='Apaga os registros após o relatório')
+
+    def handle(self, *args, **options):
+        arquivo = options['file'] or slow_query_log()
+        if not arquivo:
+            raise CommandError('Defina SLOW_QUERY_LOG ou informe --file')
+        registros = read_log(arquivo)
+        if not registros:
+            self.stdout.write(f'Nenhuma consulta lenta registrada em {arquivo}')
+            return
+
+        linhas = report(registros, top=options['top'], sort=options['sort'])
+        self.stdout.write(f'{len(registros)} registros, {len(linhas)} consultas mais custosas '
+                          f'(ordenadas por {options["sort"]})\n')
+        for posicao, linha in enumerate(linhas, 1):
+            self.stdout.write(self.style.MIGRATE_HEADING(
+                f"#{posicao} {linha['fingerprint']}  {linha['count']}x  total {linha['total_ms']:.1f} ms  "
+                f"média {linha['mean_ms']:.1f} ms  p95 {linha['p95_ms']:.1f} ms  máx {linha['max_ms']:.1f} ms"
+            ))
+            self.stdout.write(f"  {linha['query']}")
+            for origem, vezes in linha['call_sites'][:5]:
+                self.stdout.write(f'  origem: {origem} ({vezes}x)')
+            if linha['plan']:
+                self.stdout.write('  plano:')
+                for passo in linha['plan']:
+                    self.stdout.write(f'    {passo}')
+            self.stdout.write('')
+
+        if options['clear']:
+            os.remove(arquivo)
+            self.stdout.write(self.style.SUCCESS(f'{arquivo} apagado'))
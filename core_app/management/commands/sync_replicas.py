@@ -0,0 +1,33 @@
+import sqlite3
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+class Command(BaseCommand):
+    help = 'Copia o banco SQLite primário para as réplicas locais (DATABASE_REPLICA_URLS)'
+
+    def handle(self, *args, **options):
+        primario = connections[DEFAULT_DB_ALIAS].settings_dict
+        if primario['ENGINE'] != 'django.db.backends.sqlite3':
+            raise CommandError('Somente para SQLite; outros bancos usam a replicação nativa')
+        replicas = getattr(settings, 'DATABASE_REPLICAS', [])
+        if not replicas:
+            raise CommandError('Nenhuma réplica configurada (DATABASE_REPLICA_URLS)')
+
+        # API de backup do SQLite: cópia consistente mesmo com escritas em andamento
+        origem = sqlite3.connect(str(primario['NAME']))
+        try:
+            for alias in replicas:
+                caminho = urlsplit(str(connections[alias].settings_dict['NAME'])).path
+                connections[alias].close()
+                destino = sqlite3.connect(caminho)
+                try:
+                    origem.backup(destino)
+                finally:
+                    destino.close()
+                self.stdout.write(self.style.SUCCESS(f'{alias}: {caminho}'))
+        finally:
+            origem.close()
@@ -0,0 +1,131 @@
+"""
+Métricas no formato Prometheus, expostas em ``/metrics``.
+
+Requer ``prometheus_client`` (opcional: sem ele as funções de registro não
+fazem nada e ``/metrics`` responde 503). Com vários workers do gunicorn,
+defina ``PROMETHEUS_MULTIPROC_DIR`` (ver ``gunicorn.conf.py``) para que os
+valores de todos os processos sejam agregados na coleta.
+"""
+import os
+import time
+
+from django.conf import settings
+from django.http import HttpResponse
+
+try:
+    import prometheus_client
+    from prometheus_client import CollectorRegistry, Counter, Histogram, multiprocess
+    from prometheus_client.core import GaugeMetricFamily
+except ImportError:  # pragma: no cover - dependência opcional
+    prometheus_client = None
+
+# Latências das requisições, em segundos
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 25, 50, 100, 250)
+
+if prometheus_client is not None:
+    REQUEST_LATENCY = Histogram(
+        'comprasaux_request_duration_seconds', 'Tempo de resposta por view',
+        ['view', 'method', 'status'], buckets=LATENCY_BUCKETS,
+    )
+    REQUEST_QUERIES = Histogram(
+        'comprasaux_request_db_queries', 'Consultas ao banco por requisição',
+        ['view'], buckets=QUERY_BUCKETS,
+    )
+    OUTBOUND_LATENCY = Histogram(
+        'comprasaux_outbound_duration_seconds', 'Tempo das chamadas externas',
+        ['target'], buckets=LATENCY_BUCKETS,
+    )
+    OUTBOUND_ERRORS = Counter(
+        'comprasaux_outbound_errors_total', 'Chamadas externas com erro', ['target'],
+    )
+    CACHE_REQUESTS = Counter(
+        'comprasaux_cache_requests_total', 'Consultas aos caches da aplicação', ['cache', 'result'],
+    )
+    ADMISSION_REJECTED = Counter(
+        'comprasaux_admission_rejected_total', 'Requisições recusadas pelo controle de admissão',
+        ['cost_class', 'reason'],
+    )
+
+
+def observe_request(view, method, status, duration, queries):
+    if prometheus_client is not None:
+        REQUEST_LATENCY.labels(view, method, str(status)).observe(duration)
+        REQUEST_QUERIES.labels(view).observe(queries)
+
+
+def observe_outbound(target, duration, error=False):
+    if prometheus_client is not None:
+        OUTBOUND_LATENCY.labels(target).observe(duration)
+        if error:
+            OUTBOUND_ERRORS.labels(target).inc()
+
+
+def observe_cache(cache, hit):
+    if prometheus_client is not None:
+        CACHE_REQUESTS.labels(cache, 'hit' if hit else 'miss').inc()
+
+
+def observe_admission(cost_class, reason):
+    if prometheus_client is not None:
+        ADMISSION_REJECTED.labels(cost_class, reason).inc()
+
+
+_contagens = {'valores': None, 'ate': 0}
+
+
+def row_counts():
+    """
+    Linhas por modelo. ``COUNT(*)`` percorre a tabela inteira, então o
+    resultado é reaproveitado no processo por ``METRICS_ROW_COUNT_TTL``
+    segundos em vez de recalculado a cada coleta.
+    """
+    from basket_app.models import Basket, BasketItem
+    from items_app.models import Produto
+
+    agora = time.monotonic()
+    if _contagens['valores'] is None or agora >= _contagens['ate']:
+        _contagens['valores'] = {
+            model._meta.label_lower: model.objects.count() for model in (Produto, Basket, BasketItem)
+        }
+        _contagens['ate'] = agora + getattr(settings, 'METRICS_ROW_COUNT_TTL', 30)
+    return _contagens['valores']
+
+
+class RowCountCollector:
+    """Total de linhas das tabelas principais (ver ``row_counts``)"""
+
+    def collect(self):
+        gauge = GaugeMetricFamily('comprasaux_rows', 'Linhas por modelo', labels=['model'])
+        for label, total in row_counts().items():
+            gauge.add_metric([label], total)
+        yield gauge
+
+
+def registry():
+    """Registro da coleta: agregado entre processos quando configurado"""
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        registro = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registro)
+    else:
+        registro = CollectorRegistry()
+        registro.register(_ProcessCollectors())
+    registro.register(RowCountCollector())
+    return registro
+
+
+class _ProcessCollectors:
+    """Métricas do registro padrão do processo (modo de processo único)"""
+
+    def collect(self):
+        return prometheus_client.REGISTRY.collect()
+
+
+def metrics_view(request):
+    """Endpoint ``/metrics`` no formato de exposição do Prometheus"""
+    if prometheus_client is None:
+        return HttpResponse('prometheus_client não instalado\n', status=503, content_type='text/plain')
+    return HttpResponse(
+        prometheus_client.generate_latest(registry()),
+        content_type=prometheus_client.CONTENT_TYPE_LATEST,
+    )
@@ -0,0 +1,72 @@
+"""
+Middlewares compartilhados entre os módulos.
+"""
+import json
+import logging
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+from .instrumentation import collect_metrics
+from .metrics import observe_request
+
+logger = logging.getLogger('core_app.requests')
+
+
+class ServerTimingMiddleware:
+    """
+    Mede banco, chamadas externas, serialização e tempo total de cada
+    requisição.
+
+    Os tempos vão para o cabeçalho ``Server-Timing`` (aba de rede do
+    navegador) quando ``SERVER_TIMING_HEADER`` está ligado, e requisições
+    acima de ``REQUEST_LOG_THRESHOLD_MS`` geram um registro estruturado no
+    logger ``core_app.requests``. Latência e consultas também vão para as
+    métricas do Prometheus. Deve vir logo após o ``TracingMiddleware``, antes
+    dos demais, para que o tempo medido inclua todos eles.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with collect_metrics() as metrics, ExitStack() as stack:
+            for alias in connections:
+                stack.enter_context(connections[alias].execute_wrapper(metrics.db_wrapper))
+            response = self.get_response(request)
+            metrics.finish()
+
+        match = getattr(request, 'resolver_match', None)
+        view = match.view_name if match else 'desconhecida'
+        observe_request(view, request.method, response.status_code, metrics.total_time, metrics.db_queries)
+
+        if getattr(settings, 'SERVER_TIMING_HEADER', True):
+            response['Server-Timing'] = self.server_timing(metrics)
+
+        threshold = getattr(settings, 'REQUEST_LOG_THRESHOLD_MS', None)
+        if threshold is not None and metrics.total_time * 1000 >= threshold:
+            self.log(request, response, view, metrics)
+        return response
+
+    @staticmethod
+    def server_timing(metrics):
+        return ', '.join([
+            f'db;dur={metrics.db_time * 1000:.2f};desc="{metrics.db_queries} consultas"',
+            f'http;dur={metrics.outbound_time * 1000:.2f};'
+            f'desc="{metrics.outbound_calls} chamadas, {metrics.outbound_errors} com erro"',
+            f'ser;dur={metrics.serializer_time * 1000:.2f};desc="serialização"',
+            f'total;dur={metrics.total_time * 1000:.2f}',
+        ])
+
+    @staticmethod
+    def log(request, response, view, metrics):
+        registro = {
+            'method': request.method,
+            'path': request.path,
+            'view': view,
+            'status': response.status_code,
+            **metrics.as_dict(),
+        }
+        logger.warning('requisição lenta %s', json.dumps(registro, ensure_ascii=False),
+                       extra={'request_metrics': registro})
@@ -0,0 +1,31 @@
+# Generated by Django 6.1.2 on 2026-10-18 23:47
+
+import django.core.serializers.json
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IdempotencyKey',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('chave', models.CharField(max_length=255)),
+                ('escopo', models.CharField(help_text='Método e caminho da requisição', max_length=255)),
+                ('hash_requisicao', models.CharField(help_text='SHA-256 do corpo da requisição', max_length=64)),
+                ('status', models.PositiveSmallIntegerField(help_text='Vazio enquanto a requisição está em andamento', null=True)),
+                ('resposta', models.JSONField(encoder=django.core.serializers.json.DjangoJSONEncoder, null=True)),
+                ('location', models.CharField(blank=True, max_length=500)),
+                ('expira_em', models.DateTimeField(db_index=True)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('chave', 'escopo'), name='idempotency_key_unica')],
+            },
+        ),
+    ]
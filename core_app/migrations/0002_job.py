@@ -0,0 +1,35 @@
+# Generated by Django 6.1.2 on 2026-10-18 23:53
+
+import django.core.serializers.json
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core_app', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Job',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tarefa', models.CharField(help_text='Caminho da função registrada com @task', max_length=200)),
+                ('args', models.JSONField(default=list, encoder=django.core.serializers.json.DjangoJSONEncoder)),
+                ('kwargs', models.JSONField(default=dict, encoder=django.core.serializers.json.DjangoJSONEncoder)),
+                ('chave', models.CharField(blank=True, help_text='Deduplica tarefas pendentes', max_length=255, null=True)),
+                ('estado', models.CharField(choices=[('pendente', 'Pendente'), ('executando', 'Executando'), ('falhou', 'Falhou')], default='pendente', max_length=10)),
+                ('tentativas', models.PositiveSmallIntegerField(default=0)),
+                ('max_tentativas', models.PositiveSmallIntegerField(default=5)),
+                ('executar_em', models.DateTimeField(help_text='Não é executada antes deste momento')),
+                ('reservado_ate', models.DateTimeField(blank=True, help_text='Fim da reserva do worker atual', null=True)),
+                ('erro', models.TextField(blank=True)),
+                ('data_criacao', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['estado', 'executar_em'], name='job_fila')],
+                'constraints': [models.UniqueConstraint(condition=models.Q(('estado', 'pendente')), fields=('chave',), name='job_chave_pendente_unica')],
+            },
+        ),
+    ]
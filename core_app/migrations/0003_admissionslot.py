@@ -0,0 +1,25 @@
+# Generated by Django 6.1.2 on 2026-10-19 00:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core_app', '0002_job'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AdmissionSlot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('classe', models.CharField(max_length=50)),
+                ('vaga', models.PositiveSmallIntegerField()),
+                ('ocupada_ate', models.DateTimeField(blank=True, help_text='Vazio quando a vaga está livre', null=True)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('classe', 'vaga'), name='admission_slot_unica')],
+            },
+        ),
+    ]
@@ -0,0 +1,67 @@
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models
+
+
+class IdempotencyKey(models.Model):
+    """Primeira resposta de uma escrita enviada com ``Idempotency-Key`` (ver core_app.idempotency)"""
+    chave = models.CharField(max_length=255)
+    escopo = models.CharField(max_length=255, help_text="Método e caminho da requisição")
+    hash_requisicao = models.CharField(max_length=64, help_text="SHA-256 do corpo da requisição")
+    status = models.PositiveSmallIntegerField(null=True, help_text="Vazio enquanto a requisição está em andamento")
+    resposta = models.JSONField(null=True, encoder=DjangoJSONEncoder)
+    location = models.CharField(max_length=500, blank=True)
+    expira_em = models.DateTimeField(db_index=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['chave', 'escopo'], name='idempotency_key_unica'),
+        ]
+
+    def __str__(self):
+        return f"{self.escopo} - {self.chave}"
+
+
+class Job(models.Model):
+    """Tarefa em segundo plano (ver core_app.jobs)"""
+    PENDENTE = 'pendente'
+    EXECUTANDO = 'executando'
+    FALHOU = 'falhou'
+    ESTADOS = [(PENDENTE, 'Pendente'), (EXECUTANDO, 'Executando'), (FALHOU, 'Falhou')]
+
+    tarefa = models.CharField(max_length=200, help_text="Caminho da função registrada com @task")
+    args = models.JSONField(default=list, encoder=DjangoJSONEncoder)
+    kwargs = models.JSONField(default=dict, encoder=DjangoJSONEncoder)
+    chave = models.CharField(max_length=255, null=True, blank=True, help_text="Deduplica tarefas pendentes")
+    estado = models.CharField(max_length=10, choices=ESTADOS, default=PENDENTE)
+    tentativas = models.PositiveSmallIntegerField(default=0)
+    max_tentativas = models.PositiveSmallIntegerField(default=5)
+    executar_em = models.DateTimeField(help_text="Não é executada antes deste momento")
+    reservado_ate = models.DateTimeField(null=True, blank=True, help_text="Fim da reserva do worker atual")
+    erro = models.TextField(blank=True)
+    data_criacao = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [models.Index(fields=['estado', 'executar_em'], name='job_fila')]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['chave'], condition=models.Q(estado='pendente'), name='job_chave_pendente_unica',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.tarefa} ({self.estado})"
+
+
+class AdmissionSlot(models.Model):
+    """Vaga do teto de concorrência de uma classe de custo (ver core_app.admission)"""
+    classe = models.CharField(max_length=50)
+    vaga = models.PositiveSmallIntegerField()
+    ocupada_ate = models.DateTimeField(null=True, blank=True, help_text="Vazio quando a vaga está livre")
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['classe', 'vaga'], name='admission_slot_unica'),
+        ]
+
+    def __str__(self):
+        return f"{self.classe} #{self.vaga}"
@@ -0,0 +1,18 @@
+from rest_framework.negotiation import DefaultContentNegotiation
+
+
+def _disponiveis(classes):
+    return [item for item in classes if getattr(item, 'available', True)]
+
+
+class AvailableContentNegotiation(DefaultContentNegotiation):
+    """
+    Negociação de conteúdo que ignora renderers e parsers cuja dependência
+    opcional (ex.: msgpack) não está instalada.
+    """
+
+    def select_parser(self, request, parsers):
+        return super().select_parser(request, _disponiveis(parsers))
+
+    def select_renderer(self, request, renderers, format_suffix=None):
+        return super().select_renderer(request, _disponiveis(renderers), format_suffix)
@@ -0,0 +1,19 @@
+"""
+Paginação opcional das listagens da API.
+
+Sem ``?limit=`` a listagem continua vindo completa, como uma lista; com ele
+a resposta é ``{count, next, previous, results}`` (``?limit=100&offset=200``).
+As telas do ``front_app`` carregam as listagens assim, página a página, à
+medida que a tabela é rolada.
+"""
+from django.conf import settings
+from rest_framework import pagination
+
+
+class LimitOffsetPagination(pagination.LimitOffsetPagination):
+    """``LimitOffsetPagination`` ativada só pelo cliente, com teto de ``API_MAX_PAGE_SIZE``"""
+    default_limit = None
+
+    @property
+    def max_limit(self):
+        return getattr(settings, 'API_MAX_PAGE_SIZE', 500)
@@ -0,0 +1,109 @@
+"""
+Perfil (cProfile) sob demanda de uma única requisição.
+
+Com ``PROFILING_ENABLED`` ligado, uma requisição é perfilada quando traz o
+cabeçalho ``X-Profile`` com um token assinado (``manage.py profile_token``)
+ou, para usuários staff logados, ``?profile=1``. O resultado é gravado em
+``PROFILING_DIR`` (``.prof`` para ``snakeviz``/``flameprof`` e um resumo
+``.txt``) e listado em ``/admin/perfis/``. Desligado, o middleware é
+removido da cadeia na inicialização.
+"""
+import cProfile
+import io
+import os
+import pstats
+import re
+import time
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.core import signing
+from django.core.exceptions import MiddlewareNotUsed
+
+HEADER = 'HTTP_X_PROFILE'
+SALT = 'core_app.profiling'
+EXTENSIONS = ('.prof', '.txt')
+
+
+def profiling_dir():
+    return str(getattr(settings, 'PROFILING_DIR', settings.BASE_DIR / 'profiles'))
+
+
+def make_token():
+    """Token para o cabeçalho ``X-Profile``, válido por ``PROFILING_TOKEN_MAX_AGE``"""
+    return signing.TimestampSigner(salt=SALT).sign('profile')
+
+
+def valid_token(token):
+    max_age = getattr(settings, 'PROFILING_TOKEN_MAX_AGE', 3600)
+    try:
+        return signing.TimestampSigner(salt=SALT).unsign(token, max_age=max_age) == 'profile'
+    except signing.BadSignature:
+        return False
+
+
+def profile_files():
+    """Perfis gravados, do mais recente para o mais antigo"""
+    diretorio = profiling_dir()
+    if not os.path.isdir(diretorio):
+        return []
+    arquivos = []
+    for nome in os.listdir(diretorio):
+        caminho = os.path.join(diretorio, nome)
+        if nome.endswith(EXTENSIONS) and os.path.isfile(caminho):
+            stat = os.stat(caminho)
+            modificado = datetime.fromtimestamp(stat.st_mtime, tz=timezone.utc)
+            arquivos.append({'nome': nome, 'tamanho': stat.st_size, 'modificado': modificado})
+    return sorted(arquivos, key=lambda arquivo: arquivo['modificado'], reverse=True)
+
+
+def profile_path(nome):
+    """Caminho de um perfil listado, ou ``None`` (evita acesso fora do diretório)"""
+    if nome != os.path.basename(nome) or not nome.endswith(EXTENSIONS):
+        return None
+    caminho = os.path.join(profiling_dir(), nome)
+    return caminho if os.path.isfile(caminho) else None
+
+
+class ProfilingMiddleware:
+    """
+    Perfila a requisição quando solicitado. Deve vir depois do
+    ``AuthenticationMiddleware``.
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'PROFILING_ENABLED', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not self.requested(request):
+            return self.get_response(request)
+
+        profiler = cProfile.Profile()
+        response = profiler.runcall(self.get_response, request)
+        response['X-Profile-File'] = self.save(request, profiler)
+        return response
+
+    @staticmethod
+    def requested(request):
+        token = request.META.get(HEADER)
+        if token:
+            return valid_token(token)
+        user = getattr(request, 'user', None)
+        return request.GET.get('profile') == '1' and user is not None and user.is_staff
+
+    @staticmethod
+    def save(request, profiler):
+        diretorio = profiling_dir()
+        os.makedirs(diretorio, exist_ok=True)
+        caminho = re.sub(r'[^A-Za-z0-9]+', '-', request.path).strip('-') or 'raiz'
+        base = f"{time.strftime('%Y%m%d-%H%M%S')}-{int(time.time() * 1000) % 1000:03d}-{request.method}-{caminho}"
+
+        profiler.dump_stats(os.path.join(diretorio, f'{base}.prof'))
+        resumo = io.StringIO()
+        resumo.write(f'{request.method} {request.get_full_path()}\n\n')
+        pstats.Stats(profiler, stream=resumo).sort_stats('cumulative').print_stats(60)
+        with open(os.path.join(diretorio, f'{base}.txt'), 'w', encoding='utf-8') as arquivo:
+            arquivo.write(resumo.getvalue())
+        return f'{base}.prof'
@@ -0,0 +1,89 @@
+"""
+Purga do cache do proxy reverso após escritas.
+
+Ao final de cada escrita (sinal ``versions_bumped``) as URLs canônicas dos
+recursos afetados (``produto:<id>``, ``basket:<id>``) são renovadas no proxy
+configurado em ``PROXY_PURGE_URL``. As listagens e o resumo geral não são
+renovados: recalculá-los a cada escrita custaria mais que servi-los, e eles
+expiram pelo ``s-maxage`` do escopo (``PROXY_CACHE_TIMEOUTS``).
+Com o ``nginx.conf`` do projeto a renovação é um GET com o cabeçalho
+``X-Cache-Refresh``, que ignora a entrada atual e grava a nova resposta; para
+proxies com suporte a PURGE (Varnish, ngx_cache_purge), use
+``PROXY_PURGE_METHOD = 'PURGE'``. O cabeçalho ``Surrogate-Key`` é enviado em
+todas as requisições para proxies que purgam por chave.
+
+Com ``JOBS_ENABLED`` a purga vai para a fila de tarefas (ver core_app.jobs),
+deduplicada pelos namespaces; senão, é feita numa thread do próprio processo.
+
+Variantes com query string (``?fields=``, ``?format=``...) não são renovadas
+e expiram pelo ``s-maxage`` do escopo; páginas e buscas (``?limit=``,
+``?search=``) nem chegam a ser guardadas no proxy (ver
+``core_app.http_cache.UNSHARED_PARAMS``).
+"""
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from django.conf import settings
+from django.urls import reverse
+
+from .http_cache import surrogate_key
+from .jobs import enqueue, task
+from .versioning import BASKETS, CATALOG
+
+logger = logging.getLogger(__name__)
+
+# Formatos renovados por padrão; cada um é uma entrada diferente no proxy e
+# custa uma requisição a mais (inclua application/msgpack em PROXY_PURGE_ACCEPTS)
+DEFAULT_ACCEPTS = ('application/json',)
+
+_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='purge-proxy')
+
+
+def purge_paths(namespaces):
+    """URLs canônicas dos recursos de ``namespaces``; chaves globais não geram URLs"""
+    paths = []
+    for namespace in namespaces:
+        tipo, _, ident = namespace.partition(':')
+        if tipo == 'produto':
+            paths.append(reverse('produto-detail', args=[ident]))
+        elif tipo == 'basket':
+            paths += [
+                reverse('basketlist-detail', args=[ident]),
+                reverse('basket-summary-specific', args=[ident]),
+            ]
+    return list(dict.fromkeys(paths))
+
+
+@task
+def purge(namespaces):
+    """Renova no proxy as URLs de ``namespaces``; falhas são apenas registradas"""
+    base_url = getattr(settings, 'PROXY_PURGE_URL', None)
+    if not base_url:
+        return
+
+    method = getattr(settings, 'PROXY_PURGE_METHOD', 'GET')
+    accepts = getattr(settings, 'PROXY_PURGE_ACCEPTS', DEFAULT_ACCEPTS)
+    keys = ' '.join(surrogate_key(namespace) for namespace in namespaces)
+
+    for path in purge_paths(namespaces):
+        for accept in accepts:
+            try:
+                requests.request(
+                    method,
+                    f"{base_url.rstrip('/')}{path}",
+                    headers={'Accept': accept, 'X-Cache-Refresh': '1', 'Surrogate-Key': keys},
+                    timeout=getattr(settings, 'PROXY_PURGE_TIMEOUT', 2),
+                )
+            except requests.RequestException as e:
+                logger.warning('Falha ao purgar %s no proxy: %s', path, e)
+
+
+def purge_on_write(sender, namespaces, **kwargs):
+    """Receiver de ``versions_bumped``: purga fora do ciclo da requisição"""
+    if not getattr(settings, 'PROXY_PURGE_URL', None) or not purge_paths(namespaces):
+        return
+    if getattr(settings, 'JOBS_ENABLED', False):
+        enqueue(purge, list(namespaces), key=f"purge:{' '.join(sorted(namespaces))}")
+    else:
+        _executor.submit(purge, namespaces)
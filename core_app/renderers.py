@@ -0,0 +1,122 @@
+"""
+Renderers de alto desempenho para a API.
+
+``FastJSONRenderer`` usa orjson quando instalado e produz a mesma saída do
+``JSONRenderer`` do DRF: datas em ISO 8601 com ``Z`` para UTC, ``Decimal``
+como número e JSON compacto em UTF-8. ``MessagePackRenderer`` entrega o
+mesmo conteúdo em MessagePack via negociação de conteúdo
+(``Accept: application/msgpack``). ``ColumnarRenderer`` entrega listagens
+em formato colunar (``?format=columnar``).
+"""
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - dependência opcional
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - dependência opcional
+    msgpack = None
+
+_drf_encoder = JSONEncoder()
+
+# Mesmas conversões do JSONEncoder do DRF para tipos não nativos
+# (Decimal, datetime, Promise, QuerySet...), garantindo saída idêntica.
+encode_default = _drf_encoder.default
+
+ORJSON_OPTIONS = (orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS) if orjson else 0
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    JSONRenderer baseado em orjson.
+
+    Sem orjson instalado, ou quando a resposta pede indentação (ex.: API
+    navegável), delega para o JSONRenderer padrão do DRF.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None or not self.compact or self.ensure_ascii:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        if data is None:
+            return b''
+
+        if self.get_indent(accepted_media_type, renderer_context or {}) is not None:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        ret = orjson.dumps(data, default=encode_default, option=ORJSON_OPTIONS)
+
+        # Assim como o DRF, escapa U+2028 e U+2029 para manter a saída
+        # compatível com JavaScript
+        if b'\xe2\x80' in ret:
+            ret = ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+        return ret
+
+
+class MessagePackRenderer(BaseRenderer):
+    """
+    Renderer MessagePack, selecionado com ``Accept: application/msgpack``
+    ou ``?format=msgpack``.
+    """
+    media_type = 'application/msgpack'
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+    available = msgpack is not None
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return msgpack.packb(data, default=encode_default, use_bin_type=True)
+
+
+class ColumnarData(dict):
+    """
+    Listagem já em formato colunar: ``{"fields": [...], "columns": [[...], ...]}``,
+    com uma lista de valores por campo, na ordem de ``fields``.
+    """
+
+    @classmethod
+    def from_rows(cls, rows, fields=None):
+        """``fields`` vem da primeira linha, se não for informado"""
+        if fields is None:
+            fields = list(rows[0]) if rows else []
+        return cls(fields=fields, columns=[[row.get(nome) for row in rows] for nome in fields], count=len(rows))
+
+
+def serializer_fields(renderer_context):
+    """Campos de saída do serializer da view, para o cabeçalho de listagens vazias"""
+    view = (renderer_context or {}).get('view')
+    if view is None or not hasattr(view, 'get_serializer'):
+        return None
+    return [nome for nome, campo in view.get_serializer().fields.items() if not campo.write_only]
+
+
+class ColumnarRenderer(FastJSONRenderer):
+    """
+    Formato colunar opcional para listagens grandes (``?format=columnar``).
+
+    As chaves aparecem uma única vez no cabeçalho ``fields`` em vez de se
+    repetirem em cada linha. Listagens montadas pelas viewsets já chegam como
+    ``ColumnarData``; listas de dicionários são convertidas aqui (vazias, com
+    os campos do serializer da view) e demais respostas (detalhes, erros) são
+    entregues como JSON comum.
+    """
+    media_type = 'application/vnd.comprasaux.columnar+json'
+    format = 'columnar'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if isinstance(data, list) and all(isinstance(row, dict) for row in data):
+            data = ColumnarData.from_rows(data, None if data else serializer_fields(renderer_context))
+        elif isinstance(data, dict) and isinstance(data.get('results'), list) \
+                and not isinstance(data['results'], ColumnarData):
+            results = data['results']
+            data = {
+                **data,
+                'results': ColumnarData.from_rows(results, None if results else serializer_fields(renderer_context)),
+            }
+        return super().render(data, accepted_media_type, renderer_context)
@@ -0,0 +1,194 @@
+"""
+Leituras em réplicas do banco, com leitura das próprias escritas no primário.
+
+Na primeira leitura de cada requisição GET/HEAD (ver ``ReplicaMiddleware``)
+é sorteada uma réplica disponível de ``DATABASE_REPLICAS``; o
+``ReplicaRouter`` envia para ela as
+leituras da requisição (viewsets, ``basket_summary``, páginas) e mantém no
+primário:
+
+- as escritas e tudo o que vem depois delas na mesma requisição;
+- leituras dentro de ``transaction.atomic``;
+- requisições que não são GET/HEAD;
+- por ``REPLICA_STICKY_SECONDS`` após uma escrita, as requisições do mesmo
+  cliente (cookie ``REPLICA_STICKY_COOKIE``), para que ele veja o que acabou
+  de gravar mesmo com atraso na replicação;
+- as renovações do cache do proxy (``X-Cache-Refresh``, ver core_app.purge);
+- tudo fora de requisições (comandos, workers).
+
+Uma réplica que não conecta fica fora da escolha por
+``REPLICA_RETRY_SECONDS`` e a requisição usa o primário.
+
+Respostas calculadas numa réplica atrasada logo após uma escrita poderiam
+ficar no cache sob a versão nova; por isso as versões escritas são
+incrementadas de novo ao fim da janela de atraso.
+"""
+import logging
+import random
+import threading
+import time
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections, transaction
+from django.db.utils import ConnectionDoesNotExist
+
+from .versioning import bump_version, versions_bumped
+
+logger = logging.getLogger(__name__)
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+_roteamento = ContextVar('roteamento_replica', default=None)
+_indisponiveis = {}
+_lock = threading.Lock()
+
+
+def replicas():
+    return list(getattr(settings, 'DATABASE_REPLICAS', []))
+
+
+def sticky_seconds():
+    return getattr(settings, 'REPLICA_STICKY_SECONDS', 5)
+
+
+class _Roteamento:
+    """
+    Decisão de uma requisição: se usa o primário, se já escreveu e a réplica
+    escolhida (na primeira leitura; ``None`` se nenhuma estiver disponível)
+    """
+
+    def __init__(self, primario):
+        self.primario = primario
+        self.escreveu = False
+        self._replica = ...
+
+    @property
+    def replica(self):
+        if self._replica is ...:
+            self._replica = choose_replica()
+        return self._replica
+
+
+def _disponivel(alias):
+    agora = time.monotonic()
+    if _indisponiveis.get(alias, 0) > agora:
+        return False
+    try:
+        connections[alias].ensure_connection()
+    except (DatabaseError, ConnectionDoesNotExist) as e:
+        _indisponiveis[alias] = agora + getattr(settings, 'REPLICA_RETRY_SECONDS', 30)
+        logger.warning('Réplica %s indisponível, usando o primário: %s', alias, e)
+        return False
+    _indisponiveis.pop(alias, None)
+    return True
+
+
+def choose_replica():
+    """Réplica disponível sorteada, ou ``None`` para usar o primário"""
+    candidatas = replicas()
+    random.shuffle(candidatas)
+    return next((alias for alias in candidatas if _disponivel(alias)), None)
+
+
+class ReplicaRouter:
+    """Router de banco: leituras da requisição na réplica escolhida, o resto no primário"""
+
+    def db_for_read(self, model, **hints):
+        roteamento = _roteamento.get()
+        if roteamento is None:
+            return None
+        if roteamento.primario or roteamento.escreveu:
+            return DEFAULT_DB_ALIAS
+        if transaction.get_connection(DEFAULT_DB_ALIAS).in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        return roteamento.replica or DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        roteamento = _roteamento.get()
+        if roteamento is not None:
+            roteamento.escreveu = True
+        instance = hints.get('instance')
+        # Objetos de outro banco (ex.: .using() do benchmark sqlite_writes)
+        # continuam nele; os lidos de uma réplica são gravados no primário
+        if instance is not None and instance._state.db and instance._state.db not in replicas():
+            return instance._state.db
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        bancos = {DEFAULT_DB_ALIAS, *replicas()}
+        if obj1._state.db in bancos and obj2._state.db in bancos:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # As réplicas recebem o esquema pela replicação
+        return False if db in replicas() else None
+
+
+class ReplicaMiddleware:
+    """
+    Define o banco das leituras de cada requisição. Deve vir antes de
+    qualquer middleware que acesse o banco (sessões, autenticação).
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not replicas():
+            return self.get_response(request)
+
+        cookie = getattr(settings, 'REPLICA_STICKY_COOKIE', 'usar_primario')
+        primario = (
+            request.method not in SAFE_METHODS
+            or cookie in request.COOKIES
+            or 'HTTP_X_CACHE_REFRESH' in request.META
+        )
+        roteamento = _Roteamento(primario)
+        token = _roteamento.set(roteamento)
+        try:
+            response = self.get_response(request)
+        finally:
+            _roteamento.reset(token)
+
+        if roteamento.escreveu:
+            response.set_cookie(cookie, '1', max_age=sticky_seconds(), httponly=True, samesite='Lax')
+        return response
+
+
+class _Renovacao:
+    """Incrementa de novo, ao fim da janela de atraso, as versões escritas"""
+
+    def __init__(self):
+        self.pendentes = set()
+        self.timer = None
+
+    def agendar(self, namespaces):
+        with _lock:
+            self.pendentes.update(namespaces)
+            if self.timer is None:
+                self.timer = threading.Timer(sticky_seconds(), self.executar)
+                self.timer.daemon = True
+                self.timer.start()
+
+    def executar(self):
+        with _lock:
+            namespaces, self.pendentes, self.timer = tuple(self.pendentes), set(), None
+        try:
+            for namespace in namespaces:
+                bump_version(namespace)
+            versions_bumped.send(sender=ReplicaRouter, namespaces=namespaces)
+        finally:
+            # Os receptores podem acessar o banco (ex.: enfileirar tarefas)
+            # nesta thread, que não passa pelo fim de uma requisição
+            connections.close_all()
+
+
+_renovacao = _Renovacao()
+
+
+def rebump_after_replica_lag(sender, namespaces, **kwargs):
+    """Receptor de ``versions_bumped``"""
+    if replicas() and sender is not ReplicaRouter:
+        _renovacao.agendar(namespaces)
@@ -0,0 +1,333 @@
+"""
+Dados sintéticos em escala para testar índices, paginação e agregações.
+
+``seed_scale`` gera produtos com nomes e preços realistas (mercearia
+brasileira, preços com distribuição log-normal e finais ,49/,99),
+estabelecimentos de várias redes e bairros com popularidade desigual,
+carrinhos com tamanhos assimétricos (a maioria pequena, poucos com centenas
+de itens) e itens que preferem os produtos mais populares. Tudo vem de um
+``random.Random(seed)``: a mesma semente gera os mesmos dados.
+
+As linhas são geradas sob demanda e gravadas em lotes de ``chunk_size``,
+cada um na sua transação, sem sinais por linha: produtos e carrinhos com
+``bulk_create`` (que devolve os ids) e os itens, a maior tabela, com
+``executemany`` de tuplas. As versões de cache são incrementadas uma única
+vez no final.
+"""
+import math
+import random
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from itertools import accumulate, islice
+
+from django.db import connection, transaction
+
+from .versioning import BASKETS, CATALOG, bump_versions
+
+# Nome base -> (categoria, preço típico em R$, apresentações com multiplicador de preço)
+PRODUTOS = {
+    'Arroz branco tipo 1': ('mercearia', 6.5, [('1 kg', 1), ('2 kg', 1.9), ('5 kg', 4.4)]),
+    'Arroz integral': ('mercearia', 8.9, [('1 kg', 1), ('5 kg', 4.5)]),
+    'Feijão carioca': ('mercearia', 8.2, [('500 g', 0.55), ('1 kg', 1)]),
+    'Feijão preto': ('mercearia', 8.9, [('500 g', 0.55), ('1 kg', 1)]),
+    'Açúcar refinado': ('mercearia', 4.9, [('1 kg', 1), ('2 kg', 1.9), ('5 kg', 4.5)]),
+    'Café torrado e moído': ('mercearia', 17.9, [('250 g', 0.5), ('500 g', 1)]),
+    'Leite integral UHT': ('laticinios', 5.2, [('1 L', 1), ('caixa 12 x 1 L', 11.5)]),
+    'Leite em pó': ('laticinios', 21.9, [('400 g', 1), ('800 g', 1.9)]),
+    'Óleo de soja': ('mercearia', 7.4, [('900 ml', 1)]),
+    'Azeite extravirgem': ('mercearia', 38.9, [('500 ml', 1), ('250 ml', 0.55)]),
+    'Macarrão espaguete': ('mercearia', 4.3, [('500 g', 1), ('1 kg', 1.9)]),
+    'Molho de tomate': ('mercearia', 2.9, [('340 g', 1), ('520 g', 1.4)]),
+    'Farinha de trigo': ('mercearia', 5.6, [('1 kg', 1), ('5 kg', 4.6)]),
+    'Farinha de mandioca': ('mercearia', 7.9, [('500 g', 0.6), ('1 kg', 1)]),
+    'Sal refinado': ('mercearia', 2.5, [('1 kg', 1)]),
+    'Biscoito cream cracker': ('mercearia', 4.6, [('200 g', 0.6), ('400 g', 1)]),
+    'Pão de forma': ('mercearia', 8.9, [('400 g', 0.8), ('500 g', 1)]),
+    'Manteiga com sal': ('laticinios', 14.9, [('200 g', 1), ('500 g', 2.3)]),
+    'Margarina': ('laticinios', 7.9, [('250 g', 0.6), ('500 g', 1)]),
+    'Queijo muçarela': ('laticinios', 44.9, [('kg', 1), ('fatiado 150 g', 0.2)]),
+    'Presunto cozido': ('carnes', 34.9, [('kg', 1), ('fatiado 200 g', 0.23)]),
+    'Iogurte natural': ('laticinios', 3.9, [('170 g', 1), ('bandeja 6 x 170 g', 5.4)]),
+    'Ovos brancos': ('hortifruti', 12.9, [('dúzia', 1), ('bandeja 30 un', 2.4)]),
+    'Peito de frango': ('carnes', 19.9, [('kg', 1)]),
+    'Carne moída': ('carnes', 36.9, [('kg', 1), ('500 g', 0.52)]),
+    'Linguiça toscana': ('carnes', 24.9, [('kg', 1)]),
+    'Banana prata': ('hortifruti', 6.9, [('kg', 1)]),
+    'Maçã gala': ('hortifruti', 9.9, [('kg', 1)]),
+    'Tomate italiano': ('hortifruti', 8.5, [('kg', 1)]),
+    'Cebola': ('hortifruti', 5.9, [('kg', 1)]),
+    'Batata inglesa': ('hortifruti', 6.4, [('kg', 1)]),
+    'Alface crespa': ('hortifruti', 3.5, [('un', 1)]),
+    'Refrigerante de cola': ('bebidas', 9.5, [('2 L', 1), ('lata 350 ml', 0.45), ('fardo 6 x 2 L', 5.6)]),
+    'Suco de laranja integral': ('bebidas', 12.9, [('1 L', 1)]),
+    'Água mineral sem gás': ('bebidas', 2.5, [('1,5 L', 1), ('fardo 6 x 1,5 L', 5.4)]),
+    'Cerveja pilsen': ('bebidas', 3.9, [('lata 350 ml', 1), ('fardo 12 latas', 11)]),
+    'Chocolate ao leite': ('mercearia', 6.9, [('90 g', 1), ('170 g', 1.8)]),
+    'Papel higiênico folha dupla': ('limpeza', 19.9, [('12 rolos', 1), ('24 rolos', 1.9)]),
+    'Detergente líquido': ('limpeza', 2.6, [('500 ml', 1)]),
+    'Sabão em pó': ('limpeza', 18.9, [('800 g', 1), ('1,6 kg', 1.9)]),
+    'Amaciante concentrado': ('limpeza', 16.9, [('500 ml', 1), ('1 L', 1.8)]),
+    'Desinfetante': ('limpeza', 7.9, [('2 L', 1)]),
+    'Sabonete': ('higiene', 2.9, [('85 g', 1), ('pacote 6 un', 5.2)]),
+    'Creme dental': ('higiene', 5.9, [('90 g', 1), ('pacote 3 un', 2.6)]),
+    'Shampoo': ('higiene', 17.9, [('350 ml', 1), ('650 ml', 1.7)]),
+    'Ração para cães': ('pet', 39.9, [('3 kg', 1), ('15 kg', 4.3)]),
+}
+# Marcas por categoria; hortifrúti e açougue nem sempre têm marca
+MARCAS = {
+    'mercearia': ['Tio João', 'Camil', 'Kicaldo', 'Prato Fino', 'União', 'Caravelas', 'Pilão',
+                  'Três Corações', 'Melitta', 'Liza', 'Soya', 'Gallo', 'Renata', 'Adria', 'Barilla',
+                  'Pomarola', 'Quero', 'Dona Benta', 'Yoki', 'Vitarella', 'Pullman', 'Cisne', 'Lacta',
+                  'Garoto', 'Nestlé', 'Marca Própria'],
+    'laticinios': ['Italac', 'Piracanjuba', 'Ninho', 'Aviação', 'Qualy', 'Tirolez', 'Danone',
+                   'Nestlé', 'Marca Própria'],
+    'carnes': ['Sadia', 'Perdigão', 'Seara', 'Friboi', 'Aurora', 'Açougue', 'Marca Própria'],
+    'hortifruti': ['', '', 'Orgânico', 'Mantiqueira', 'Marca Própria'],
+    'bebidas': ['Coca-Cola', 'Pepsi', 'Del Valle', 'Crystal', 'Minalba', 'Brahma', 'Skol', 'Marca Própria'],
+    'limpeza': ['Ypê', 'Omo', 'Comfort', 'Pinho Sol', 'Neve', 'Personal', 'Marca Própria'],
+    'higiene': ['Lux', 'Dove', 'Colgate', 'Sorriso', 'Seda', 'Pantene', 'Marca Própria'],
+    'pet': ['Pedigree', 'Golden', 'Premier', 'Marca Própria'],
+}
+REDES = [
+    'Carrefour', 'Pão de Açúcar', 'Extra', 'Assaí Atacadista', 'Atacadão', 'Dia', 'Sonda',
+    'Mambo', 'Hirota', 'Oba Hortifruti', 'Sam\'s Club', 'Tenda Atacado', 'Savegnago',
+    'Condor', 'Angeloni', 'Zaffari', 'Bretas', 'Guanabara', 'Prezunic', 'Mundial',
+    'Supermercado Bom Preço', 'Mercadinho São José', 'Sacolão da Vila', 'Feira Livre',
+]
+BAIRROS = [
+    'Centro', 'Pinheiros', 'Moema', 'Tatuapé', 'Santana', 'Lapa', 'Mooca', 'Vila Mariana',
+    'Butantã', 'Ipiranga', 'Perdizes', 'Jabaquara', 'Copacabana', 'Tijuca', 'Botafogo',
+    'Barra', 'Savassi', 'Pampulha', 'Boa Viagem', 'Batel', 'Moinhos de Vento', 'Asa Norte',
+    'Asa Sul', 'Aldeota', 'Campinas', 'Santo André', 'Guarulhos', 'Osasco', 'Niterói',
+]
+NOMES_CARRINHO = [
+    'Compras do mês', 'Compra da semana', 'Feira', 'Churrasco de domingo', 'Reposição',
+    'Café da manhã', 'Limpeza', 'Festa de aniversário', 'Lanche das crianças', 'Jantar',
+    'Hortifrúti', 'Higiene', 'Pet', 'Viagem', 'Emergência', 'Ceia de Natal', 'Marmitas',
+]
+# Quantidade -> peso
+QUANTIDADES = {1: 50, 2: 22, 3: 10, 4: 6, 5: 4, 6: 4, 10: 2, 12: 2}
+
+
+def _lotes(iteravel, tamanho):
+    iterador = iter(iteravel)
+    while lote := list(islice(iterador, tamanho)):
+        yield lote
+
+
+def _zipf(n, s=1.0):
+    """Pesos cumulativos de popularidade ~ 1/rank^s"""
+    return list(accumulate(1 / (rank ** s) for rank in range(1, n + 1)))
+
+
+def preco(rng, tipico):
+    """Preço com distribuição log-normal em torno do típico, terminado em ,x9"""
+    valor = max(0.99, tipico * rng.lognormvariate(0, 0.25))
+    return Decimal(math.floor(valor * 10) / 10 + 0.09).quantize(Decimal('0.01'))
+
+
+def produtos(rng, quantidade):
+    """``(nome, preço)`` de ``quantidade`` produtos"""
+    bases = list(PRODUTOS.items())
+    for _ in range(quantidade):
+        base, (categoria, tipico, apresentacoes) = rng.choice(bases)
+        apresentacao, fator = rng.choice(apresentacoes)
+        nome = ' '.join(filter(None, [base, rng.choice(MARCAS[categoria]), apresentacao]))
+        yield nome, preco(rng, tipico * fator)
+
+
+def estabelecimentos(rng, quantidade):
+    """Nomes de estabelecimentos distintos (rede + bairro, numerados se preciso)"""
+    nomes = [f'{rede} {bairro}' for rede in REDES for bairro in BAIRROS]
+    rng.shuffle(nomes)
+    return [
+        nomes[i % len(nomes)] + (f' {i // len(nomes) + 1}' if i >= len(nomes) else '')
+        for i in range(quantidade)
+    ]
+
+
+def tamanhos(rng, carrinhos, itens, maximo=None):
+    """
+    Itens por carrinho somando ``itens``, com distribuição log-normal: a
+    maioria dos carrinhos é pequena e poucos concentram centenas de itens.
+    """
+    pesos = [rng.lognormvariate(0, 1.0) for _ in range(carrinhos)]
+    escala = itens / sum(pesos) if pesos else 0
+    resultado = [int(peso * escala) for peso in pesos]
+    if maximo:
+        resultado = [min(tamanho, maximo) for tamanho in resultado]
+    acumulados = list(accumulate(pesos))
+    faltam = itens - sum(resultado)
+    while faltam > 0 and resultado and (maximo is None or any(tamanho < maximo for tamanho in resultado)):
+        for indice in rng.choices(range(carrinhos), cum_weights=acumulados, k=faltam):
+            if faltam and (maximo is None or resultado[indice] < maximo):
+                resultado[indice] += 1
+                faltam -= 1
+    return resultado
+
+
+@contextmanager
+def datas_manuais(*models):
+    """Desliga ``auto_now``/``auto_now_add`` para gravar datas espalhadas no tempo"""
+    campos = [
+        (campo, campo.auto_now, campo.auto_now_add)
+        for model in models for campo in model._meta.concrete_fields
+        if getattr(campo, 'auto_now', False) or getattr(campo, 'auto_now_add', False)
+    ]
+    for campo, _, _ in campos:
+        campo.auto_now = campo.auto_now_add = False
+    try:
+        yield
+    finally:
+        for campo, auto_now, auto_now_add in campos:
+            campo.auto_now, campo.auto_now_add = auto_now, auto_now_add
+
+
+@contextmanager
+def _sqlite_rapido():
+    """No SQLite, desliga o fsync por commit durante a carga (fora de transação)"""
+    if connection.vendor != 'sqlite' or connection.in_atomic_block:
+        yield
+        return
+    with connection.cursor() as cursor:
+        cursor.execute('PRAGMA synchronous')
+        anterior = cursor.fetchone()[0]
+        cursor.execute('PRAGMA synchronous = OFF')
+    try:
+        yield
+    finally:
+        with connection.cursor() as cursor:
+            cursor.execute(f'PRAGMA synchronous = {int(anterior)}')
+
+
+def _inserir(model, objetos, chunk_size, progresso, retornar_ids=False):
+    ids = []
+    for lote in _lotes(objetos, chunk_size):
+        with transaction.atomic():
+            criados = model.objects.bulk_create(lote)
+        if retornar_ids:
+            ids.extend(objeto.pk for objeto in criados)
+        progresso(model, len(lote))
+    return ids
+
+
+def _inserir_linhas(model, campos, linhas, chunk_size, progresso):
+    """
+    ``executemany`` de tuplas já adaptadas ao banco, em lotes: sem instanciar
+    modelos nem compilar um INSERT por lote como o ``bulk_create``, cerca de
+    3x mais rápido para as tabelas de milhões de linhas.
+    """
+    quote = connection.ops.quote_name
+    colunas = [model._meta.get_field(campo).column for campo in campos]
+    sql = 'INSERT INTO {} ({}) VALUES ({})'.format(
+        quote(model._meta.db_table), ', '.join(map(quote, colunas)), ', '.join(['%s'] * len(colunas)),
+    )
+    for lote in _lotes(linhas, chunk_size):
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.executemany(sql, lote)
+        progresso(model, len(lote))
+
+
+def clear():
+    """Apaga produtos, carrinhos e itens sem carregar as linhas nem enviar sinais"""
+    from basket_app.models import Basket, BasketItem
+    from items_app.models import Produto
+
+    for model in (BasketItem, Basket, Produto):
+        queryset = model.objects.all()
+        queryset._raw_delete(queryset.db)
+    bump_versions(CATALOG, BASKETS)
+
+
+def seed_scale(products, baskets, items, establishments=500, days=365, seed=42,
+               chunk_size=5000, max_items_per_basket=None, progress=None):
+    """
+    Gera os dados e retorna a contagem de linhas criadas por modelo.
+
+    Com ``products=0`` os itens usam os produtos já existentes.
+    """
+    from basket_app.models import Basket, BasketItem
+    from items_app.models import Produto
+
+    rng = random.Random(seed)
+    contagem = {}
+
+    def progresso(model, linhas):
+        contagem[model.__name__] = contagem.get(model.__name__, 0) + linhas
+        if progress:
+            progress(model.__name__, contagem[model.__name__])
+
+    agora = datetime.now(timezone.utc)
+    with _sqlite_rapido(), datas_manuais(Basket, BasketItem):
+        produto_ids = _inserir(
+            Produto, (Produto(nome=nome, preco=valor) for nome, valor in produtos(rng, products)),
+            chunk_size, progresso, retornar_ids=True,
+        ) or list(Produto.objects.order_by('pk').values_list('pk', flat=True))
+        if items and not produto_ids:
+            raise ValueError('Não há produtos para os itens')
+
+        # Ranking de popularidade independente da ordem de criação; os
+        # sorteios usam posições, não ids, para não depender do banco
+        populares = list(range(len(produto_ids)))
+        rng.shuffle(populares)
+        popularidade = _zipf(len(populares))
+
+        lojas = estabelecimentos(rng, establishments)
+        frequencia_lojas = _zipf(len(lojas), s=0.8)
+        datas = sorted(agora - timedelta(seconds=rng.uniform(0, days * 86400)) for _ in range(baskets))
+
+        def carrinhos():
+            for data in datas:
+                yield Basket(
+                    nome=rng.choice(NOMES_CARRINHO),
+                    estabelecimento=rng.choices(lojas, cum_weights=frequencia_lojas)[0],
+                    data_criacao=data,
+                    data_atualizacao=min(agora, data + timedelta(hours=rng.expovariate(1 / 12))),
+                )
+
+        basket_ids = _inserir(Basket, carrinhos(), chunk_size, progresso, retornar_ids=True)
+        maximo = min(max_items_per_basket or len(populares), len(populares))
+        quantidades = list(QUANTIDADES)
+        pesos_quantidade = list(accumulate(QUANTIDADES.values()))
+
+        adaptar_data = connection.ops.adapt_datetimefield_value
+
+        def itens():
+            for basket_id, data, tamanho in zip(basket_ids, datas, tamanhos(rng, baskets, items, maximo)):
+                escolhidos = set(rng.choices(populares, cum_weights=popularidade, k=tamanho))
+                if len(escolhidos) < tamanho:
+                    # Carrinhos grandes esgotam os populares: completa sem peso
+                    escolhidos.update(rng.sample(populares, tamanho))
+                    escolhidos = set(islice(escolhidos, tamanho))
+                minutos = [rng.uniform(0, 90) for _ in range(len(escolhidos))]
+                for indice, quantidade, minuto in zip(
+                    escolhidos, rng.choices(quantidades, cum_weights=pesos_quantidade, k=len(escolhidos)), minutos,
+                ):
+                    yield (
+                        basket_id, produto_ids[indice], quantidade,
+                        adaptar_data(min(agora, data + timedelta(minutes=minuto))),
+                    )
+
+        _inserir_linhas(BasketItem, ['basket', 'produto_id', 'quantidade', 'data_adicionado'],
+                        itens(), chunk_size, progresso)
+
+    bump_versions(CATALOG, BASKETS)
+    return contagem
+
+
+class Progress:
+    """Relatório de progresso a cada ``every`` linhas, com taxa de inserção"""
+
+    def __init__(self, stdout, every=100_000):
+        self.stdout = stdout
+        self.every = every
+        self.inicio = time.perf_counter()
+        self._ultimo = {}
+
+    def __call__(self, model, linhas):
+        if linhas - self._ultimo.get(model, 0) >= self.every:
+            self._ultimo[model] = linhas
+            decorrido = time.perf_counter() - self.inicio
+            self.stdout.write(f'  {model}: {linhas:,} linhas ({decorrido:.1f} s)')
@@ -0,0 +1,53 @@
+"""
+Mixins de serializers compartilhados entre os módulos.
+"""
+from rest_framework import serializers
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+def _parse_list(value):
+    return {nome.strip() for nome in value.split(',') if nome.strip()} if value else set()
+
+
+def sparse_fields(request):
+    """
+    Retorna ``(fields, omit)`` a partir de ``?fields=`` e ``?omit=``.
+
+    ``fields`` é ``None`` quando o cliente não restringiu os campos. Em
+    requisições de escrita nada é filtrado, para não descartar campos de
+    entrada.
+    """
+    if request is None or request.method not in SAFE_METHODS:
+        return None, set()
+    params = request.query_params
+    return _parse_list(params.get('fields')) or None, _parse_list(params.get('omit'))
+
+
+class SparseFieldsMixin:
+    """
+    Permite ao cliente escolher os campos da resposta com ``?fields=`` e
+    ``?omit=`` (nomes separados por vírgula).
+
+    Os campos não pedidos são removidos do serializer antes da serialização,
+    portanto SerializerMethodFields caros nunca são avaliados. Apenas o
+    serializer raiz (ou o filho de uma listagem) é filtrado.
+    """
+
+    def get_fields(self):
+        fields = super().get_fields()
+        if not self._is_root_serializer():
+            return fields
+
+        requested, omitted = sparse_fields(self.context.get('request'))
+        if requested is not None:
+            fields = {nome: field for nome, field in fields.items() if nome in requested}
+        for nome in omitted:
+            fields.pop(nome, None)
+        return fields
+
+    def _is_root_serializer(self):
+        parent = self.parent
+        if parent is None:
+            return True
+        return isinstance(parent, serializers.ListSerializer) and parent.parent is None
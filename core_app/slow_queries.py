@@ -0,0 +1,228 @@
+"""
+Registro de consultas lentas com captura automática do plano de execução.
+
+Toda conexão ao banco recebe um execute wrapper (ver ``CoreAppConfig.ready``)
+que mede cada consulta; as que passam de ``SLOW_QUERY_THRESHOLD_MS`` geram
+uma linha JSON em ``SLOW_QUERY_LOG`` e um aviso no logger
+``core_app.slow_queries``, com:
+
+- ``fingerprint``: hash do SQL normalizado (literais e parâmetros trocados
+  por ``?``, listas ``IN (...)`` colapsadas), que agrupa as execuções da
+  mesma consulta com parâmetros diferentes;
+- ``call_site``: o trecho do projeto que disparou a consulta;
+- ``plan``: ``EXPLAIN QUERY PLAN`` (SQLite) ou ``EXPLAIN`` (PostgreSQL),
+  capturado uma vez por fingerprint em cada processo.
+
+O registro é opcional: sem ``SLOW_QUERY_THRESHOLD_MS`` nada é medido, e sem
+``SLOW_QUERY_LOG`` os registros vão só para o logger (onde valem a rotação
+e os limites configurados em ``LOGGING``). O arquivo não é rotacionado.
+
+``manage.py slow_queries`` agrega o arquivo num relatório das N consultas
+mais custosas.
+"""
+import hashlib
+import json
+import logging
+import math
+import os
+import re
+import threading
+import time
+from collections import defaultdict
+from contextlib import suppress
+from contextvars import ContextVar
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.db import DatabaseError
+
+from .instrumentation import project_stack
+
+logger = logging.getLogger(__name__)
+
+EXPLAIN = {
+    'sqlite': 'EXPLAIN QUERY PLAN ',
+    'postgresql': 'EXPLAIN ',
+}
+# Comandos com EXPLAIN seguro (sem ANALYZE nada é executado)
+_EXPLICAVEIS = ('SELECT', 'WITH', 'INSERT', 'UPDATE', 'DELETE')
+_MAX_PLANOS = 500
+_SAVEPOINT = 'slow_query_explain'
+
+_ESTE_ARQUIVO = os.path.abspath(__file__)
+_explicando = ContextVar('explicando', default=False)
+_planos = {}
+_lock = threading.Lock()
+
+_NORMALIZACOES = [
+    (re.compile(r"'(?:[^']|'')*'"), '?'),
+    (re.compile(r'\b\d+(?:\.\d+)?\b'), '?'),
+    (re.compile(r'%s|\$\d+'), '?'),
+    (re.compile(r'\(\s*\?(?:\s*,\s*\?)*\s*\)'), '(...)'),
+    (re.compile(r'\(\.\.\.\)(?:\s*,\s*\(\.\.\.\))+'), '(...), ...'),
+    (re.compile(r'\s+'), ' '),
+]
+
+
+def slow_query_log():
+    return str(getattr(settings, 'SLOW_QUERY_LOG', '') or '')
+
+
+def normalize(sql):
+    """SQL sem literais nem parâmetros, para agrupar execuções da mesma consulta"""
+    for padrao, troca in _NORMALIZACOES:
+        sql = padrao.sub(troca, sql)
+    return sql.strip()
+
+
+def fingerprint(sql):
+    return hashlib.sha1(normalize(sql).encode()).hexdigest()[:12]
+
+
+def call_site():
+    """Quadro do projeto mais interno que levou à consulta, como ``arquivo:linha em função``"""
+    pilha = project_stack(exclude=(_ESTE_ARQUIVO,))
+    if not pilha:
+        return 'desconhecida'
+    quadro = pilha[-1]
+    return f'{os.path.relpath(quadro.filename, settings.BASE_DIR)}:{quadro.lineno} em {quadro.name}'
+
+
+def explain(connection, sql, params):
+    """Plano de execução da consulta como lista de linhas, ou ``None`` se não suportado"""
+    prefixo = EXPLAIN.get(connection.vendor)
+    if prefixo is None or not sql.lstrip().upper().startswith(_EXPLICAVEIS):
+        return None
+
+    # Cursor cru do driver: não passa pelos execute wrappers nem afeta o
+    # cursor da consulta original, que ainda pode ter linhas a ler. Por isso
+    # os erros são os do driver, e dentro de uma transação o EXPLAIN roda num
+    # savepoint para que a falha não aborte a transação de quem consultou
+    # (PostgreSQL).
+    cursor = connection.create_cursor()
+    savepoint = connection.in_atomic_block
+    erros = (DatabaseError, connection.Database.Error)
+    token = _explicando.set(True)
+    try:
+        if savepoint:
+            cursor.execute(f'SAVEPOINT {_SAVEPOINT}')
+        cursor.execute(prefixo + sql, params)
+        linhas = cursor.fetchall()
+    except erros as e:
+        if savepoint:
+            with suppress(*erros):
+                cursor.execute(f'ROLLBACK TO SAVEPOINT {_SAVEPOINT}')
+                cursor.execute(f'RELEASE SAVEPOINT {_SAVEPOINT}')
+        return [f'EXPLAIN falhou: {e}']
+    else:
+        if savepoint:
+            cursor.execute(f'RELEASE SAVEPOINT {_SAVEPOINT}')
+    finally:
+        _explicando.reset(token)
+        cursor.close()
+
+    if connection.vendor == 'sqlite':
+        # (id, parent, notused, detail)
+        return [linha[-1] for linha in linhas]
+    return [linha[0] for linha in linhas]
+
+
+def _plano(connection, sql, params, chave):
+    with _lock:
+        if chave in _planos:
+            return _planos[chave]
+    plano = explain(connection, sql, params)
+    with _lock:
+        if len(_planos) >= _MAX_PLANOS:
+            _planos.pop(next(iter(_planos)))
+        _planos[chave] = plano
+    return plano
+
+
+def slow_query_wrapper(execute, sql, params, many, context):
+    """Execute wrapper que registra as consultas acima do limite"""
+    threshold = getattr(settings, 'SLOW_QUERY_THRESHOLD_MS', None)
+    if threshold is None or _explicando.get():
+        return execute(sql, params, many, context)
+
+    inicio = time.perf_counter()
+    resultado = execute(sql, params, many, context)
+    duracao = (time.perf_counter() - inicio) * 1000
+    if duracao >= threshold:
+        record(context['connection'], sql, None if many else params, duracao)
+    return resultado
+
+
+def record(connection, sql, params, duration_ms):
+    chave = fingerprint(sql)
+    registro = {
+        'timestamp': datetime.now(timezone.utc).isoformat(),
+        'fingerprint': chave,
+        'database': connection.alias,
+        'duration_ms': round(duration_ms, 3),
+        'call_site': call_site(),
+        'query': normalize(sql),
+        'plan': _plano(connection, sql, params, chave) if params is not None else None,
+    }
+    logger.warning('consulta lenta (%.1f ms) em %s: %s', duration_ms, registro['call_site'],
+                   registro['query'][:200], extra={'slow_query': registro})
+
+    arquivo = slow_query_log()
+    if arquivo:
+        linha = json.dumps(registro, ensure_ascii=False)
+        with _lock, open(arquivo, 'a', encoding='utf-8') as destino:
+            destino.write(linha + '\n')
+
+
+def install(sender, connection, **kwargs):
+    """Receptor de ``connection_created``: instala o wrapper na conexão"""
+    if slow_query_wrapper not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, slow_query_wrapper)
+
+
+def read_log(path=None):
+    """Registros gravados em ``SLOW_QUERY_LOG`` (linhas inválidas são ignoradas)"""
+    path = path or slow_query_log()
+    if not os.path.isfile(path):
+        return []
+    registros = []
+    with open(path, encoding='utf-8') as origem:
+        for linha in origem:
+            try:
+                registros.append(json.loads(linha))
+            except ValueError:
+                continue
+    return registros
+
+
+def _percentil(valores, p):
+    ordenados = sorted(valores)
+    return ordenados[max(0, math.ceil(p / 100 * len(ordenados)) - 1)]
+
+
+def report(records, top=10, sort='total'):
+    """Consultas agrupadas por fingerprint, das mais custosas para as menos"""
+    grupos = defaultdict(list)
+    for registro in records:
+        grupos[registro['fingerprint']].append(registro)
+
+    linhas = []
+    for chave, registros in grupos.items():
+        duracoes = [registro['duration_ms'] for registro in registros]
+        origens = defaultdict(int)
+        for registro in registros:
+            origens[registro['call_site']] += 1
+        ultimo = registros[-1]
+        linhas.append({
+            'fingerprint': chave,
+            'query': ultimo['query'],
+            'count': len(registros),
+            'total_ms': round(sum(duracoes), 3),
+            'mean_ms': round(sum(duracoes) / len(duracoes), 3),
+            'p95_ms': _percentil(duracoes, 95),
+            'max_ms': max(duracoes),
+            'call_sites': sorted(origens.items(), key=lambda item: -item[1]),
+            'plan': next((r['plan'] for r in reversed(registros) if r.get('plan')), None),
+        })
+    linhas.sort(key=lambda linha: linha[f'{sort}_ms' if sort != 'count' else 'count'], reverse=True)
+    return linhas[:top]
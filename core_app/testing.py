@@ -0,0 +1,125 @@
+"""
+Utilitários de teste: orçamentos de consultas e de chamadas HTTP externas.
+
+``BudgetRecorder`` registra, com a pilha de cada uma, as consultas ao banco e
+as chamadas feitas com ``requests`` durante um bloco; as chamadas são
+respondidas por um ``responder`` (ex.: ``ItemsAPIFake``) em vez da rede.
+``BudgetTestMixin.assertWithinBudget`` falha listando as consultas e
+chamadas excedentes com a origem de cada uma.
+"""
+import json
+import os
+import re
+from contextlib import ExitStack
+from unittest.mock import patch
+from urllib.parse import parse_qs, urlsplit
+
+import requests
+from django.conf import settings
+from django.db import connections
+
+from .instrumentation import project_stack
+
+_ESTE_ARQUIVO = os.path.abspath(__file__)
+
+
+def _pilha():
+    """Quadros da pilha atual pertencentes ao projeto"""
+    return project_stack(exclude=(_ESTE_ARQUIVO,))
+
+
+def json_response(request, data, status=200):
+    """Resposta do ``requests`` com corpo JSON, para responders"""
+    response = requests.Response()
+    response.status_code = status
+    response._content = json.dumps(data).encode()
+    response.headers['Content-Type'] = 'application/json'
+    response.url = request.url
+    response.request = request
+    return response
+
+
+def items_api_payload(produtos, url):
+    """
+    Simula a API de produtos: ``(status, corpo)`` para ``url``.
+
+    Atende ``/api/produtos/<id>/`` e ``/api/produtos/`` (com ``?ids=``) a
+    partir de ``produtos`` (id -> dados serializados).
+    """
+    partes = urlsplit(url)
+    detalhe = re.fullmatch(r'.*/produtos/(\d+)/', partes.path)
+    if detalhe:
+        produto = produtos.get(int(detalhe.group(1)))
+        return (200, produto) if produto is not None else (404, {'detail': 'Not found.'})
+    if partes.path.endswith('/produtos/'):
+        ids = parse_qs(partes.query).get('ids')
+        if ids:
+            wanted = {int(pid) for pid in ids[0].split(',') if pid.isdigit()}
+            return 200, [produto for pid, produto in produtos.items() if pid in wanted]
+        return 200, list(produtos.values())
+    return 404, {'detail': 'Not found.'}
+
+
+class ItemsAPIFake:
+    """Responder da API de produtos para ``BudgetRecorder``"""
+
+    def __init__(self, produtos):
+        self.produtos = {produto['id']: produto for produto in produtos}
+
+    def __call__(self, request):
+        status, data = items_api_payload(self.produtos, request.url)
+        return json_response(request, data, status)
+
+
+class BudgetRecorder:
+    """Registra consultas e chamadas HTTP externas feitas dentro do bloco"""
+
+    def __init__(self, responder):
+        self.responder = responder
+        self.queries = []
+        self.calls = []
+
+    def _execute(self, execute, sql, params, many, context):
+        self.queries.append((sql, _pilha()))
+        return execute(sql, params, many, context)
+
+    def _send(self, session, request, **kwargs):
+        self.calls.append((f'{request.method} {request.url}', _pilha()))
+        return self.responder(request)
+
+    def __enter__(self):
+        self._stack = ExitStack()
+        for alias in connections:
+            self._stack.enter_context(connections[alias].execute_wrapper(self._execute))
+        self._stack.enter_context(
+            patch.object(requests.Session, 'send', autospec=True, side_effect=self._send)
+        )
+        return self
+
+    def __exit__(self, *exc):
+        self._stack.close()
+
+
+def _formatar(registros):
+    linhas = []
+    for numero, (descricao, pilha) in enumerate(registros, 1):
+        linhas.append(f'#{numero} {descricao}')
+        linhas += [f'    {os.path.relpath(f.filename, settings.BASE_DIR)}:{f.lineno} em {f.name}' for f in pilha[-4:]]
+    return '\n'.join(linhas)
+
+
+class BudgetTestMixin:
+    """Asserções de orçamento para ``TestCase``"""
+
+    def assertWithinBudget(self, recorder, queries, outbound, label=''):
+        falhas = []
+        if len(recorder.queries) > queries:
+            falhas.append(
+                f'{len(recorder.queries)} consultas (orçamento: {queries})\n{_formatar(recorder.queries)}'
+            )
+        if len(recorder.calls) > outbound:
+            falhas.append(
+                f'{len(recorder.calls)} chamadas externas (orçamento: {outbound})\n{_formatar(recorder.calls)}'
+            )
+        if falhas:
+            self.fail(f'{label}: orçamento excedido\n' + '\n\n'.join(falhas))
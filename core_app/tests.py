@@ -0,0 +1,1074 @@
+import json
+import os
+import random
+import shutil
+import tempfile
+import threading
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from io import StringIO
+from pathlib import Path
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import IntegrityError, connection, connections, transaction
+from django.db.models import Count
+from django.db.utils import load_backend
+from django.http import HttpResponse
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test import RequestFactory
+from django.urls import reverse
+from unittest.mock import patch
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APITestCase
+from rest_framework import status
+from unittest import skipUnless
+from basket_app import catalog
+from basket_app.catalog import CatalogoProdutos
+from basket_app.models import Basket, BasketItem
+from comprasaux.database import database_from_url
+from items_app.models import Produto
+from .admission import acquire_slot, admission_cache, release_slot, take_token
+from .idempotency import delete_expired
+from .jobs import claim, enqueue, run_pending, task
+from .metrics import prometheus_client, registry, row_counts
+from .models import AdmissionSlot, IdempotencyKey, Job
+from .profiling import make_token
+from .replicas import (
+    ReplicaMiddleware, ReplicaRouter, _indisponiveis, _Renovacao, choose_replica, rebump_after_replica_lag,
+)
+from .seeding import seed_scale, tamanhos
+from .slow_queries import explain, fingerprint, normalize, read_log, report
+from .purge import purge, purge_paths
+from .tracing import parse_traceparent
+from .versioning import CATALOG, bump_versions
+from . import warmup
+from .testing import BudgetRecorder, ItemsAPIFake
+from .renderers import ColumnarRenderer, FastJSONRenderer, MessagePackRenderer, msgpack
+
+
+class FastJSONRendererTest(TestCase):
+    """Testes para o renderer JSON baseado em orjson"""
+
+    def setUp(self):
+        self.data = {
+            'valor': Decimal('29.99'),
+            'quando': datetime(2025, 9, 6, 19, 8, 1, 123456, tzinfo=timezone.utc),
+            'sem_micro': datetime(2025, 9, 6, 19, 8, tzinfo=timezone.utc),
+            'nome': 'Feijão ',
+            'itens': [{'id': 1, 'subtotal': 59.98}],
+            3: 'chave numérica',
+        }
+
+    def test_saida_identica_ao_drf(self):
+        """Testa se a saída é byte a byte igual ao JSONRenderer do DRF"""
+        esperado = JSONRenderer().render(self.data)
+        self.assertEqual(FastJSONRenderer().render(self.data), esperado)
+
+    def test_indentacao_usa_renderer_padrao(self):
+        """Testa se pedidos com indentação continuam funcionando"""
+        media_type = 'application/json; indent=4'
+        esperado = JSONRenderer().render(self.data, media_type)
+        self.assertEqual(FastJSONRenderer().render(self.data, media_type), esperado)
+
+    def test_none_renderiza_vazio(self):
+        self.assertEqual(FastJSONRenderer().render(None), b'')
+
+
+@skipUnless(msgpack, 'msgpack não instalado')
+class MessagePackAPITest(APITestCase):
+    """Testes para a negociação de MessagePack na API"""
+
+    def setUp(self):
+        self.produto = Produto.objects.create(nome="Arroz", preco=5.99)
+
+    def test_listagem_em_msgpack(self):
+        """Testa se a listagem é entregue em MessagePack via Accept"""
+        response = self.client.get(reverse('produto-list'), HTTP_ACCEPT='application/msgpack')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], 'application/msgpack')
+        data = msgpack.unpackb(response.content, raw=False)
+        self.assertEqual(data, [{'id': self.produto.id, 'nome': 'Arroz', 'preco': '5.99'}])
+
+    def test_datas_e_decimais_com_mesma_semantica(self):
+        """Testa se Decimal e datetime seguem a mesma conversão do JSON"""
+        data = {'valor': Decimal('1.50'), 'quando': datetime(2025, 1, 1, tzinfo=timezone.utc)}
+        decoded = msgpack.unpackb(MessagePackRenderer().render(data), raw=False)
+
+        self.assertEqual(decoded, {'valor': 1.5, 'quando': '2025-01-01T00:00:00Z'})
+
+    def test_criacao_com_corpo_msgpack(self):
+        """Testa a criação de produto enviando o corpo em MessagePack"""
+        body = msgpack.packb({'nome': 'Feijão', 'preco': '4.50'})
+        response = self.client.post(
+            reverse('produto-list'), body, content_type='application/msgpack'
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Produto.objects.get(id=response.data['id']).nome, 'Feijão')
+
+    def test_corpo_msgpack_invalido(self):
+        """Testa se um corpo inválido resulta em 400"""
+        response = self.client.post(
+            reverse('produto-list'), b'\xc1', content_type='application/msgpack'
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class ColumnarRendererTest(TestCase):
+    """Testes para o formato colunar"""
+
+    def test_converte_lista_de_dicionarios(self):
+        """Testa a conversão de uma listagem comum para colunas"""
+        data = [{'id': 1, 'nome': 'Arroz'}, {'id': 2, 'nome': 'Feijão'}]
+        resultado = json.loads(ColumnarRenderer().render(data))
+
+        self.assertEqual(resultado, {
+            'fields': ['id', 'nome'],
+            'columns': [[1, 2], ['Arroz', 'Feijão']],
+            'count': 2,
+        })
+
+    def test_detalhe_permanece_em_json(self):
+        """Testa que respostas que não são listas não são convertidas"""
+        data = {'id': 1, 'nome': 'Arroz'}
+        self.assertEqual(json.loads(ColumnarRenderer().render(data)), data)
+
+    def test_listagem_paginada(self):
+        """Testa a conversão de 'results' em respostas paginadas"""
+        data = {'count': 1, 'next': None, 'previous': None, 'results': [{'id': 1}]}
+        resultado = json.loads(ColumnarRenderer().render(data))
+
+        self.assertEqual(resultado['results'], {'fields': ['id'], 'columns': [[1]], 'count': 1})
+
+
+class ProxyCacheHeadersTest(APITestCase):
+    """Testes para os cabeçalhos de cache do proxy reverso"""
+
+    def setUp(self):
+        self.produto = Produto.objects.create(nome="Arroz", preco=5.99)
+        self.basket = Basket.objects.create(nome="Lista", estabelecimento="Mercado")
+
+    def test_listagem_de_produtos_publica(self):
+        """Testa se o catálogo pode ser guardado pelo proxy"""
+        response = self.client.get(reverse('produto-list'))
+
+        self.assertEqual(response['Cache-Control'], 'public, max-age=0, s-maxage=300')
+        self.assertEqual(response['Surrogate-Key'], 'catalog')
+
+    def test_detalhe_de_produto_com_chave_propria(self):
+        """Testa a chave do produto no detalhe"""
+        response = self.client.get(reverse('produto-detail', args=[self.produto.id]))
+
+        self.assertEqual(response['Surrogate-Key'], f'catalog produto-{self.produto.id}')
+
+    @patch('requests.get')
+    def test_resumo_de_carrinho(self, mock_get):
+        """Testa as chaves do resumo, inclusive quando vem do cache da aplicação"""
+        url = reverse('basket-summary-specific', args=[self.basket.id])
+        self.client.get(url)
+        response = self.client.get(url)
+
+        self.assertEqual(response['X-Cache'], 'HIT')
+        self.assertEqual(response['Surrogate-Key'], f'catalog basket-{self.basket.id}')
+        self.assertEqual(response['Cache-Control'], 'public, max-age=0, s-maxage=5')
+
+    def test_escritas_e_erros_sem_cabecalhos(self):
+        """Testa que escritas e respostas de erro não são marcadas como cacheáveis"""
+        response = self.client.post(reverse('produto-list'), {'nome': 'Feijão', 'preco': '4.50'})
+        self.assertFalse(response.has_header('Surrogate-Key'))
+
+        response = self.client.get(reverse('produto-detail', args=[999]))
+        self.assertFalse(response.has_header('Surrogate-Key'))
+
+    def test_etag_pelas_versoes(self):
+        """Testa a revalidação com If-None-Match até a próxima escrita no catálogo"""
+        url = reverse('produto-list')
+        etag = self.client.get(url)['ETag']
+        self.assertTrue(etag.startswith('W/"'))
+        self.assertNotEqual(self.client.get(url, {'fields': 'id'})['ETag'], etag)
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+        self.assertEqual(response['ETag'], etag)
+
+        Produto.objects.create(nome="Feijão", preco=4.50)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_paginas_e_buscas_fora_do_proxy(self):
+        """Testa que páginas e buscas, que a purga não alcança, não são compartilhadas no proxy"""
+        for params in ({'limit': 10}, {'limit': 10, 'offset': 10}, {'search': 'arroz'}):
+            with self.subTest(params=params):
+                response = self.client.get(reverse('produto-list'), params)
+                self.assertEqual(response['Cache-Control'], 'private, no-cache')
+                self.assertTrue(response.has_header('ETag'))
+
+    def test_paginas_privadas_sem_etag(self):
+        self.assertFalse(self.client.get(reverse('produtos')).has_header('ETag'))
+
+    @override_settings(PROXY_CACHE_TIMEOUTS={'catalog': 0})
+    def test_escopo_desativado(self):
+        """Testa que um escopo com tempo zero fica privado"""
+        response = self.client.get(reverse('produto-list'))
+
+        self.assertEqual(response['Cache-Control'], 'private, no-cache')
+
+
+class ProxyPurgeTest(TestCase):
+    """Testes para a purga do proxy após escritas"""
+
+    def test_urls_das_chaves(self):
+        """Testa as URLs canônicas de cada namespace"""
+        self.assertEqual(
+            purge_paths(['catalog', 'produto:3', 'baskets', 'basket:7']),
+            ['/api/produtos/3/', '/api/baskets/7/', '/api/basket-summary/7/'],
+        )
+
+    @override_settings(PROXY_PURGE_URL='http://nginx/')
+    @patch('core_app.purge.requests.request')
+    def test_purga_somente_json_por_padrao(self, mock_request):
+        """Testa que cada URL é renovada uma vez, em JSON, sem as listagens globais"""
+        purge(['baskets', 'basket:7'])
+
+        self.assertEqual(
+            [(call.args[1], call.kwargs['headers']['Accept']) for call in mock_request.call_args_list],
+            [('http://nginx/api/baskets/7/', 'application/json'),
+             ('http://nginx/api/basket-summary/7/', 'application/json')],
+        )
+
+    @override_settings(PROXY_PURGE_URL='http://nginx/', PROXY_PURGE_ACCEPTS=['application/json'])
+    @patch('core_app.purge.requests.request')
+    def test_purga_renova_urls(self, mock_request):
+        """Testa as requisições de renovação enviadas ao proxy"""
+        purge(['catalog', 'produto:3'])
+
+        urls = [call.args[1] for call in mock_request.call_args_list]
+        self.assertEqual(urls, ['http://nginx/api/produtos/3/'])
+        headers = mock_request.call_args.kwargs['headers']
+        self.assertEqual(headers['Surrogate-Key'], 'catalog produto-3')
+        self.assertIn('X-Cache-Refresh', headers)
+
+    @patch('core_app.purge.requests.request')
+    def test_purga_desativada_por_padrao(self, mock_request):
+        purge(['catalog'])
+        mock_request.assert_not_called()
+
+    @patch('core_app.purge._executor')
+    def test_escrita_dispara_purga_apos_commit(self, mock_executor):
+        """Testa que a purga só é disparada após o commit da escrita"""
+        with override_settings(PROXY_PURGE_URL='http://nginx'):
+            with self.captureOnCommitCallbacks(execute=True):
+                produto = Produto.objects.create(nome="Arroz", preco=5.99)
+                mock_executor.submit.assert_not_called()
+
+        mock_executor.submit.assert_called_once_with(purge, ('catalog', f'produto:{produto.id}'))
+
+
+@override_settings(API_CACHE_ENABLED=False)
+class ServerTimingMiddlewareTest(APITestCase):
+    """Testes para a instrumentação por requisição"""
+
+    def setUp(self):
+        self.produto = Produto.objects.create(nome="Arroz", preco=5.99)
+        self.basket = Basket.objects.create(nome="Lista", estabelecimento="Mercado")
+        BasketItem.objects.create(basket=self.basket, produto_id=self.produto.id, quantidade=2)
+        self.fake = ItemsAPIFake([{'id': self.produto.id, 'nome': 'Arroz', 'preco': '5.99'}])
+
+    def test_cabecalho_server_timing(self):
+        """Testa as métricas de banco, chamadas externas e serialização"""
+        with BudgetRecorder(self.fake):
+            response = self.client.get(reverse('basketlist-list'))
+
+        timing = response['Server-Timing']
+        self.assertIn('db;dur=', timing)
+        self.assertIn('desc="2 consultas"', timing)
+        self.assertIn('desc="1 chamadas, 0 com erro"', timing)
+        self.assertIn('ser;dur=', timing)
+        self.assertIn('total;dur=', timing)
+
+    def test_respostas_de_erro_da_api_contam_como_erro(self):
+        """Testa que respostas 4xx/5xx da API de produtos contam como chamadas com erro"""
+        basket = Basket.objects.create(nome="Outra", estabelecimento="Mercado")
+        BasketItem.objects.create(basket=basket, produto_id=999, quantidade=1)
+        with BudgetRecorder(self.fake):
+            response = self.client.get(reverse('basketlist-detail', kwargs={'pk': basket.id}))
+
+        self.assertIn('desc="1 chamadas, 1 com erro"', response['Server-Timing'])
+
+    @override_settings(SERVER_TIMING_HEADER=False)
+    def test_cabecalho_desativado(self):
+        response = self.client.get(reverse('produto-list'))
+        self.assertFalse(response.has_header('Server-Timing'))
+
+    @override_settings(REQUEST_LOG_THRESHOLD_MS=0)
+    def test_registro_de_requisicao_lenta(self):
+        """Testa o registro estruturado acima do limite"""
+        url = reverse('basket-summary-specific', kwargs={'basket_id': self.basket.id})
+        with BudgetRecorder(self.fake), self.assertLogs('core_app.requests', 'WARNING') as logs:
+            self.client.get(url)
+
+        registro = logs.records[0].request_metrics
+        self.assertEqual(registro['view'], 'basket-summary-specific')
+        self.assertEqual(registro['status'], 200)
+        self.assertEqual(registro['outbound_calls'], 1)
+        self.assertEqual(registro['db_queries'], 3)
+
+    @override_settings(REQUEST_LOG_THRESHOLD_MS=None)
+    def test_registro_desativado(self):
+        with self.assertNoLogs('core_app.requests'):
+            self.client.get(reverse('produto-list'))
+
+
+@skipUnless(prometheus_client, 'prometheus_client não instalado')
+@override_settings(API_CACHE_ENABLED=True, METRICS_ROW_COUNT_TTL=0)
+class MetricsEndpointTest(APITestCase):
+    """Testes para o endpoint /metrics"""
+
+    def setUp(self):
+        Produto.objects.create(nome="Arroz", preco=5.99)
+
+    def test_metricas_de_requisicao_cache_e_linhas(self):
+        """Testa latência por view, cache e contagem de linhas"""
+        self.client.get(reverse('produto-list'))
+        self.client.get(reverse('produto-list'))
+
+        conteudo = self.client.get(reverse('metrics')).content.decode()
+
+        self.assertIn(
+            'comprasaux_request_duration_seconds_count{method="GET",status="200",view="produto-list"}',
+            conteudo,
+        )
+        self.assertIn('comprasaux_cache_requests_total{cache="api",result="hit"}', conteudo)
+        self.assertIn('comprasaux_rows{model="items_app.produto"} 1.0', conteudo)
+
+    def test_chamadas_externas(self):
+        """Testa a latência das chamadas à API de produtos"""
+        basket = Basket.objects.create(nome="Lista", estabelecimento="Mercado")
+        BasketItem.objects.create(basket=basket, produto_id=1, quantidade=1)
+        with BudgetRecorder(ItemsAPIFake([])):
+            self.client.get(reverse('basketlist-detail', kwargs={'pk': basket.id}))
+
+        conteudo = self.client.get(reverse('metrics')).content.decode()
+
+        self.assertIn('comprasaux_outbound_duration_seconds_count{target="catalogo"}', conteudo)
+
+    def test_registro_multiprocesso(self):
+        """Testa a coleta agregada quando PROMETHEUS_MULTIPROC_DIR está definido"""
+        with tempfile.TemporaryDirectory() as diretorio, \
+                patch.dict(os.environ, {'PROMETHEUS_MULTIPROC_DIR': diretorio}):
+            conteudo = prometheus_client.generate_latest(registry()).decode()
+
+        self.assertIn('comprasaux_rows{model="basket_app.basket"} 0.0', conteudo)
+
+    @override_settings(METRICS_ROW_COUNT_TTL=60)
+    @patch.dict('core_app.metrics._contagens', {'valores': None, 'ate': 0})
+    def test_contagem_de_linhas_reaproveitada(self):
+        """Testa que a contagem de linhas só é refeita após METRICS_ROW_COUNT_TTL"""
+        with patch('core_app.metrics.time.monotonic', return_value=1_000_000):
+            row_counts()
+            Produto.objects.create(nome="Feijão", preco=8.5)
+            with self.assertNumQueries(0):
+                self.assertEqual(row_counts()['items_app.produto'], 1)
+
+        with patch('core_app.metrics.time.monotonic', return_value=1_000_061):
+            self.assertEqual(row_counts()['items_app.produto'], 2)
+
+
+class ProfilingTest(TestCase):
+    """Testes para o perfil sob demanda"""
+
+    def setUp(self):
+        self.diretorio = tempfile.TemporaryDirectory()
+        self.addCleanup(self.diretorio.cleanup)
+
+    def perfis(self):
+        return sorted(os.listdir(self.diretorio.name))
+
+    def test_desligado_por_padrao(self):
+        """Testa que nada é perfilado com PROFILING_ENABLED desligado"""
+        with self.settings(PROFILING_DIR=self.diretorio.name):
+            response = self.client.get(reverse('produto-list'), HTTP_X_PROFILE=make_token())
+
+        self.assertFalse(response.has_header('X-Profile-File'))
+        self.assertEqual(self.perfis(), [])
+
+    def test_token_assinado(self):
+        """Testa o perfil disparado pelo cabeçalho X-Profile"""
+        with self.settings(PROFILING_ENABLED=True, PROFILING_DIR=self.diretorio.name):
+            response = self.client.get(reverse('produto-list'), HTTP_X_PROFILE=make_token())
+
+        nome = response['X-Profile-File']
+        self.assertTrue(nome.endswith('-GET-api-produtos.prof'))
+        self.assertEqual(self.perfis(), [nome, nome.replace('.prof', '.txt')])
+
+    def test_token_invalido_e_sem_sessao_staff(self):
+        with self.settings(PROFILING_ENABLED=True, PROFILING_DIR=self.diretorio.name):
+            self.client.get(reverse('produto-list'), HTTP_X_PROFILE='invalido')
+            self.client.get(reverse('produto-list'), {'profile': '1'})
+
+        self.assertEqual(self.perfis(), [])
+
+    def test_staff_lista_e_baixa_perfis(self):
+        """Testa o perfil por sessão staff e a listagem no admin"""
+        staff = User.objects.create_user('admin', password='senha', is_staff=True)
+        self.client.force_login(staff)
+
+        with self.settings(PROFILING_ENABLED=True, PROFILING_DIR=self.diretorio.name):
+            nome = self.client.get(reverse('produtos'), {'profile': '1'})['X-Profile-File']
+            listagem = self.client.get(reverse('perfis'))
+            download = self.client.get(reverse('perfil-download', args=[nome]))
+            fora = self.client.get(reverse('perfil-download', args=['..%2Fsettings.py']))
+
+        self.assertContains(listagem, nome)
+        self.assertEqual(download.status_code, 200)
+        self.assertEqual(fora.status_code, 404)
+
+    def test_listagem_exige_staff(self):
+        response = self.client.get(reverse('perfis'))
+        self.assertEqual(response.status_code, 302)
+
+
+@override_settings(API_CACHE_ENABLED=False, TRACING_ENABLED=True)
+class TracingTest(APITestCase):
+    """Testes para a propagação de traceparent e exportação de spans"""
+
+    TRACE_ID = '4bf92f3577b34da6a3ce929d0e0e4736'
+    TRACEPARENT = f'00-{TRACE_ID}-00f067aa0ba902b7-01'
+
+    def setUp(self):
+        self.arquivo = tempfile.NamedTemporaryFile(suffix='.jsonl', delete=False)
+        self.arquivo.close()
+        self.addCleanup(os.unlink, self.arquivo.name)
+        self.produto = Produto.objects.create(nome="Arroz", preco=5.99)
+        self.basket = Basket.objects.create(nome="Lista", estabelecimento="Mercado")
+        BasketItem.objects.create(basket=self.basket, produto_id=self.produto.id, quantidade=2)
+
+    def spans(self):
+        with open(self.arquivo.name, encoding='utf-8') as arquivo:
+            linhas = [json.loads(linha) for linha in arquivo]
+        return [
+            span for linha in linhas
+            for span in linha['resourceSpans'][0]['scopeSpans'][0]['spans']
+        ]
+
+    def test_parse_traceparent(self):
+        self.assertEqual(
+            parse_traceparent(self.TRACEPARENT), (self.TRACE_ID, '00f067aa0ba902b7', True)
+        )
+        self.assertIsNone(parse_traceparent('00-' + '0' * 32 + '-00f067aa0ba902b7-01'))
+        self.assertIsNone(parse_traceparent('lixo'))
+
+    def test_propagacao_ate_a_api_de_produtos(self):
+        """Testa spans da view, do banco e da chamada externa no mesmo trace"""
+        enviados = []
+
+        def responder(request):
+            enviados.append(request.headers.get('traceparent'))
+            return ItemsAPIFake([{'id': self.produto.id, 'nome': 'Arroz', 'preco': '5.99'}])(request)
+
+        url = reverse('basket-summary-specific', kwargs={'basket_id': self.basket.id})
+        with self.settings(TRACING_FILE=self.arquivo.name), BudgetRecorder(responder):
+            response = self.client.get(url, HTTP_TRACEPARENT=self.TRACEPARENT)
+
+        self.assertEqual(response['X-Trace-Id'], self.TRACE_ID)
+        spans = self.spans()
+        self.assertTrue(all(span['traceId'] == self.TRACE_ID for span in spans))
+
+        servidor = next(span for span in spans if span['kind'] == 2)
+        self.assertEqual(servidor['name'], 'GET basket-summary-specific')
+        self.assertEqual(servidor['parentSpanId'], '00f067aa0ba902b7')
+        self.assertTrue(any(span['name'] == 'db.query' for span in spans))
+
+        cliente = next(span for span in spans if span['name'] == 'GET catalogo')
+        self.assertEqual(enviados, [f"00-{self.TRACE_ID}-{cliente['spanId']}-01"])
+
+    def test_items_app_continua_o_trace(self):
+        """Testa que o items_app adota o trace recebido"""
+        with self.settings(TRACING_FILE=self.arquivo.name):
+            response = self.client.get(reverse('produto-list'), HTTP_TRACEPARENT=self.TRACEPARENT)
+
+        self.assertEqual(response['X-Trace-Id'], self.TRACE_ID)
+        self.assertEqual(self.spans()[-1]['name'], 'GET produto-list')
+
+    def test_fora_da_amostragem_propaga_flag_desligada(self):
+        """Testa que um trace não amostrado segue adiante com a flag 00, sem gerar spans"""
+        enviados = []
+
+        def responder(request):
+            enviados.append(request.headers.get('traceparent'))
+            return ItemsAPIFake([{'id': self.produto.id, 'nome': 'Arroz', 'preco': '5.99'}])(request)
+
+        url = reverse('basket-summary-specific', kwargs={'basket_id': self.basket.id})
+        recebido = f'00-{self.TRACE_ID}-00f067aa0ba902b7-00'
+        with self.settings(TRACING_FILE=self.arquivo.name), BudgetRecorder(responder):
+            self.client.get(url, HTTP_TRACEPARENT=recebido)
+            with self.settings(TRACING_SAMPLE_RATE=0):
+                self.client.get(url)
+
+        self.assertEqual(enviados[0], recebido)
+        gerado = parse_traceparent(enviados[1])
+        self.assertIsNotNone(gerado)
+        self.assertFalse(gerado[2])
+        self.assertEqual(self.spans(), [])
+
+    @override_settings(TRACING_ENABLED=False)
+    def test_desligado(self):
+        response = self.client.get(reverse('produto-list'), HTTP_TRACEPARENT=self.TRACEPARENT)
+        self.assertFalse(response.has_header('X-Trace-Id'))
+
+
+class SQLiteProductionProfileTest(SimpleTestCase):
+    """Testes para o perfil SQLite de produção (SQLITE_PRODUCTION_OPTIONS)"""
+
+    def test_pragmas_por_conexao(self):
+        diretorio = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, diretorio)
+        configuracao = connections.configure_settings({
+            'default': {'ENGINE': 'django.db.backends.sqlite3', 'NAME': os.path.join(diretorio, 'p.sqlite3'),
+                        'OPTIONS': dict(settings.SQLITE_PRODUCTION_OPTIONS)},
+        })
+        conexao = load_backend('django.db.backends.sqlite3').DatabaseWrapper(configuracao['default'], 'perfil')
+        self.addCleanup(conexao.close)
+
+        with conexao.cursor() as cursor:
+            cursor.execute('PRAGMA journal_mode')
+            self.assertEqual(cursor.fetchone()[0], 'wal')
+            cursor.execute('PRAGMA synchronous')
+            self.assertEqual(cursor.fetchone()[0], 1)  # NORMAL
+            cursor.execute('PRAGMA busy_timeout')
+            self.assertEqual(cursor.fetchone()[0], 20_000)
+        self.assertEqual(conexao.transaction_mode, 'IMMEDIATE')
+
+
+class DatabaseURLTest(SimpleTestCase):
+    """Testes para a configuração do banco por DATABASE_URL"""
+
+    def test_sqlite(self):
+        self.assertEqual(database_from_url('sqlite:///db.sqlite3', '/app')['NAME'], Path('/app/db.sqlite3'))
+        self.assertEqual(database_from_url('sqlite:////var/db.sqlite3', '/app')['NAME'], Path('/var/db.sqlite3'))
+        self.assertEqual(
+            database_from_url('sqlite:////var/db.sqlite3', '/app', read_only=True)['NAME'],
+            'file:/var/db.sqlite3?mode=ro',
+        )
+
+    def test_postgres(self):
+        banco = database_from_url('postgres://compras:s%40nha@db:5433/comprasaux?sslmode=require', '/app')
+        self.assertEqual(banco['ENGINE'], 'django.db.backends.postgresql')
+        self.assertEqual(
+            (banco['NAME'], banco['USER'], banco['PASSWORD'], banco['HOST'], banco['PORT']),
+            ('comprasaux', 'compras', 's@nha', 'db', '5433'),
+        )
+        self.assertEqual(banco['OPTIONS'], {'sslmode': 'require'})
+
+    def test_esquema_invalido(self):
+        with self.assertRaises(ValueError):
+            database_from_url('mysql://localhost/compras', '/app')
+
+
+@override_settings(DATABASE_REPLICAS=['replica1'], REPLICA_STICKY_SECONDS=5)
+class ReplicaRoutingTest(SimpleTestCase):
+    """Testes para o roteamento de leituras para réplicas"""
+
+    def setUp(self):
+        self.router = ReplicaRouter()
+        self.factory = RequestFactory()
+        self.disponivel = patch('core_app.replicas._disponivel', return_value=True)
+        self.disponivel.start()
+        self.addCleanup(patch.stopall)
+
+    def rotear(self, request, escrever=False):
+        """Bancos de leitura antes e depois de uma escrita opcional, e a resposta"""
+        bancos = []
+
+        def view(request):
+            bancos.append(self.router.db_for_read(Basket))
+            if escrever:
+                self.router.db_for_write(Basket)
+            bancos.append(self.router.db_for_read(Basket))
+            return HttpResponse()
+
+        return bancos, ReplicaMiddleware(view)(request)
+
+    def test_get_le_da_replica(self):
+        bancos, response = self.rotear(self.factory.get('/api/baskets/'))
+        self.assertEqual(bancos, ['replica1', 'replica1'])
+        self.assertNotIn('usar_primario', response.cookies)
+
+    def test_leitura_apos_escrita_no_primario(self):
+        """Testa que a escrita fixa a requisição e o cliente no primário"""
+        bancos, response = self.rotear(self.factory.get('/api/baskets/'), escrever=True)
+        self.assertEqual(bancos, ['replica1', 'default'])
+        self.assertEqual(response.cookies['usar_primario']['max-age'], 5)
+
+        request = self.factory.get('/api/baskets/')
+        request.COOKIES['usar_primario'] = '1'
+        self.assertEqual(self.rotear(request)[0], ['default', 'default'])
+
+    def test_escritas_e_renovacoes_no_primario(self):
+        self.assertEqual(self.rotear(self.factory.post('/api/baskets/'))[0], ['default', 'default'])
+        refresh = self.factory.get('/api/baskets/', HTTP_X_CACHE_REFRESH='1')
+        self.assertEqual(self.rotear(refresh)[0], ['default', 'default'])
+
+    def test_transacao_no_primario(self):
+        with patch.object(connections['default'], 'in_atomic_block', True):
+            self.assertEqual(self.rotear(self.factory.get('/api/baskets/'))[0], ['default', 'default'])
+
+    def test_fora_de_requisicao(self):
+        self.assertIsNone(self.router.db_for_read(Basket))
+        self.assertEqual(self.router.db_for_write(Basket), 'default')
+        self.assertFalse(self.router.allow_migrate('replica1', 'basket_app'))
+
+    def test_escrita_no_banco_do_objeto(self):
+        """Testa que relações entre objetos de outro banco (.using()) não são barradas"""
+        basket = Basket(id=1)
+        basket._state.db = 'benchmark'
+        item = BasketItem(basket=basket, produto_id=1, quantidade=1)
+        self.assertEqual(item._state.db, 'benchmark')
+
+        lido_da_replica = Basket(id=2)
+        lido_da_replica._state.db = 'replica1'
+        self.assertEqual(self.router.db_for_write(BasketItem, instance=lido_da_replica), 'default')
+
+    @override_settings(DATABASE_REPLICAS=['replica_inexistente'])
+    def test_replica_indisponivel_volta_ao_primario(self):
+        self.disponivel.stop()
+        self.addCleanup(_indisponiveis.clear)
+        with self.assertLogs('core_app.replicas', 'WARNING') as logs:
+            self.assertIsNone(choose_replica())
+            # Fora da escolha até REPLICA_RETRY_SECONDS: sem nova tentativa
+            self.assertIsNone(choose_replica())
+        self.assertEqual(len(logs.output), 1)
+        self.assertEqual(self.rotear(self.factory.get('/api/baskets/'))[0], ['default', 'default'])
+
+    @override_settings(REPLICA_STICKY_SECONDS=0)
+    def test_versoes_renovadas_apos_atraso(self):
+        """Testa o novo incremento das versões ao fim da janela de atraso"""
+        renovacao = _Renovacao()
+        enviado = threading.Event()
+        fechadas = threading.Event()
+        with patch('core_app.replicas._renovacao', renovacao), patch('core_app.replicas.bump_version') as bump, \
+                patch('core_app.replicas.versions_bumped.send') as send, \
+                patch('core_app.replicas.connections.close_all', side_effect=fechadas.set):
+            send.side_effect = lambda **kw: enviado.set()
+            rebump_after_replica_lag(None, namespaces=('catalog', 'basket:1'))
+            self.assertTrue(enviado.wait(2))
+            # As conexões abertas pelos receptores na thread são fechadas
+            self.assertTrue(fechadas.wait(2))
+            # O próprio reenvio não agenda outra renovação
+            rebump_after_replica_lag(ReplicaRouter, namespaces=('catalog',))
+            self.assertIsNone(renovacao.timer)
+        self.assertEqual(sorted(call.args[0] for call in bump.call_args_list), ['basket:1', 'catalog'])
+        self.assertIs(send.call_args.kwargs['sender'], ReplicaRouter)
+
+
+class SlowQueryLogTest(APITestCase):
+    """Testes para o registro de consultas lentas"""
+
+    def setUp(self):
+        self.arquivo = tempfile.NamedTemporaryFile(suffix='.jsonl', delete=False)
+        self.arquivo.close()
+        self.addCleanup(os.unlink, self.arquivo.name)
+        self.basket = Basket.objects.create(nome="Lista", estabelecimento="Mercado")
+        BasketItem.objects.create(basket=self.basket, produto_id=1, quantidade=2)
+
+    def test_normalizacao(self):
+        """Testa que parâmetros e literais diferentes geram o mesmo fingerprint"""
+        self.assertEqual(
+            normalize("SELECT * FROM t WHERE id IN (%s, %s, %s) AND nome = 'x'  LIMIT 21"),
+            'SELECT * FROM t WHERE id IN (...) AND nome = ? LIMIT ?',
+        )
+        self.assertEqual(
+            fingerprint('SELECT * FROM t WHERE id IN (%s)'),
+            fingerprint('SELECT * FROM t WHERE id IN (%s, %s)'),
+        )
+        self.assertEqual(normalize('INSERT INTO t VALUES (%s, %s), (%s, %s)'), 'INSERT INTO t VALUES (...), ...')
+
+    def test_registro_com_plano_e_origem(self):
+        """Testa que as consultas da view são registradas com origem e EXPLAIN"""
+        produtos = ItemsAPIFake([{'id': 1, 'nome': 'Arroz', 'preco': '5.99'}])
+        with self.settings(SLOW_QUERY_THRESHOLD_MS=0, SLOW_QUERY_LOG=self.arquivo.name), \
+                BudgetRecorder(produtos), self.assertLogs('core_app.slow_queries', 'WARNING'):
+            response = self.client.get(reverse('basketlist-detail', kwargs={'pk': self.basket.id}))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        registros = read_log(self.arquivo.name)
+        consulta = next(r for r in registros if 'FROM "basket_app_basketitem"' in r['query'])
+        self.assertNotIn(str(self.basket.id), consulta['query'].split('WHERE')[1])
+        self.assertTrue(consulta['call_site'].startswith(('basket_app/', 'core_app/')))
+        self.assertTrue(consulta['plan'])
+        self.assertTrue(all('EXPLAIN' not in r['query'] for r in registros))
+
+    def test_falha_do_explain_nao_afeta_a_transacao(self):
+        """Testa que um EXPLAIN com erro do driver vira texto no plano e a transação continua utilizável"""
+        with transaction.atomic():
+            plano = explain(connection, 'SELECT * FROM tabela_inexistente', ())
+            self.assertEqual(Basket.objects.count(), 1)
+
+        self.assertTrue(plano[0].startswith('EXPLAIN falhou'))
+        self.assertIn('tabela_inexistente', plano[0])
+
+    def test_abaixo_do_limite_nao_registra(self):
+        with self.settings(SLOW_QUERY_THRESHOLD_MS=10_000, SLOW_QUERY_LOG=self.arquivo.name):
+            list(Basket.objects.all())
+        self.assertEqual(read_log(self.arquivo.name), [])
+
+    def test_relatorio(self):
+        """Testa a agregação por fingerprint e o comando slow_queries"""
+        with self.settings(SLOW_QUERY_THRESHOLD_MS=0, SLOW_QUERY_LOG=self.arquivo.name), \
+                self.assertLogs('core_app.slow_queries', 'WARNING'):
+            for _ in range(3):
+                list(Basket.objects.filter(nome='Lista'))
+            list(Basket.objects.filter(pk=self.basket.id))
+
+        linhas = report(read_log(self.arquivo.name), top=1, sort='count')
+        self.assertEqual(linhas[0]['count'], 3)
+        self.assertIn('core_app/tests.py', linhas[0]['call_sites'][0][0])
+
+        saida = StringIO()
+        call_command('slow_queries', '--file', self.arquivo.name, '--top', '2', stdout=saida)
+        self.assertIn('#2', saida.getvalue())
+        self.assertIn('plano:', saida.getvalue())
+
+
+class SeedScaleTest(TestCase):
+    """Testes para o gerador de dados em escala"""
+
+    def gerar(self, seed=7):
+        """Dados gerados, sem ids nem datas (que dependem do momento da geração)"""
+        seed_scale(products=40, baskets=30, items=400, establishments=8, seed=seed, chunk_size=64)
+        nomes = dict(Produto.objects.values_list('pk', 'nome'))
+        return (
+            list(Produto.objects.order_by('pk').values_list('nome', 'preco')),
+            list(Basket.objects.order_by('pk').annotate(n=Count('itens')).values_list('nome', 'estabelecimento', 'n')),
+            [(nomes[pid], qtd) for pid, qtd in BasketItem.objects.order_by('pk').values_list('produto_id', 'quantidade')],
+        )
+
+    def test_contagens_e_distribuicoes(self):
+        saida = StringIO()
+        call_command('seed_scale', '--products', '40', '--baskets', '30', '--items', '400',
+                     '--establishments', '8', '--chunk-size', '64', stdout=saida)
+
+        self.assertEqual(Produto.objects.count(), 40)
+        self.assertEqual(Basket.objects.count(), 30)
+        self.assertEqual(BasketItem.objects.count(), 400)
+        self.assertIn('400 BasketItem', saida.getvalue())
+        self.assertLessEqual(Basket.objects.values('estabelecimento').distinct().count(), 8)
+        self.assertGreater(Basket.objects.values('data_criacao__date').distinct().count(), 1)
+
+        produto_ids = set(Produto.objects.values_list('pk', flat=True))
+        self.assertTrue(set(BasketItem.objects.values_list('produto_id', flat=True)) <= produto_ids)
+        self.assertFalse(Produto.objects.filter(preco__lte=0).exists())
+
+    def test_reprodutivel(self):
+        """Testa que a mesma semente gera os mesmos dados"""
+        primeira = self.gerar()
+        call_command('seed_scale', '--clear', '--products', '0', '--baskets', '0', '--items', '0',
+                     stdout=StringIO())
+        self.assertFalse(Produto.objects.exists())
+        self.assertEqual(self.gerar(), primeira)
+        call_command('seed_scale', '--clear', '--products', '0', '--baskets', '0', '--items', '0',
+                     stdout=StringIO())
+        self.assertNotEqual(self.gerar(seed=8)[0], primeira[0])
+
+    def test_tamanhos_assimetricos(self):
+        valores = tamanhos(random.Random(1), 1000, 20000, maximo=300)
+        self.assertEqual(sum(valores), 20000)
+        self.assertLessEqual(max(valores), 300)
+        self.assertGreater(max(valores), 5 * sorted(valores)[500])
+
+
+class IdempotencyKeyTest(APITestCase):
+    """Testes para as escritas com Idempotency-Key"""
+
+    def setUp(self):
+        self.basket = Basket.objects.create(nome="Lista", estabelecimento="Mercado")
+
+    @patch('requests.get')
+    def test_repeticao_nao_duplica(self, mock_get):
+        """Testa que a repetição recebe a primeira resposta sem criar outro item"""
+        dados = {'basket': self.basket.id, 'produto_id': 1, 'quantidade': 2}
+        primeira = self.client.post(reverse('basketitem-list'), dados, format='json', HTTP_IDEMPOTENCY_KEY='abc-1')
+        repetida = self.client.post(reverse('basketitem-list'), dados, format='json', HTTP_IDEMPOTENCY_KEY='abc-1')
+
+        self.assertEqual(primeira.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(repetida.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(repetida.json(), primeira.json())
+        self.assertEqual(repetida['Idempotent-Replayed'], 'true')
+        self.assertFalse(primeira.has_header('Idempotent-Replayed'))
+        self.assertEqual(BasketItem.objects.count(), 1)
+
+    def test_chaves_por_metodo_e_caminho(self):
+        """Testa que a mesma chave vale separadamente para cada escrita"""
+        self.client.post(reverse('produto-list'), {'nome': 'Feijão', 'preco': '4.50'}, HTTP_IDEMPOTENCY_KEY='k')
+        produto = Produto.objects.get()
+        response = self.client.patch(reverse('produto-detail', args=[produto.id]), {'preco': '5.00'},
+                                     format='json', HTTP_IDEMPOTENCY_KEY='k')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(Produto.objects.get().preco, Decimal('5.00'))
+        self.assertEqual(IdempotencyKey.objects.count(), 2)
+
+    def test_outro_corpo_com_mesma_chave(self):
+        self.client.post(reverse('basketlist-list'), {'nome': 'A', 'estabelecimento': 'X'}, HTTP_IDEMPOTENCY_KEY='k')
+        response = self.client.post(reverse('basketlist-list'), {'nome': 'B', 'estabelecimento': 'X'},
+                                    HTTP_IDEMPOTENCY_KEY='k')
+
+        self.assertEqual(response.status_code, status.HTTP_422_UNPROCESSABLE_ENTITY)
+        self.assertEqual(Basket.objects.count(), 2)
+
+    def test_erro_nao_guardado(self):
+        """Testa que, após um erro de validação, a mesma chave pode ser usada de novo"""
+        response = self.client.post(reverse('produto-list'), {'nome': 'Feijão'}, HTTP_IDEMPOTENCY_KEY='k')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(IdempotencyKey.objects.exists())
+
+        response = self.client.post(reverse('produto-list'), {'nome': 'Feijão', 'preco': '4.50'},
+                                    HTTP_IDEMPOTENCY_KEY='k')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+    def test_chave_vencida(self):
+        """Testa que uma chave vencida executa a escrita de novo"""
+        dados = {'nome': 'Feijão', 'preco': '4.50'}
+        self.client.post(reverse('produto-list'), dados, HTTP_IDEMPOTENCY_KEY='k')
+        IdempotencyKey.objects.update(expira_em=datetime.now(timezone.utc) - timedelta(seconds=1))
+        response = self.client.post(reverse('produto-list'), dados, HTTP_IDEMPOTENCY_KEY='k')
+
+        self.assertFalse(response.has_header('Idempotent-Replayed'))
+        self.assertEqual(Produto.objects.count(), 2)
+
+    def test_sem_chave(self):
+        self.client.post(reverse('produto-list'), {'nome': 'Feijão', 'preco': '4.50'})
+        self.assertFalse(IdempotencyKey.objects.exists())
+
+    def test_limpeza_em_lotes(self):
+        """Testa que só as chaves vencidas são apagadas, lote a lote"""
+        agora = datetime.now(timezone.utc)
+        IdempotencyKey.objects.bulk_create(
+            IdempotencyKey(chave=str(i), escopo='POST /api/produtos/', hash_requisicao='',
+                           expira_em=agora + timedelta(hours=1 if i < 3 else -1))
+            for i in range(10)
+        )
+
+        with self.assertNumQueries(7):
+            self.assertEqual(delete_expired(batch_size=3), 7)
+        self.assertEqual(IdempotencyKey.objects.count(), 3)
+
+        saida = StringIO()
+        call_command('clear_idempotency_keys', stdout=saida)
+        self.assertIn('0 chaves vencidas apagadas', saida.getvalue())
+
+
+@override_settings(
+    ADMISSION_CONTROL_ENABLED=True,
+    ADMISSION_CLIENT_IP_HEADER='HTTP_X_REAL_IP',
+    ADMISSION_LIMITS={
+        'expensive': {'rate': 0.001, 'burst': 2, 'concurrency': 2, 'retry_after': 3},
+        'default': {'rate': 0.001, 'burst': 100},
+    },
+)
+@patch('requests.get')
+class AdmissionControlTest(APITestCase):
+    """Testes para os limites por cliente e o teto de concorrência"""
+
+    def setUp(self):
+        admission_cache().clear()
+
+    def test_limite_por_cliente(self, mock_get):
+        """Testa que cada cliente tem seu balde e que leituras baratas não são afetadas"""
+        url = reverse('basket-summary')
+        respostas = [self.client.get(url, HTTP_X_REAL_IP='10.0.0.1').status_code for _ in range(3)]
+
+        self.assertEqual(respostas, [200, 200, 429])
+        response = self.client.get(url, HTTP_X_REAL_IP='10.0.0.1')
+        self.assertGreaterEqual(int(response['Retry-After']), 900)
+        self.assertEqual(self.client.get(url, HTTP_X_REAL_IP='10.0.0.2').status_code, 200)
+        self.assertEqual(self.client.get(reverse('produto-list'), HTTP_X_REAL_IP='10.0.0.1').status_code, 200)
+
+    def test_teto_de_concorrencia(self, mock_get):
+        """Testa o 503 imediato com as vagas da classe ocupadas por outros workers"""
+        ocupada = acquire_slot('expensive', 2)
+        self.assertIsNotNone(ocupada)
+        self.assertEqual(self.client.get(reverse('basket-summary')).status_code, 200)
+        self.assertEqual(AdmissionSlot.objects.filter(ocupada_ate__isnull=False).count(), 1)
+
+        acquire_slot('expensive', 2)
+        response = self.client.get(reverse('basket-summary'), HTTP_X_REAL_IP='10.0.0.3')
+        self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.assertEqual(response['Retry-After'], '3')
+        self.assertIsNone(acquire_slot('expensive', 2))
+        self.assertEqual(self.client.get(reverse('produto-list')).status_code, 200)
+
+        release_slot(ocupada)
+        self.assertEqual(self.client.get(reverse('basket-summary'), HTTP_X_REAL_IP='10.0.0.4').status_code, 200)
+
+    def test_vaga_de_worker_encerrado_expira(self, mock_get):
+        reserva = acquire_slot('expensive', 1)
+        self.assertIsNone(acquire_slot('expensive', 1))
+
+        AdmissionSlot.objects.update(ocupada_ate=datetime.now(timezone.utc) - timedelta(seconds=1))
+        nova = acquire_slot('expensive', 1)
+        self.assertIsNotNone(nova)
+        # A reserva vencida não libera a vaga que passou a ser de outra requisição
+        release_slot(reserva)
+        self.assertIsNone(acquire_slot('expensive', 1))
+
+    @override_settings(ADMISSION_SLOT_TIMEOUT=300)
+    def test_validade_da_vaga_configuravel(self, mock_get):
+        """Testa que a reserva dura ADMISSION_SLOT_TIMEOUT, para cobrir requisições longas"""
+        inicio = datetime.now(timezone.utc)
+        _, ate = acquire_slot('expensive', 1)
+        self.assertGreaterEqual(ate, inicio + timedelta(seconds=300))
+        self.assertLess(ate, inicio + timedelta(seconds=310))
+
+    def test_balde_reabastece(self, mock_get):
+        cache = admission_cache()
+        self.assertEqual(take_token(cache, 'balde', rate=2, burst=1, agora=100), 0)
+        self.assertAlmostEqual(take_token(cache, 'balde', rate=2, burst=1, agora=100.25), 0.25)
+        self.assertEqual(take_token(cache, 'balde', rate=2, burst=1, agora=100.5), 0)
+
+
+_executadas = []
+
+
+@task
+def _registrar(valor):
+    _executadas.append(valor)
+
+
+@task
+def _falhar():
+    raise ValueError('falhou')
+
+
+class JobQueueTest(TestCase):
+    """Testes para a fila de tarefas em segundo plano"""
+
+    def setUp(self):
+        _executadas.clear()
+
+    def test_execucao_e_deduplicacao(self):
+        primeiro = enqueue(_registrar, 1, key='registrar')
+        self.assertEqual(enqueue(_registrar, 1, key='registrar').pk, primeiro.pk)
+        enqueue(_registrar, 2)
+        enqueue(_registrar, 3, delay=60)
+
+        self.assertEqual(run_pending(), 2)
+        self.assertEqual(_executadas, [1, 2])
+        self.assertEqual(Job.objects.count(), 1)
+
+    def test_nova_tentativa_com_espera(self):
+        """Testa a espera exponencial e o estado final após a última tentativa"""
+        job = enqueue(_falhar)
+        with self.assertLogs('core_app.jobs', 'WARNING'):
+            run_pending()
+        job.refresh_from_db()
+        self.assertEqual((job.estado, job.tentativas), (Job.PENDENTE, 1))
+        self.assertIn('ValueError', job.erro)
+        self.assertGreater(job.executar_em, datetime.now(timezone.utc))
+        self.assertEqual(run_pending(), 0)
+
+        Job.objects.update(executar_em=datetime.now(timezone.utc), max_tentativas=2)
+        with self.assertLogs('core_app.jobs', 'ERROR'):
+            run_pending()
+        job.refresh_from_db()
+        self.assertEqual((job.estado, job.tentativas), (Job.FALHOU, 2))
+
+    def test_reserva_vencida(self):
+        """Testa que a tarefa de um worker que morreu volta a ser executada"""
+        job = enqueue(_registrar, 1)
+        self.assertEqual(claim().pk, job.pk)
+        self.assertIsNone(claim())
+
+        Job.objects.update(reservado_ate=datetime.now(timezone.utc) - timedelta(seconds=1))
+        self.assertEqual(run_pending(), 1)
+        self.assertEqual(_executadas, [1])
+
+    def test_integrity_error_sem_pendente_e_repassado(self):
+        """Testa que uma IntegrityError que não é da deduplicação não prende enqueue num laço"""
+        with patch.object(Job, 'save', side_effect=IntegrityError), self.assertRaises(IntegrityError):
+            enqueue(_registrar, 1, key='sem-pendente')
+        self.assertFalse(Job.objects.exists())
+
+    def test_somente_tarefas_registradas(self):
+        enqueue('os.getcwd')
+        with self.assertLogs('core_app.jobs', 'WARNING'):
+            run_pending()
+        self.assertIn('LookupError', Job.objects.get().erro)
+
+    @override_settings(PROXY_PURGE_URL='http://nginx', PROXY_PURGE_ACCEPTS=['application/json'], JOBS_ENABLED=True)
+    @patch('core_app.purge.requests.request')
+    def test_purga_pela_fila(self, mock_request):
+        """Testa que a purga após a escrita vai para a fila e é executada pelo worker"""
+        with self.captureOnCommitCallbacks(execute=True):
+            produto = Produto.objects.create(nome="Arroz", preco=5.99)
+        self.assertEqual(
+            set(Job.objects.values_list('chave', flat=True)),
+            {f'purge:catalog produto:{produto.id}', f'refresh-produto:{produto.id}'},
+        )
+        mock_request.assert_not_called()
+
+        with patch('core_app.jobs.close_old_connections'):
+            call_command('run_workers', '--burst', '--processes', '1', '--threads', '1', stdout=StringIO())
+        urls = [call.args[1] for call in mock_request.call_args_list]
+        self.assertEqual(urls, [f'http://nginx/api/produtos/{produto.id}/'])
+        self.assertFalse(Job.objects.exists())
+
+
+class WarmupTest(TestCase):
+    """Testes para o aquecimento dos workers e o endpoint /ready"""
+
+    def setUp(self):
+        self.arroz = Produto.objects.create(nome="Arroz", preco=5.99)
+        self.feijao = Produto.objects.create(nome="Feijão", preco=7.50)
+        basket = Basket.objects.create(nome="Lista", estabelecimento="Mercado")
+        BasketItem.objects.create(basket=basket, produto_id=self.arroz.id, quantidade=1)
+        self.fake = ItemsAPIFake([
+            {'id': self.arroz.id, 'nome': 'Arroz', 'preco': '5.99'},
+            {'id': self.feijao.id, 'nome': 'Feijão', 'preco': '7.50'},
+        ])
+        self.addCleanup(catalog._quentes.update, versao=None, produtos={})
+        estado = dict(warmup._estado, etapas={})
+        self.addCleanup(warmup._estado.update, estado)
+
+    def test_produtos_quentes(self):
+        """Testa que os produtos pré-carregados dispensam a API até o catálogo mudar"""
+        with BudgetRecorder(self.fake) as recorder:
+            warmup.warm_up()
+        self.assertEqual(len(recorder.calls), 1)
+        self.assertEqual(set(warmup._estado['etapas']), {'urls', 'serializers', 'db', 'catalogo'})
+        self.assertEqual(warmup._estado['etapas']['catalogo']['itens'], 1)
+
+        with BudgetRecorder(self.fake) as recorder:
+            catalogo = CatalogoProdutos()
+            catalogo.prefetch([self.arroz.id, self.feijao.id])
+        self.assertEqual([chamada for chamada, _ in recorder.calls], [f'GET {settings.ITEMS_API_URL}{self.feijao.id}/'])
+
+        bump_versions(CATALOG)
+        self.assertEqual(catalog.produtos_quentes(), {})
+
+    def test_falha_de_etapa_nao_interrompe(self):
+        with patch.dict(warmup.STEPS, urls=lambda: 1 / 0), self.assertLogs('core_app.warmup', 'ERROR'):
+            warmup.warm_up(('urls', 'db'))
+        self.assertIsNone(warmup._estado['etapas']['urls']['itens'])
+        self.assertEqual(warmup._estado['etapas']['db']['itens'], len(settings.DATABASES))
+
+    def test_ready(self):
+        """Testa que /ready só responde 200 após o aquecimento"""
+        warmup._estado.update(iniciado=True, pronto=False)
+        response = self.client.get(reverse('ready'))
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response['Retry-After'], '1')
+
+        with BudgetRecorder(self.fake), patch('core_app.warmup.connections.close_all'), \
+                self.assertLogs('core_app.warmup', 'INFO'):
+            warmup._estado['iniciado'] = False
+            warmup.start().join()
+        response = self.client.get(reverse('ready'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['status'], 'pronto')
+        self.assertIsNotNone(response.json()['total_ms'])
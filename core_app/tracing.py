@@ -0,0 +1,237 @@
+"""
+Rastreamento distribuído com propagação W3C ``traceparent``.
+
+O ``TracingMiddleware`` continua o trace recebido no cabeçalho
+``traceparent`` (ou inicia um novo) e cria spans para a requisição, para
+cada consulta ao banco e para cada chamada externa (ver
+``core_app.instrumentation.track_outbound``), que leva o ``traceparent``
+adiante: uma requisição do basket_app e as consultas que ela provoca no
+items_app compartilham o mesmo ``trace_id``.
+
+Requisições fora da amostragem (``TRACING_SAMPLE_RATE`` ou flag ``00``
+recebida) não geram spans, mas o contexto segue adiante com a flag de
+amostragem desligada, para que os serviços chamados não iniciem outro trace.
+
+Os spans de cada requisição são exportados no formato JSON do OTLP
+(``ExportTraceServiceRequest``): uma linha por requisição em
+``TRACING_FILE`` e/ou um POST para ``TRACING_OTLP_ENDPOINT``
+(ex.: ``http://collector:4318/v1/traces``).
+"""
+import json
+import logging
+import random
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+
+import requests
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+_current_span = ContextVar('current_span', default=None)
+# traceparent propagado por requisições fora da amostragem
+_nao_amostrado = ContextVar('traceparent_nao_amostrado', default=None)
+_TRACEPARENT = re.compile(r'^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$')
+_file_lock = threading.Lock()
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='exporta-traces')
+
+# Tipos de span do OTLP
+KINDS = {'internal': 1, 'server': 2, 'client': 3}
+
+
+def _random_hex(bits):
+    valor = 0
+    while not valor:
+        valor = random.getrandbits(bits)
+    return f'{valor:0{bits // 4}x}'
+
+
+def parse_traceparent(value):
+    """``(trace_id, parent_id, sampled)`` de um ``traceparent`` válido, ou ``None``"""
+    match = _TRACEPARENT.match((value or '').strip().lower())
+    if not match or match.group(1) == '0' * 32 or match.group(2) == '0' * 16:
+        return None
+    return match.group(1), match.group(2), bool(int(match.group(3), 16) & 1)
+
+
+class Span:
+    """Operação com início e fim dentro de um trace"""
+
+    def __init__(self, name, trace_id, parent_id, kind, spans, attributes=None):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = _random_hex(64)
+        self.parent_id = parent_id
+        self.kind = kind
+        self.attributes = dict(attributes or {})
+        self.error = None
+        self.start = time.time_ns()
+        self.end = None
+        self._spans = spans
+
+    @property
+    def traceparent(self):
+        return f'00-{self.trace_id}-{self.span_id}-01'
+
+    def finish(self):
+        self.end = time.time_ns()
+        self._spans.append(self)
+
+    def as_otlp(self):
+        span = {
+            'traceId': self.trace_id,
+            'spanId': self.span_id,
+            'name': self.name,
+            'kind': KINDS[self.kind],
+            'startTimeUnixNano': str(self.start),
+            'endTimeUnixNano': str(self.end),
+            'attributes': [_otlp_attribute(chave, valor) for chave, valor in self.attributes.items()],
+            'status': {'code': 2, 'message': self.error} if self.error else {'code': 1},
+        }
+        if self.parent_id:
+            span['parentSpanId'] = self.parent_id
+        return span
+
+
+def _otlp_attribute(key, value):
+    if isinstance(value, bool):
+        return {'key': key, 'value': {'boolValue': value}}
+    if isinstance(value, int):
+        return {'key': key, 'value': {'intValue': str(value)}}
+    return {'key': key, 'value': {'stringValue': str(value)}}
+
+
+def current_span():
+    return _current_span.get()
+
+
+@contextmanager
+def start_span(name, kind='internal', **attributes):
+    """Span filho do span atual; sem trace ativo, não faz nada"""
+    parent = _current_span.get()
+    if parent is None:
+        yield None
+        return
+
+    span = Span(name, parent.trace_id, parent.span_id, kind, parent._spans, attributes)
+    token = _current_span.set(span)
+    try:
+        yield span
+    except Exception as e:
+        span.error = f'{type(e).__name__}: {e}'
+        raise
+    finally:
+        _current_span.reset(token)
+        span.finish()
+
+
+def propagation_headers():
+    """Cabeçalhos para levar o trace atual a uma chamada externa"""
+    span = _current_span.get()
+    if span is not None:
+        return {'traceparent': span.traceparent}
+    traceparent = _nao_amostrado.get()
+    return {'traceparent': traceparent} if traceparent else {}
+
+
+def export(spans):
+    """Grava/envia os spans de uma requisição no formato JSON do OTLP"""
+    documento = {
+        'resourceSpans': [{
+            'resource': {'attributes': [
+                _otlp_attribute('service.name', getattr(settings, 'TRACING_SERVICE_NAME', 'comprasaux')),
+            ]},
+            'scopeSpans': [{
+                'scope': {'name': 'core_app.tracing'},
+                'spans': [span.as_otlp() for span in spans],
+            }],
+        }],
+    }
+
+    arquivo = getattr(settings, 'TRACING_FILE', None)
+    if arquivo:
+        linha = json.dumps(documento, ensure_ascii=False)
+        with _file_lock, open(arquivo, 'a', encoding='utf-8') as destino:
+            destino.write(linha + '\n')
+
+    endpoint = getattr(settings, 'TRACING_OTLP_ENDPOINT', None)
+    if endpoint:
+        _executor.submit(_send, endpoint, documento)
+
+
+def _send(endpoint, documento):
+    try:
+        requests.post(endpoint, json=documento, timeout=2)
+    except requests.RequestException as e:
+        logger.warning('Falha ao exportar traces para %s: %s', endpoint, e)
+
+
+class TracingMiddleware:
+    """
+    Abre o span da requisição e registra as consultas ao banco. Deve ser o
+    primeiro middleware da lista.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not getattr(settings, 'TRACING_ENABLED', False):
+            return self.get_response(request)
+
+        recebido = parse_traceparent(request.META.get('HTTP_TRACEPARENT'))
+        if recebido:
+            trace_id, parent_id, sampled = recebido
+        else:
+            trace_id, parent_id = _random_hex(128), None
+            sampled = random.random() < getattr(settings, 'TRACING_SAMPLE_RATE', 1.0)
+        if not sampled:
+            # Sem span próprio, o recebido continua como pai
+            traceparent = f'00-{trace_id}-{parent_id or _random_hex(64)}-00'
+            token = _nao_amostrado.set(traceparent)
+            try:
+                return self.get_response(request)
+            finally:
+                _nao_amostrado.reset(token)
+
+        spans = []
+        span = Span(request.method, trace_id, parent_id, 'server', spans, {
+            'http.method': request.method,
+            'http.target': request.get_full_path(),
+        })
+        token = _current_span.set(span)
+        try:
+            with ExitStack() as stack:
+                for alias in connections:
+                    stack.enter_context(connections[alias].execute_wrapper(_db_span))
+                response = self.get_response(request)
+        except Exception as e:
+            span.error = f'{type(e).__name__}: {e}'
+            raise
+        finally:
+            _current_span.reset(token)
+            match = getattr(request, 'resolver_match', None)
+            if match:
+                span.name = f'{request.method} {match.view_name}'
+                span.attributes['http.route'] = match.route
+            span.finish()
+
+        span.attributes['http.status_code'] = response.status_code
+        if response.status_code >= 500:
+            span.error = f'HTTP {response.status_code}'
+        response['X-Trace-Id'] = trace_id
+        export(spans)
+        return response
+
+
+def _db_span(execute, sql, params, many, context):
+    with start_span('db.query', 'client', **{
+        'db.system': context['connection'].vendor,
+        'db.statement': sql[:500],
+    }):
+        return execute(sql, params, many, context)
@@ -0,0 +1,9 @@
+from django.contrib import admin
+from django.urls import path
+
+from .admin import perfil_download, perfis
+
+urlpatterns = [
+    path('perfis/', admin.site.admin_view(perfis), name='perfis'),
+    path('perfis/<str:nome>', admin.site.admin_view(perfil_download), name='perfil-download'),
+]
@@ -0,0 +1,96 @@
+"""
+Versões de dados usadas como parte das chaves de cache.
+
+Cada namespace (ex.: ``catalog``, ``basket:3``) possui um número de versão
+guardado no cache do Django. Toda escrita incrementa a versão do namespace,
+tornando obsoletas, em O(1), todas as entradas de cache derivadas dele.
+"""
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+from django.dispatch import Signal
+
+KEY_PREFIX = 'versao'
+
+# Namespaces compartilhados entre os módulos
+CATALOG = 'catalog'
+BASKETS = 'baskets'
+
+
+# Enviado após o commit das escritas que incrementaram versões, com o
+# argumento ``namespaces`` (ex.: para purgar o cache do proxy reverso)
+versions_bumped = Signal()
+
+
+def basket_namespace(basket_id):
+    """Namespace de versão de um carrinho específico"""
+    return f'basket:{basket_id}'
+
+
+def produto_namespace(produto_id):
+    """Namespace de versão de um produto específico"""
+    return f'produto:{produto_id}'
+
+
+def _cache_key(namespace):
+    return f'{KEY_PREFIX}:{namespace}'
+
+
+def _initial_version():
+    # Baseada no relógio: se a chave for despejada do cache, a nova versão
+    # nunca coincide com uma versão anterior ainda usada em outras chaves.
+    return time.time_ns() // 1000
+
+
+def get_version(namespace):
+    """Retorna a versão atual do namespace, inicializando-a se necessário"""
+    key = _cache_key(namespace)
+    version = cache.get(key)
+    if version is None:
+        version = _initial_version()
+        if not cache.add(key, version, timeout=None):
+            version = cache.get(key, version)
+    return version
+
+
+def get_versions(*namespaces):
+    """Retorna as versões de vários namespaces, na ordem recebida"""
+    keys = [_cache_key(namespace) for namespace in namespaces]
+    found = cache.get_many(keys)
+    return tuple(
+        found[key] if key in found else get_version(namespace)
+        for key, namespace in zip(keys, namespaces)
+    )
+
+
+def bump_version(namespace):
+    """Incrementa a versão do namespace, invalidando o cache derivado dele"""
+    key = _cache_key(namespace)
+    try:
+        return cache.incr(key)
+    except ValueError:
+        version = _initial_version()
+        cache.set(key, version, timeout=None)
+        return version
+
+
+def bump_versions(*namespaces):
+    """
+    Incrementa as versões imediatamente e, dentro de uma transação, de novo
+    no commit: uma leitura concorrente que tenha guardado dados ainda não
+    confirmados sob a versão intermediária nunca volta a ser servida.
+    """
+    for namespace in namespaces:
+        bump_version(namespace)
+
+    em_transacao = transaction.get_connection().in_atomic_block
+
+    def after_commit():
+        if em_transacao:
+            for namespace in namespaces:
+                bump_version(namespace)
+        versions_bumped.send(sender=None, namespaces=namespaces)
+
+    # Fora de transação o callback é executado imediatamente
+    transaction.on_commit(after_commit)
@@ -0,0 +1,179 @@
+"""
+Mixins de viewsets compartilhados entre os módulos.
+"""
+from django.core.exceptions import FieldDoesNotExist
+from django.db import transaction
+from django.db.models import F
+from rest_framework import serializers, status
+from rest_framework.exceptions import APIException
+from rest_framework.response import Response
+
+from .instrumentation import track_serialization
+from .renderers import ColumnarData, ColumnarRenderer
+from .versioning import bump_versions
+
+
+def values_columns(serializer):
+    """
+    Mapeia os campos legíveis do serializer para colunas do modelo.
+
+    Retorna uma lista de ``(nome, coluna, conversor)`` ou ``None`` quando
+    algum campo não corresponde a uma coluna simples (SerializerMethodField,
+    ``source`` composto, relações que não sejam chave primária etc.).
+    """
+    model = serializer.Meta.model
+    columns = []
+    for nome, field in serializer.fields.items():
+        if field.write_only:
+            continue
+        if isinstance(field, serializers.SerializerMethodField) or '.' in field.source or field.source == '*':
+            return None
+        try:
+            model_field = model._meta.get_field(field.source)
+        except FieldDoesNotExist:
+            return None
+
+        if isinstance(field, serializers.PrimaryKeyRelatedField) and field.pk_field is None:
+            columns.append((nome, model_field.attname, None))
+        elif model_field.is_relation or isinstance(field, serializers.RelatedField):
+            return None
+        else:
+            columns.append((nome, model_field.attname, field.to_representation))
+    return columns
+
+
+class ValuesListMixin:
+    """
+    Caminho rápido para listagens.
+
+    Quando todos os campos pedidos (ver ``SparseFieldsMixin``) são colunas
+    simples do modelo, a listagem é montada com ``values()``, sem instanciar
+    modelos nem avaliar SerializerMethodFields. A saída é idêntica à do
+    serializer. Com ``?format=columnar`` a listagem vem de ``values_list()``
+    já no formato colunar.
+    """
+
+    def get_values_columns(self):
+        return values_columns(self.get_serializer())
+
+    def list(self, request, *args, **kwargs):
+        columns = self.get_values_columns()
+        if not columns:
+            return super().list(request, *args, **kwargs)
+
+        # prefetch_related não se aplica a values()
+        queryset = self.filter_queryset(self.get_queryset()).prefetch_related(None)
+        nomes_colunas = [coluna for _, coluna, _ in columns]
+        if getattr(request.accepted_renderer, 'format', None) == ColumnarRenderer.format:
+            # Formato colunar montado direto de values_list(), sem dicionários por linha
+            rows, serialize = queryset.values_list(*nomes_colunas), self.serialize_columns
+        else:
+            rows, serialize = queryset.values(*nomes_colunas), self.serialize_values
+
+        page = self.paginate_queryset(rows)
+        with track_serialization():
+            data = serialize(page if page is not None else rows, columns)
+
+        if page is not None:
+            return self.get_paginated_response(data)
+        return Response(data)
+
+    @staticmethod
+    def serialize_values(rows, columns):
+        data = []
+        for row in rows:
+            item = {}
+            for nome, coluna, conversor in columns:
+                valor = row[coluna]
+                item[nome] = conversor(valor) if conversor is not None and valor is not None else valor
+            data.append(item)
+        return data
+
+    @staticmethod
+    def serialize_columns(rows, columns):
+        valores = list(zip(*rows)) or [()] * len(columns)
+        data = []
+        for (_, _, conversor), coluna in zip(columns, valores):
+            if conversor is None:
+                data.append(list(coluna))
+            else:
+                data.append([conversor(valor) if valor is not None else None for valor in coluna])
+        return ColumnarData(
+            fields=[nome for nome, _, _ in columns],
+            columns=data,
+            count=len(data[0]) if data else 0,
+        )
+
+
+class VersionBumpMixin:
+    """
+    Incrementa, a cada escrita feita pela viewset, as versões dos dados
+    afetados (ver ``core_app.versioning``).
+
+    Complementa os signals dos modelos: em atualizações, as versões do estado
+    anterior também são incrementadas (ex.: item movido para outro carrinho).
+    """
+
+    def get_version_namespaces(self, instance):
+        raise NotImplementedError('Defina os namespaces de versão da viewset')
+
+    def perform_create(self, serializer):
+        super().perform_create(serializer)
+        bump_versions(*self.get_version_namespaces(serializer.instance))
+
+    def perform_update(self, serializer):
+        anteriores = self.get_version_namespaces(serializer.instance)
+        super().perform_update(serializer)
+        bump_versions(*dict.fromkeys([*anteriores, *self.get_version_namespaces(serializer.instance)]))
+
+    def perform_destroy(self, instance):
+        namespaces = self.get_version_namespaces(instance)
+        super().perform_destroy(instance)
+        bump_versions(*namespaces)
+
+
+class PreconditionFailed(APIException):
+    status_code = status.HTTP_412_PRECONDITION_FAILED
+    default_detail = 'O objeto foi alterado por outra requisição; busque a versão atual e tente de novo.'
+    default_code = 'precondition_failed'
+
+
+class OptimisticConcurrencyMixin:
+    """
+    Controle de concorrência otimista com a coluna ``versao`` do modelo.
+
+    PUT, PATCH e DELETE aceitam ``If-Match`` com a ``versao`` lida pelo
+    cliente (``"3"`` ou ``3``; ``*`` aceita qualquer uma); sem o cabeçalho
+    vale a versão lida na própria requisição. A escrita começa com
+    ``UPDATE ... SET versao = versao + 1 WHERE id = ? AND versao = ?`` na
+    mesma transação: se outra requisição gravou antes, nenhuma linha é
+    alterada e a resposta é 412, sem bloquear a linha durante a leitura.
+    """
+    version_field = 'versao'
+
+    def expected_version(self, instance):
+        versao = getattr(instance, self.version_field)
+        if_match = self.request.headers.get('If-Match', '*').strip()
+        if if_match != '*' and str(versao) not in {tag.strip().strip('"') for tag in if_match.split(',')}:
+            raise PreconditionFailed()
+        return versao
+
+    def claim_version(self, instance):
+        """Incrementa a versão se ainda for a esperada; senão, 412"""
+        esperada = self.expected_version(instance)
+        alteradas = type(instance)._base_manager.filter(
+            pk=instance.pk, **{self.version_field: esperada},
+        ).update(**{self.version_field: F(self.version_field) + 1})
+        if not alteradas:
+            raise PreconditionFailed()
+        setattr(instance, self.version_field, esperada + 1)
+
+    def perform_update(self, serializer):
+        with transaction.atomic():
+            self.claim_version(serializer.instance)
+            super().perform_update(serializer)
+
+    def perform_destroy(self, instance):
+        with transaction.atomic():
+            self.claim_version(instance)
+            super().perform_destroy(instance)
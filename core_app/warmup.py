@@ -0,0 +1,153 @@
+"""
+Aquecimento dos workers ao iniciar.
+
+Sem ele, as primeiras requisições de cada worker pagam a montagem das URLs,
+a introspecção dos serializers, a abertura das conexões com o banco e a busca
+dos produtos. ``start`` é chamado pelo ``post_worker_init`` do gunicorn (ver
+``gunicorn.conf.py``) e executa:
+
+- na thread do worker: ``urls``, ``serializers`` e ``db`` (a conexão fica
+  com a thread que atende as requisições nos workers síncronos);
+- em segundo plano: ``catalogo``, que pré-carrega os produtos dos itens mais
+  recentes (``WARMUP_HOT_PRODUCTS``) pela API do items_app. Como a API pode
+  ser servida pelo próprio worker, essa etapa não pode bloqueá-lo.
+
+Com ``--preload``, ``urls`` e ``serializers`` também rodam no processo
+principal, antes do fork, e os workers herdam o resultado.
+
+``/ready`` responde 503 até o aquecimento terminar e depois 200 com o tempo
+de cada etapa, também registrado no logger ``core_app.warmup``. Fora do
+gunicorn (``runserver``), a primeira consulta a ``/ready`` inicia o
+aquecimento.
+"""
+import logging
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.db import DatabaseError, connections
+from django.http import JsonResponse
+from django.urls import URLResolver, get_resolver
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_estado = {'iniciado': False, 'pronto': False, 'etapas': {}, 'total_ms': None}
+
+
+def _padroes(resolver):
+    for padrao in resolver.url_patterns:
+        yield padrao
+        if isinstance(padrao, URLResolver):
+            yield from _padroes(padrao)
+
+
+def warm_urls():
+    """Monta as tabelas de reverse e compila as expressões das URLs"""
+    resolver = get_resolver()
+    resolver.reverse_dict  # noqa: B018 - propriedade preenchida sob demanda
+    for padrao in _padroes(resolver):
+        padrao.pattern.regex  # noqa: B018
+    return len(resolver.reverse_dict)
+
+
+def warm_serializers():
+    """Monta os campos dos serializers das viewsets"""
+    from .viewsets import ValuesListMixin, values_columns
+
+    classes = {}
+    for padrao in _padroes(get_resolver()):
+        cls = getattr(getattr(padrao, 'callback', None), 'cls', None)
+        if getattr(cls, 'serializer_class', None) is not None:
+            classes[cls] = cls.serializer_class
+    for cls, serializer_class in classes.items():
+        serializer = serializer_class()
+        if issubclass(cls, ValuesListMixin):
+            values_columns(serializer)
+        else:
+            serializer.fields  # noqa: B018
+    return len(classes)
+
+
+def warm_db():
+    """Abre as conexões com o primário e as réplicas"""
+    abertas = 0
+    for alias in connections:
+        try:
+            connections[alias].ensure_connection()
+            abertas += 1
+        except DatabaseError as e:
+            logger.warning('Aquecimento: banco %s indisponível: %s', alias, e)
+    return abertas
+
+
+def warm_catalog():
+    """Pré-carrega os produtos mais frequentes entre os itens mais recentes"""
+    from basket_app.catalog import preload
+    from basket_app.models import BasketItem
+
+    limite = getattr(settings, 'WARMUP_HOT_PRODUCTS', 500)
+    if not limite:
+        return 0
+    recentes = BasketItem.objects.order_by('-pk').values_list('produto_id', flat=True)
+    frequencia = Counter(recentes[:getattr(settings, 'WARMUP_RECENT_ITEMS', 5000)])
+    return preload([produto_id for produto_id, _ in frequencia.most_common(limite)])
+
+
+STEPS = {
+    'urls': warm_urls,
+    'serializers': warm_serializers,
+    'db': warm_db,
+    'catalogo': warm_catalog,
+}
+LOCAL_STEPS = ('urls', 'serializers', 'db')
+BACKGROUND_STEPS = ('catalogo',)
+
+
+def warm_up(etapas=tuple(STEPS)):
+    """Executa as etapas na thread atual; falhas são registradas e não interrompem as demais"""
+    for nome in etapas:
+        inicio = time.perf_counter()
+        try:
+            resultado = STEPS[nome]()
+        except Exception:
+            logger.exception('Aquecimento: falha na etapa %s', nome)
+            resultado = None
+        _estado['etapas'][nome] = {
+            'ms': round((time.perf_counter() - inicio) * 1000, 1),
+            'itens': resultado,
+        }
+
+
+def _em_segundo_plano(inicio):
+    try:
+        warm_up(BACKGROUND_STEPS)
+    finally:
+        connections.close_all()
+        _estado.update(pronto=True, total_ms=round((time.perf_counter() - inicio) * 1000, 1))
+        logger.info('Aquecimento concluído em %.1f ms: %s', _estado['total_ms'], _estado['etapas'])
+
+
+def start():
+    """Aquece o processo uma única vez; retorna a thread das etapas em segundo plano"""
+    with _lock:
+        if _estado['iniciado']:
+            return None
+        _estado['iniciado'] = True
+    inicio = time.perf_counter()
+    warm_up(LOCAL_STEPS)
+    thread = threading.Thread(target=_em_segundo_plano, args=(inicio,), name='aquecimento', daemon=True)
+    thread.start()
+    return thread
+
+
+def ready_view(request):
+    """Endpoint ``/ready``: 200 somente após o aquecimento do worker"""
+    if not _estado['iniciado']:
+        threading.Thread(target=start, name='aquecimento', daemon=True).start()
+    if not _estado['pronto']:
+        response = JsonResponse({'status': 'aquecendo', 'etapas': _estado['etapas']}, status=503)
+        response['Retry-After'] = '1'
+        return response
+    return JsonResponse({'status': 'pronto', 'total_ms': _estado['total_ms'], 'etapas': _estado['etapas']})
@@ -1,3 +1,121 @@
-from django.test import TestCase
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from unittest.mock import patch, Mock
+import requests
+from basket_app.models import Basket, BasketItem
+from items_app.models import Produto
 
-# Create your tests here.
+
+class FrontDadosIniciaisTest(TestCase):
+    """Testes para os dados iniciais renderizados no servidor"""
+
+    def setUp(self):
+        self.produto = Produto.objects.create(nome="Arroz", preco=5.99)
+        self.basket = Basket.objects.create(
+            nome="Lista Front",
+            estabelecimento="Supermercado Front"
+        )
+
+    def test_produtos_embute_versao_do_catalogo(self):
+        """Testa que a página de produtos embute só a versão do catálogo, não a lista"""
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse('produtos'))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'id="versao-catalogo"')
+        self.assertNotContains(response, '"nome": "Arroz"')
+
+    def test_versao_do_catalogo_muda_apos_escrita(self):
+        """Testa que uma escrita no catálogo invalida o cache do navegador"""
+        antes = self.client.get(reverse('produtos')).content
+        Produto.objects.create(nome="Feijão", preco=4.50)
+
+        self.assertNotEqual(self.client.get(reverse('produtos')).content, antes)
+
+    @patch('requests.get')
+    def test_carrinhos_embute_dados_iniciais(self, mock_get):
+        """Testa se a página de carrinhos embute a primeira página via json_script"""
+        response = self.client.get(reverse('carrinhos'))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'id="carrinhos-iniciais"')
+        self.assertContains(response, '"nome": "Lista Front"')
+        self.assertContains(response, '"count": 1')
+
+    @patch('requests.get')
+    def test_fragmento_degradado_nao_fica_em_cache(self, mock_get):
+        """Testa que dados iniciais montados com a API de produtos fora do ar são refeitos depois"""
+        BasketItem.objects.create(basket=self.basket, produto_id=self.produto.id, quantidade=2)
+        mock_get.side_effect = requests.ConnectionError
+        degradada = self.client.get(reverse('carrinhos'))
+        self.assertContains(degradada, '"valor_total": 0.0')
+        self.assertIn('no-store', degradada['Cache-Control'])
+
+        mock_response = Mock()
+        mock_response.status_code = 200
+        mock_response.json.return_value = {'nome': 'Arroz', 'preco': '5.99'}
+        mock_get.side_effect = None
+        mock_get.return_value = mock_response
+        response = self.client.get(reverse('carrinhos'))
+        self.assertContains(response, '"valor_total": 11.98')
+
+    @patch('requests.get')
+    def test_carrinho_detail_embute_dados_iniciais(self, mock_get):
+        """Testa se o detalhe embute carrinho e itens; os produtos vêm do cache do navegador"""
+        mock_response = Mock()
+        mock_response.status_code = 200
+        mock_response.json.return_value = {'nome': 'Arroz', 'preco': '5.99'}
+        mock_get.return_value = mock_response
+        BasketItem.objects.create(basket=self.basket, produto_id=self.produto.id, quantidade=2)
+        outro = Basket.objects.create(nome="Outra", estabelecimento="Outro")
+        BasketItem.objects.create(basket=outro, produto_id=self.produto.id, quantidade=7)
+
+        url = reverse('carrinho_detail', kwargs={'carrinho_id': self.basket.id})
+        response = self.client.get(url)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'id="carrinho-inicial"')
+        self.assertContains(response, 'id="itens-iniciais"')
+        self.assertContains(response, 'id="versao-catalogo"')
+        self.assertContains(response, '"subtotal": 11.98')
+        self.assertNotContains(response, '"quantidade": 7')
+
+    def test_carrinho_detail_inexistente(self):
+        """Testa que um carrinho inexistente é embutido como null"""
+        url = reverse('carrinho_detail', kwargs={'carrinho_id': 999})
+        response = self.client.get(url)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, '<script id="carrinho-inicial" type="application/json">null</script>')
+
+    @patch('requests.get')
+    def test_home_embute_estatisticas(self, mock_get):
+        """Testa se a página inicial embute as estatísticas"""
+        response = self.client.get(reverse('home'))
+
+        self.assertContains(response, '"total_produtos": 1')
+        self.assertContains(response, '"total_carrinhos": 1')
+
+    @override_settings(FRONT_INITIAL_DATA=False)
+    def test_dados_iniciais_desativados(self):
+        """Testa se as páginas voltam a carregar tudo via API quando desativado"""
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse('carrinhos'))
+
+        self.assertNotContains(response, 'id="carrinhos-iniciais"')
+
+
+class FrontCacheHeadersTest(TestCase):
+    """Testes para os cabeçalhos de cache das páginas"""
+
+    def test_paginas_privadas(self):
+        """Testa que páginas com token CSRF não são compartilhadas no proxy"""
+        response = self.client.get(reverse('produtos'))
+
+        self.assertEqual(response['Cache-Control'], 'private, no-cache')
+        self.assertEqual(response['Surrogate-Key'], 'catalog')
+
+    def test_detalhe_com_chave_do_carrinho(self):
+        response = self.client.get(reverse('carrinho_detail', kwargs={'carrinho_id': 5}))
+
+        self.assertEqual(response['Surrogate-Key'], 'catalog basket-5')
@@ -1,29 +1,129 @@
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.utils import make_template_fragment_key
 from django.shortcuts import render
 
+from basket_app.catalog import CatalogoProdutos
+from basket_app.models import Basket, BasketItem
+from basket_app.serializers import BasketSerializer, BasketItemSerializer
+from core_app.cache import is_degraded
+from core_app.http_cache import PRIVATE, surrogate_keys
+from core_app.versioning import BASKETS, CATALOG, basket_namespace, get_version, get_versions
+from items_app.models import Produto
 
+
+def _contexto_inicial(namespaces, **dados):
+    """
+    Monta o contexto com os dados iniciais da página.
+
+    Os dados são passados como callables: o template só os avalia quando o
+    fragmento em cache (chaveado pelas versões dos namespaces) não existe.
+    """
+    if not getattr(settings, 'FRONT_INITIAL_DATA', True):
+        return {'dados_iniciais': False}
+
+    return {
+        'dados_iniciais': True,
+        'cache_timeout': getattr(settings, 'FRONT_FRAGMENT_CACHE_TIMEOUT', 300),
+        'versoes': '-'.join(str(versao) for versao in get_versions(*namespaces)),
+        **dados,
+    }
+
+
+def _renderizar(request, template, context, fragmento, *vary_on):
+    """
+    Renderiza a página; o fragmento de dados iniciais montado com dados de
+    reserva (API de produtos fora do ar) é descartado do cache logo em seguida.
+    """
+    response = render(request, template, context)
+    if context.get('dados_iniciais') and is_degraded():
+        cache = caches['template_fragments' if 'template_fragments' in settings.CACHES else 'default']
+        cache.delete(make_template_fragment_key(fragmento, vary_on))
+    return response
+
+
+def _carrinhos(limite=None):
+    # Mesma ordem da API, cujas páginas seguintes a tabela carrega depois
+    queryset = Basket.objects.prefetch_related('itens').order_by('-data_criacao', '-id')
+    if limite is not None:
+        queryset = queryset[:limite]
+    return BasketSerializer(queryset, many=True).data
+
+
+# As páginas contêm token CSRF e por isso não são compartilhadas no proxy;
+# os cabeçalhos ainda informam de quais dados cada uma depende
+@surrogate_keys(lambda request: [CATALOG, BASKETS], PRIVATE)
 def home(request):
     """
     Página principal do sistema de compras
     """
-    return render(request, 'front_app/home.html')
+    context = _contexto_inicial(
+        [CATALOG, BASKETS],
+        estatisticas_iniciais=lambda: {
+            'total_produtos': Produto.objects.count(),
+            'total_carrinhos': Basket.objects.count(),
+        },
+        carrinhos_recentes_iniciais=lambda: _carrinhos(limite=5),
+    )
+    return _renderizar(request, 'front_app/home.html', context, 'front_home', context.get('versoes'))
 
 
+@surrogate_keys(lambda request: [CATALOG], PRIVATE)
 def produtos(request):
     """
     Página de listagem de produtos
     """
-    return render(request, 'front_app/produtos.html')
+    # O catálogo não é embutido: o navegador guarda as páginas já vistas e só
+    # as busca de novo quando a versão muda (ver makeRequest em base.html)
+    context = {
+        'versao_catalogo': get_version(CATALOG),
+        'tamanho_pagina': getattr(settings, 'FRONT_PAGE_SIZE', 100),
+    }
+    return render(request, 'front_app/produtos.html', context)
 
 
+@surrogate_keys(lambda request: [CATALOG, BASKETS], PRIVATE)
 def carrinhos(request):
     """
     Página de listagem de carrinhos
     """
-    return render(request, 'front_app/carrinhos.html')
+    # O valor total depende dos preços, por isso a versão do catálogo entra na chave.
+    # Só a primeira página é embutida, no formato das respostas paginadas da API
+    tamanho_pagina = getattr(settings, 'FRONT_PAGE_SIZE', 100)
+    context = _contexto_inicial(
+        [CATALOG, BASKETS],
+        carrinhos_iniciais=lambda: {
+            'count': Basket.objects.count(),
+            'results': _carrinhos(limite=tamanho_pagina),
+        },
+    )
+    context['tamanho_pagina'] = tamanho_pagina
+    return _renderizar(request, 'front_app/carrinhos.html', context, 'front_carrinhos', context.get('versoes'))
 
 
+@surrogate_keys(lambda request, carrinho_id: [CATALOG, basket_namespace(carrinho_id)], PRIVATE)
 def carrinho_detail(request, carrinho_id):
     """
     Página de detalhes de um carrinho específico
     """
-    return render(request, 'front_app/carrinho_detail.html', {'carrinho_id': carrinho_id})
\ No newline at end of file
+    # Carrinho e itens consultam os mesmos produtos
+    contexto_serializer = {'catalogo': CatalogoProdutos()}
+
+    def carrinho():
+        basket = Basket.objects.prefetch_related('itens').filter(id=carrinho_id).first()
+        return BasketSerializer(basket, context=contexto_serializer).data if basket else None
+
+    def itens():
+        queryset = BasketItem.objects.filter(basket_id=carrinho_id).select_related('basket')
+        return BasketItemSerializer(queryset, many=True, context=contexto_serializer).data
+
+    context = _contexto_inicial(
+        [CATALOG, basket_namespace(carrinho_id)],
+        carrinho_inicial=carrinho,
+        itens_iniciais=itens,
+    )
+    context.update(carrinho_id=carrinho_id, versao_catalogo=get_version(CATALOG))
+    return _renderizar(
+        request, 'front_app/carrinho_detail.html', context,
+        'front_carrinho_detail', carrinho_id, context.get('versoes'),
+    )
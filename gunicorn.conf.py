@@ -0,0 +1,47 @@
+"""
+Configuração do gunicorn (carregada automaticamente a partir da raiz do projeto).
+
+As métricas do Prometheus de cada worker são gravadas em
+``PROMETHEUS_MULTIPROC_DIR`` e agregadas na coleta de ``/metrics``.
+
+Cada worker é aquecido ao iniciar (core_app.warmup) e só responde 200 em
+``/ready`` depois disso. Com ``--preload``, as URLs e os serializers são
+preparados uma vez no processo principal, antes do fork.
+"""
+import os
+import shutil
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:8000')
+workers = int(os.environ.get('GUNICORN_WORKERS', 2))
+# Com DB_POOL, cada worker tem um pool de GUNICORN_THREADS + 1 conexões
+threads = int(os.environ.get('GUNICORN_THREADS', 1))
+# Requisições acima deste tempo têm o worker reiniciado; ADMISSION_SLOT_TIMEOUT parte dele
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 30))
+
+os.environ.setdefault('PROMETHEUS_MULTIPROC_DIR', '/tmp/comprasaux-prometheus')
+
+
+def on_starting(server):
+    # Valores de execuções anteriores não podem ser somados aos atuais
+    diretorio = os.environ['PROMETHEUS_MULTIPROC_DIR']
+    shutil.rmtree(diretorio, ignore_errors=True)
+    os.makedirs(diretorio, exist_ok=True)
+
+
+def when_ready(server):
+    if server.cfg.preload_app:
+        from core_app import warmup
+        warmup.warm_up(('urls', 'serializers'))
+
+
+def post_worker_init(worker):
+    from core_app import warmup
+    warmup.start()
+
+
+def child_exit(server, worker):
+    try:
+        from prometheus_client import multiprocess
+    except ImportError:
+        return
+    multiprocess.mark_process_dead(worker.pid)
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class ItemsAppConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'items_app'
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -1,8 +1,10 @@
 from rest_framework import serializers
+from core_app.instrumentation import TimedSerializerMixin
+from core_app.serializers import SparseFieldsMixin
 from .models import Produto
 
 
-class ProdutoSerializer(serializers.ModelSerializer):
+class ProdutoSerializer(TimedSerializerMixin, SparseFieldsMixin, serializers.ModelSerializer):
     """
     Serializer para o modelo Produto.
     Permite serialização e deserialização dos dados de produtos.
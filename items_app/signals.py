@@ -0,0 +1,11 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from core_app.versioning import CATALOG, bump_versions, produto_namespace
+from .models import Produto
+
+
+@receiver([post_save, post_delete], sender=Produto)
+def invalidar_catalogo(sender, instance, **kwargs):
+    """Qualquer alteração de produto gera uma nova versão do catálogo"""
+    bump_versions(CATALOG, produto_namespace(instance.pk))
@@ -114,3 +114,161 @@ class ProdutoAPITest(APITestCase):
         response = self.client.get(url)
         
         self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+    
+    def test_list_produtos_por_ids(self):
+        """Testa a busca em lote com ?ids="""
+        outro = Produto.objects.create(nome="Feijão", preco=4.50)
+        Produto.objects.create(nome="Açúcar", preco=3.20)
+        url = reverse('produto-list')
+        response = self.client.get(url, {'ids': f'{self.produto.id},{outro.id},999,x'})
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(sorted(p['id'] for p in response.data), sorted([self.produto.id, outro.id]))
+
+
+class ProdutoSparseFieldsTest(APITestCase):
+    """Testes para ?fields= e ?omit= na API de Produtos"""
+
+    def setUp(self):
+        self.produto = Produto.objects.create(nome="Arroz", preco=5.99)
+
+    def test_list_fields(self):
+        """Testa a listagem retornando apenas os campos pedidos"""
+        url = reverse('produto-list')
+        response = self.client.get(url, {'fields': 'id,nome'})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, [{'id': self.produto.id, 'nome': 'Arroz'}])
+
+    def test_list_omit(self):
+        """Testa a listagem omitindo campos"""
+        url = reverse('produto-list')
+        response = self.client.get(url, {'omit': 'nome'})
+
+        self.assertEqual(response.data, [{'id': self.produto.id, 'preco': '5.99'}])
+
+    def test_list_values_igual_ao_serializer(self):
+        """Testa se o caminho via values() produz a mesma saída do serializer"""
+        from .serializers import ProdutoSerializer
+
+        response = self.client.get(reverse('produto-list'))
+
+        self.assertEqual(response.data, ProdutoSerializer(Produto.objects.all(), many=True).data)
+
+    def test_retrieve_fields(self):
+        """Testa ?fields= no detalhe do produto"""
+        url = reverse('produto-detail', kwargs={'pk': self.produto.id})
+        response = self.client.get(url, {'fields': 'preco'})
+
+        self.assertEqual(response.data, {'preco': '5.99'})
+
+    def test_fields_ignorado_na_escrita(self):
+        """Testa que ?fields= não descarta campos de entrada na criação"""
+        url = reverse('produto-list') + '?fields=id'
+        response = self.client.post(url, {'nome': 'Feijão', 'preco': '4.50'}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['nome'], 'Feijão')
+
+
+class ProdutoColumnarTest(APITestCase):
+    """Testes para ?format=columnar na API de Produtos"""
+
+    def setUp(self):
+        self.arroz = Produto.objects.create(nome="Arroz", preco=5.99)
+        self.feijao = Produto.objects.create(nome="Feijão", preco=4.50)
+
+    def test_list_columnar(self):
+        """Testa a listagem em formato colunar"""
+        url = reverse('produto-list')
+        response = self.client.get(url, {'format': 'columnar'})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], 'application/vnd.comprasaux.columnar+json')
+        self.assertEqual(response.json(), {
+            'fields': ['id', 'nome', 'preco'],
+            'columns': [
+                [self.arroz.id, self.feijao.id],
+                ['Arroz', 'Feijão'],
+                ['5.99', '4.50'],
+            ],
+            'count': 2,
+        })
+
+    def test_list_columnar_com_fields(self):
+        """Testa o formato colunar combinado com ?fields="""
+        url = reverse('produto-list')
+        response = self.client.get(url, {'format': 'columnar', 'fields': 'nome'})
+
+        self.assertEqual(response.json()['columns'], [['Arroz', 'Feijão']])
+
+    def test_list_columnar_vazio(self):
+        """Testa o formato colunar sem produtos"""
+        Produto.objects.all().delete()
+        response = self.client.get(reverse('produto-list'), {'format': 'columnar'})
+
+        self.assertEqual(response.json(), {'fields': ['id', 'nome', 'preco'], 'columns': [[], [], []], 'count': 0})
+
+
+class ProdutoResponseCacheTest(APITestCase):
+    """Testes para o cache da listagem de produtos"""
+
+    def setUp(self):
+        Produto.objects.create(nome="Arroz", preco=5.99)
+
+    def test_listagem_cacheada_ate_escrita(self):
+        """Testa que a listagem vem do cache até a próxima escrita"""
+        url = reverse('produto-list')
+        self.client.get(url)
+
+        with self.assertNumQueries(0):
+            response = self.client.get(url)
+        self.assertEqual(response['X-Cache'], 'HIT')
+
+        self.client.post(url, {'nome': 'Feijão', 'preco': '4.50'}, format='json')
+        response = self.client.get(url)
+
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(len(response.data), 2)
+
+    def test_formatos_com_chaves_distintas(self):
+        """Testa que o formato colunar não reaproveita a listagem comum"""
+        url = reverse('produto-list')
+        self.client.get(url)
+        response = self.client.get(url, {'format': 'columnar'})
+
+        self.assertEqual(response.json()['fields'], ['id', 'nome', 'preco'])
+
+
+class ProdutoPaginacaoTest(APITestCase):
+    """Testes para ?limit=/?offset= e ?search= na API de Produtos"""
+
+    def setUp(self):
+        Produto.objects.bulk_create(Produto(nome=f"Arroz {i}", preco=5.99) for i in range(5))
+        Produto.objects.create(nome="Feijão", preco=4.50)
+
+    def test_paginas(self):
+        """Testa a paginação pedida pelo cliente, em ordem estável"""
+        url = reverse('produto-list')
+        response = self.client.get(url, {'limit': 2, 'offset': 2})
+
+        self.assertEqual(response.data['count'], 6)
+        self.assertEqual([p['nome'] for p in response.data['results']], ['Arroz 2', 'Arroz 3'])
+        self.assertIn('offset=4', response.data['next'])
+
+    def test_sem_limit_lista_completa(self):
+        response = self.client.get(reverse('produto-list'))
+
+        self.assertEqual(len(response.data), 6)
+
+    def test_busca_no_servidor(self):
+        response = self.client.get(reverse('produto-list'), {'search': 'feij', 'limit': 10})
+
+        self.assertEqual(response.data['count'], 1)
+        self.assertEqual(response.data['results'][0]['nome'], 'Feijão')
+
+    def test_limite_maximo(self):
+        with self.settings(API_MAX_PAGE_SIZE=3):
+            response = self.client.get(reverse('produto-list'), {'limit': 100})
+
+        self.assertEqual(len(response.data['results']), 3)
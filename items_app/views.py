@@ -1,8 +1,38 @@
-from rest_framework import viewsets
+from django.utils.decorators import method_decorator
+from rest_framework import filters, viewsets
+from core_app.cache import cached_response
+from core_app.http_cache import SurrogateKeyMixin
+from core_app.idempotency import IdempotencyMixin
+from core_app.pagination import LimitOffsetPagination
+from core_app.versioning import CATALOG, produto_namespace
+from core_app.viewsets import ValuesListMixin, VersionBumpMixin
 from .models import Produto
 from .serializers import ProdutoSerializer
 
 
-class ProdutoViewSet(viewsets.ModelViewSet):
-    queryset = Produto.objects.all()
+class ProdutoViewSet(SurrogateKeyMixin, IdempotencyMixin, VersionBumpMixin, ValuesListMixin, viewsets.ModelViewSet):
+    # Ordem estável para a paginação (?limit=&offset=)
+    queryset = Produto.objects.order_by('id')
     serializer_class = ProdutoSerializer
+    proxy_cache_scope = 'catalog'
+    pagination_class = LimitOffsetPagination
+    filter_backends = [filters.SearchFilter]
+    search_fields = ['nome']
+
+    def get_surrogate_namespaces(self, request, pk=None, **kwargs):
+        return [CATALOG, produto_namespace(pk)] if pk else [CATALOG]
+
+    def get_version_namespaces(self, instance):
+        return [CATALOG, produto_namespace(instance.pk)]
+
+    def get_queryset(self):
+        """Aceita ``?ids=1,2,3`` para buscas em lote (ver basket_app.catalog)"""
+        queryset = super().get_queryset()
+        ids = self.request.query_params.get('ids')
+        if ids is not None:
+            queryset = queryset.filter(pk__in=[pid for pid in ids.split(',') if pid.strip().isdigit()])
+        return queryset
+
+    @method_decorator(cached_response(lambda request, *args, **kwargs: [CATALOG]))
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
@@ -31,7 +31,7 @@ class IntegrationTest(TransactionTestCase):
             estabelecimento="Supermercado ABC"
         )
     
-    @patch('basket_app.serializers.requests.get')
+    @patch('basket_app.catalog.requests.get')
     def test_full_integration_flow(self, mock_get):
         """Testa o fluxo completo de integração entre os módulos"""
         
@@ -84,7 +84,7 @@ class IntegrationTest(TransactionTestCase):
         self.assertEqual(data['quantidade'], 2)
         self.assertEqual(data['subtotal'], 11.98)  # 5.99 * 2
     
-    @patch('basket_app.serializers.requests.get')
+    @patch('basket_app.catalog.requests.get')
     def test_basket_total_calculation(self, mock_get):
         """Testa o cálculo do total do carrinho com integração"""
         
@@ -205,7 +205,7 @@ class APIIntegrationTest(APITestCase):
         self.assertEqual(response.data['total_itens_unicos'], 1)
         self.assertEqual(response.data['valor_total'], 11.98)
     
-    @patch('basket_app.views.requests.get')
+    @patch('basket_app.catalog.requests.get')
     def test_multiple_baskets_integration(self, mock_get):
         """Testa integração com múltiplos carrinhos"""
         
@@ -278,7 +278,7 @@ class PerformanceIntegrationTest(TestCase):
             estabelecimento="Supermercado Grande"
         )
     
-    @patch('basket_app.serializers.requests.get')
+    @patch('basket_app.catalog.requests.get')
     def test_large_basket_performance(self, mock_get):
         """Testa performance com carrinho grande"""
         